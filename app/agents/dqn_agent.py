@@ -2,12 +2,12 @@ import torch
 import torch.nn as nn
 import torch.optim as optim
 import numpy as np
-import random
 from collections import deque
 from typing import Tuple, List
 from app.agents.base_agent import BaseAgent
 from app.environment.tennis_env import TennisEnv, Action
 from app.models.env import State
+from app.utils.rng import SeedLike, as_seed_sequence, make_generator
 
 
 class DQNNetwork(nn.Module):
@@ -34,9 +34,12 @@ class DQNAgent(BaseAgent):
         epsilon_decay: float = 0.995,
         memory_size: int = 10000,
         batch_size: int = 32,
-        target_update_freq: int = 100
+        target_update_freq: int = 100,
+        seed: SeedLike = None
     ):
         self.env = env
+        # Replay guarda ids densos de estado; o encoding sai da tabela pré-calculada
+        self.state_index = env.state_index
         self.state_size = len(env.state)
         self.action_size = len(env.action_space)
         self.lr = lr
@@ -47,13 +50,20 @@ class DQNAgent(BaseAgent):
         self.batch_size = batch_size
         self.target_update_freq = target_update_freq
         
+        # Streams independentes para exploração, amostragem do replay e pesos iniciais
+        explore_seq, replay_seq, torch_seq = as_seed_sequence(seed).spawn(3)
+        self.rng = make_generator(explore_seq)
+        self.replay_rng = make_generator(replay_seq)
+        
         # Experience replay buffer
         self.memory = deque(maxlen=memory_size)
         
         # Neural networks
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.q_network = DQNNetwork(self.state_size, self.action_size).to(self.device)
-        self.target_network = DQNNetwork(self.state_size, self.action_size).to(self.device)
+        with torch.random.fork_rng(devices=[]):
+            torch.manual_seed(int(torch_seq.generate_state(1, np.uint64)[0] >> np.uint64(1)))
+            self.q_network = DQNNetwork(self.state_size, self.action_size).to(self.device)
+            self.target_network = DQNNetwork(self.state_size, self.action_size).to(self.device)
         self.optimizer = optim.Adam(self.q_network.parameters(), lr=lr)
         
         # Update target network
@@ -65,58 +75,93 @@ class DQNAgent(BaseAgent):
         """Copy weights from main network to target network"""
         self.target_network.load_state_dict(self.q_network.state_dict())
     
+    def frozen(self) -> "DQNAgent":
+        """Greedy copy of the current Q-network, e.g. a self-play opponent that no longer learns"""
+        snapshot = DQNAgent(self.env, gamma=self.gamma, epsilon=0.0, epsilon_min=0.0, memory_size=1, seed=0)
+        snapshot.q_network.load_state_dict(self.q_network.state_dict())
+        snapshot.update_target_network()
+        snapshot.q_network.eval()
+        return snapshot
+
     def remember(self, state, action, reward, next_state, done):
-        """Store experience in replay buffer"""
-        self.memory.append((state, action, reward, next_state, done))
+        """Store experience in replay buffer, states given as ``State``, encoded array or state id"""
+        self.memory.append((self._state_id(state), action, reward, self._state_id(next_state), done))
+
+    def _state_id(self, state) -> int:
+        """Dense ``StateIndex`` id of a ``State``, an encoded state or an id"""
+        if isinstance(state, State):
+            return self.state_index.id_of(state)
+        if isinstance(state, np.ndarray):
+            return int(self.state_index.ids_from_encodings(state[None])[0])
+        return int(state)
     
     def act(self, state: State) -> Action:
-        """Choose action using epsilon-greedy policy"""
-        if random.random() <= self.epsilon:
+        """Choose action using epsilon-greedy policy over the legal actions"""
+        if self.rng.random() <= self.epsilon:
             # Random action
-            return self._random_action()
+            return self._random_action(state)
         
         # Use neural network to choose action
-        state_tensor = torch.FloatTensor(state.encode(self.env)).unsqueeze(0).to(self.device)
-        q_values = self.q_network(state_tensor)
-        action_idx = torch.argmax(q_values).item()
+        state_tensor = torch.as_tensor(self.state_index.encode([self.state_index.id_of(state)]), device=self.device)
+        q_values = self.q_network(state_tensor)[0]
+        mask = torch.tensor(self.env.action_mask(state), device=self.device)
+        action_idx = torch.argmax(q_values.masked_fill(~mask, float("-inf"))).item()
         
         return self._idx_to_action(action_idx)
     
-    def _random_action(self) -> Action:
-        """Generate random valid action"""
-        # Implement based on your Action class
-        # This is a placeholder - adjust based on your action space
-        action = random.choice(list(self.env.action_space))
-        
-        return Action(
-            shot_type=action[0],
-            shot_direction=action[1]
-        )
+    def act_batch(self, observations: np.ndarray, masks: np.ndarray = None) -> np.ndarray:
+        """
+        Epsilon-greedy action indices for a batch of encoded states (one forward pass).
+
+        ``masks`` are the legal actions of each state; by default they are read
+        from the shot one-hot of the observations.
+        """
+        if masks is None:
+            masks = self._masks_from_encoding(observations)
+        with torch.no_grad():
+            q_values = self.q_network(torch.as_tensor(observations, dtype=torch.float32, device=self.device))
+            q_values = q_values.masked_fill(~torch.as_tensor(masks, device=self.device), float("-inf"))
+        actions = torch.argmax(q_values, dim=1).cpu().numpy()
+        explore = self.rng.random(len(actions)) <= self.epsilon
+        if explore.any():
+            # Exploração uniforme entre as ações legais: maior ruído entre as permitidas
+            noise = np.where(masks[explore], self.rng.random(masks[explore].shape), -1.0)
+            actions[explore] = noise.argmax(axis=1)
+        return actions
+
+    def _masks_from_encoding(self, encoded: np.ndarray) -> np.ndarray:
+        """Legal-action masks of encoded states, from their last-shot one-hot"""
+        n_types = len(self.env.last_shot_space)
+        return self.env.action_masks[np.asarray(encoded)[:, :n_types].argmax(axis=1)]
+
+    def _random_action(self, state: State = None) -> Action:
+        """Generate a random action among the legal ones in ``state`` (default: env state)"""
+        legal = np.flatnonzero(self.env.action_mask(state))
+        return self.env.action_table[legal[self.rng.integers(len(legal))]]
     
     def _idx_to_action(self, idx: int) -> Action:
         """Convert action index to Action object"""
-        # Implement based on your action space encoding
-        action = list(self.env.action_space)[idx]
-        
-        return Action(
-            shot_type=action[0],
-            shot_direction=action[1]
-        )
+        return self.env.action_table[idx]
     
     def replay(self):
         """Train the model on a batch of experiences"""
         if len(self.memory) < self.batch_size:
             return None
         
-        batch = random.sample(self.memory, self.batch_size)
-        states = torch.FloatTensor([e[0].encode(self.env) for e in batch]).to(self.device)
-        actions = torch.LongTensor([e[1] for e in batch]).to(self.device)
-        rewards = torch.FloatTensor([e[2] for e in batch]).to(self.device)
-        next_states = torch.FloatTensor([e[3].encode(self.env) for e in batch]).to(self.device)
-        dones = torch.BoolTensor([e[4] for e in batch]).to(self.device)
+        batch = [self.memory[i] for i in self.replay_rng.choice(len(self.memory), self.batch_size, replace=False)]
+        state_ids, actions, rewards, next_ids, dones = (np.array(column) for column in zip(*batch))
+        # Um fancy-index na tabela de encodings por lote, sem reconstruir listas
+        states = torch.as_tensor(self.state_index.encode(state_ids), device=self.device)
+        actions = torch.as_tensor(actions, dtype=torch.long, device=self.device)
+        rewards = torch.as_tensor(rewards, dtype=torch.float32, device=self.device)
+        next_states = torch.as_tensor(self.state_index.encode(next_ids), device=self.device)
+        next_shot_types = self.state_index.keys(next_ids) // self.state_index.n_directions
+        next_masks = torch.as_tensor(self.env.action_masks[next_shot_types], device=self.device)
+        dones = torch.as_tensor(dones, dtype=torch.bool, device=self.device)
         
         current_q_values = self.q_network(states).gather(1, actions.unsqueeze(1))
-        next_q_values = self.target_network(next_states).max(1)[0].detach()
+        # Alvo usa só as ações legais do próximo estado
+        next_q_values = self.target_network(next_states).masked_fill(~next_masks, float("-inf")).max(1)[0].detach()
         target_q_values = rewards + (self.gamma * next_q_values * ~dones)
         
         loss = nn.MSELoss()(current_q_values.squeeze(), target_q_values)
@@ -0,0 +1,138 @@
+import numpy as np
+from typing import Dict, List
+from app.agents.base_agent import BaseAgent
+from app.environment.tennis_env import TennisEnv, Action
+from app.models.env import State
+from app.utils.rng import SeedLike, as_seed_sequence, make_generator
+
+
+class TabularQAgent(BaseAgent):
+    """
+    Q-learning with the Q-function as a (state id, action index) NumPy table.
+
+    States are the dense ids of ``env.state_index``, so the table covers the
+    whole observable state space of ``TennisEnv`` and a batch of transitions
+    from a vector env is one fancy-indexed update. Illegal actions are never
+    chosen nor used in the bootstrap target.
+    """
+
+    def __init__(
+        self,
+        env: TennisEnv,
+        lr: float = 0.1,
+        gamma: float = 0.95,
+        epsilon: float = 1.0,
+        epsilon_min: float = 0.01,
+        epsilon_decay: float = 0.9995,
+        initial_q: float = 0.0,
+        seed: SeedLike = None
+    ):
+        self.env = env
+        self.state_index = env.state_index
+        self.action_size = len(env.action_space)
+        self.lr = lr
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.epsilon_min = epsilon_min
+        self.epsilon_decay = epsilon_decay
+
+        self.rng = make_generator(as_seed_sequence(seed))
+        self.q_table = np.full((len(self.state_index), self.action_size), initial_q, dtype=np.float32)
+        self.update_count = 0
+
+    def state_ids(self, states) -> np.ndarray:
+        """Dense ids of a ``State``, of ids or of encoded states (float arrays)"""
+        if isinstance(states, State):
+            return np.array([self.state_index.id_of(states)])
+        states = np.asarray(states)
+        if states.dtype.kind == "f":
+            return self.state_index.ids_from_encodings(np.atleast_2d(states))
+        return np.atleast_1d(states)
+
+    def legal_masks(self, ids: np.ndarray) -> np.ndarray:
+        """Legal-action masks of state ids, from their last shot"""
+        return self.env.action_masks[self.state_index.keys(ids) // self.state_index.n_directions]
+
+    def act(self, state: State) -> Action:
+        """Choose action using epsilon-greedy policy over the legal actions"""
+        return self.env.action_table[int(self.act_batch(self.state_ids(state))[0])]
+
+    def act_batch(self, states, masks: np.ndarray = None) -> np.ndarray:
+        """
+        Epsilon-greedy action indices for a batch of states (ids or encoded).
+
+        ``masks`` are the legal actions of each state; by default they are read
+        from the last shot of each id.
+        """
+        ids = self.state_ids(states)
+        if masks is None:
+            masks = self.legal_masks(ids)
+        actions = np.where(masks, self.q_table[ids], -np.inf).argmax(axis=1)
+        explore = self.rng.random(len(actions)) <= self.epsilon
+        if explore.any():
+            # Exploração uniforme entre as ações legais: maior ruído entre as permitidas
+            noise = np.where(masks[explore], self.rng.random(masks[explore].shape), -1.0)
+            actions[explore] = noise.argmax(axis=1)
+        return actions
+
+    def update(self, states, actions, rewards, next_states, dones) -> float:
+        """
+        One Q-learning step on a batch of transitions; returns the mean squared
+        TD error. Repeated (state, action) pairs in a batch add their updates.
+        """
+        ids = self.state_ids(states)
+        next_ids = self.state_ids(next_states)
+        actions = np.asarray(actions)
+        # Alvo usa só as ações legais do próximo estado
+        next_q = np.where(self.legal_masks(next_ids), self.q_table[next_ids], -np.inf).max(axis=1)
+        targets = np.asarray(rewards) + self.gamma * next_q * ~np.asarray(dones, dtype=bool)
+        td_errors = targets - self.q_table[ids, actions]
+        np.add.at(self.q_table, (ids, actions), self.lr * td_errors)
+
+        self.update_count += 1
+        if self.epsilon > self.epsilon_min:
+            self.epsilon *= self.epsilon_decay
+        return float(np.mean(td_errors ** 2))
+
+    def remember(self, state, action, reward, next_state, done):
+        """Online update from a single transition (same signature as ``DQNAgent.remember``)"""
+        self.update(state, [action], [reward], next_state, [done])
+
+    def train_vectorized(self, vec_env, total_steps: int = 1_000_000) -> Dict[str, List[float]]:
+        """
+        Q-learning on ``vec_env.num_envs`` matches at once, one batched update
+        per vector step. ``total_steps`` counts transitions across all matches.
+        """
+        history = {"episode_rewards": [], "episode_lengths": [], "td_errors": []}
+        ids = self.state_ids(vec_env.reset())
+        masks = vec_env.action_mask()
+        steps = 0
+        while steps < total_steps:
+            actions = self.act_batch(ids, masks)
+            observations, rewards, dones, info = vec_env.step(actions)
+            masks = info["action_mask"]
+
+            # Partidas terminadas já foram resetadas: a transição usa a observação final
+            final_observations = observations
+            if dones.any():
+                final_observations = np.where(dones[:, None], info["final_observation"], observations)
+            terminals = dones & ~info["truncated"]
+            history["td_errors"].append(self.update(ids, actions, rewards, final_observations, terminals))
+            ids = self.state_ids(observations)
+            steps += vec_env.num_envs
+
+            for i in np.flatnonzero(dones):
+                history["episode_rewards"].append(float(info["episode_reward"][i]))
+                history["episode_lengths"].append(int(info["episode_length"][i]))
+        return history
+
+    def save(self, filepath: str):
+        """Save the Q-table as a single ``.npy`` file"""
+        np.save(filepath, self.q_table)
+
+    def load(self, filepath: str):
+        """Load a Q-table saved by ``save``"""
+        q_table = np.load(filepath)
+        if q_table.shape != self.q_table.shape:
+            raise ValueError(f"Q-table shape {q_table.shape} does not match this env's {self.q_table.shape}.")
+        self.q_table = q_table.astype(np.float32, copy=False)
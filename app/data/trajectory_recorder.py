@@ -0,0 +1,325 @@
+"""
+Columnar trajectory recorder for offline RL datasets.
+
+``TrajectoryRecorder`` stores one row per env step: (env, episode, step,
+state, action, reward, next state, done, truncated) plus, for a
+``TennisEnv``, the list of ``EnvEvent`` emitted during the step. States are
+stored as dense ``StateIndex`` ids (``observation="id"``) or as the encoded
+float32 vectors (``observation="encoded"``).
+
+Rows are buffered in preallocated NumPy arrays and every full buffer is
+written as one Arrow record batch (a Parquet row group or an Arrow IPC
+batch), so memory stays flat however many episodes are recorded. Files roll
+over every ``rows_per_file`` rows under an optional Hive-style partition
+directory (e.g. ``{"policy": "dqn"}`` -> ``policy=dqn/part-00000.parquet``),
+and ``read_trajectories`` loads the whole dataset back with ``pyarrow.dataset``.
+"""
+import pathlib
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from app.environment.events import EnvEvent
+from app.models.env import State
+
+FORMATS = {"parquet": "parquet", "arrow": "arrow"}
+OBSERVATIONS = ("id", "encoded")
+
+# Vocabulário fixo das colunas de eventos (arrays de dicionário)
+EVENT_NAMES = [event.value for event in EnvEvent]
+EVENT_CODES = {event: code for code, event in enumerate(EnvEvent)}
+EVENT_DETAILS = ["step", "point", "rally", "error", "winner"]
+DETAIL_CODES = {detail: code for code, detail in enumerate(EVENT_DETAILS)}
+
+EVENT_TYPE = pa.struct(
+    [
+        ("event", pa.dictionary(pa.int8(), pa.string())),
+        ("turn", pa.int8()),
+        ("shot", pa.int16()),
+        ("detail", pa.dictionary(pa.int8(), pa.string())),
+    ]
+)
+
+
+class TrajectoryRecorder:
+    """
+    Buffer env transitions and write them as Arrow record batches.
+
+    Args:
+        path: Dataset directory (created if missing).
+        env: The ``TennisEnv`` recorded, or the ``TennisEnv`` of a vector env
+            (``vec_env.env``); gives the state index and, with ``events``, the
+            event stream.
+        num_envs: Number of envs of the vector env recorded with ``record_batch``.
+        file_format: ``"parquet"`` or ``"arrow"`` (Arrow IPC file).
+        observation: ``"id"`` (int32 ``StateIndex`` ids) or ``"encoded"``
+            (fixed-size float32 lists).
+        events: Subscribe to ``env`` and store the events of each step
+            (``TennisEnv`` only: the vector env emits none).
+        chunk_size: Rows per record batch.
+        rows_per_file: Rows per file before rolling over to the next one.
+        partition: Hive-style partition values of the files written.
+        compression: Parquet compression codec.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, pathlib.Path],
+        env,
+        num_envs: int = 1,
+        file_format: str = "parquet",
+        observation: str = "id",
+        events: bool = False,
+        chunk_size: int = 65_536,
+        rows_per_file: int = 4_194_304,
+        partition: Optional[Dict[str, object]] = None,
+        compression: str = "zstd",
+    ):
+        if file_format not in FORMATS:
+            raise ValueError(f"Unknown format {file_format!r}, expected one of {sorted(FORMATS)}.")
+        if observation not in OBSERVATIONS:
+            raise ValueError(f"Unknown observation {observation!r}, expected one of {OBSERVATIONS}.")
+        self.env = env
+        self.state_index = env.state_index
+        self.num_envs = num_envs
+        self.file_format = file_format
+        self.observation = observation
+        self.chunk_size = chunk_size
+        self.rows_per_file = rows_per_file
+        self.compression = compression
+        self.directory = pathlib.Path(path)
+        for key, value in (partition or {}).items():
+            self.directory = self.directory / f"{key}={value}"
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        if observation == "id":
+            state_type = pa.int32()
+            state_shape = (chunk_size,)
+            state_dtype = np.int32
+        else:
+            obs_size = self.state_index.encodings.shape[1]
+            state_type = pa.list_(pa.float32(), obs_size)
+            state_shape = (chunk_size, obs_size)
+            state_dtype = np.float32
+        fields = [
+            ("env", pa.int32()),
+            ("episode", pa.int64()),
+            ("step", pa.int32()),
+            ("state", state_type),
+            ("action", pa.int16()),
+            ("reward", pa.float32()),
+            ("next_state", state_type),
+            ("done", pa.bool_()),
+            ("truncated", pa.bool_()),
+        ]
+        if events:
+            fields.append(("events", pa.list_(EVENT_TYPE)))
+        self.schema = pa.schema(fields)
+
+        # Buffers pré-alocados de uma record batch
+        self._columns = {
+            "env": np.zeros(chunk_size, dtype=np.int32),
+            "episode": np.zeros(chunk_size, dtype=np.int64),
+            "step": np.zeros(chunk_size, dtype=np.int32),
+            "state": np.zeros(state_shape, dtype=state_dtype),
+            "action": np.zeros(chunk_size, dtype=np.int16),
+            "reward": np.zeros(chunk_size, dtype=np.float32),
+            "next_state": np.zeros(state_shape, dtype=state_dtype),
+            "done": np.zeros(chunk_size, dtype=bool),
+            "truncated": np.zeros(chunk_size, dtype=bool),
+        }
+        self._rows = 0
+        self._episode = np.zeros(num_envs, dtype=np.int64)
+        self._step = np.zeros(num_envs, dtype=np.int32)
+
+        # Eventos: arrays planos + offsets por linha (uma ListArray por batch)
+        self._events = events
+        self._event_offsets = np.zeros(chunk_size + 1, dtype=np.int32)
+        self._event_columns = self._empty_event_columns(4 * chunk_size if events else 0)
+        self._n_events = 0
+        self._shot_keys = env.compiled_graph.keys
+        if events:
+            env.subscribe(self._on_event)
+
+        self._writer = None
+        self._file_rows = 0
+        self._files = 0
+        self.rows_written = 0
+
+    @staticmethod
+    def _empty_event_columns(capacity: int) -> Dict[str, np.ndarray]:
+        return {
+            "event": np.zeros(capacity, dtype=np.int8),
+            "turn": np.zeros(capacity, dtype=np.int8),
+            "shot": np.zeros(capacity, dtype=np.int16),
+            "detail": np.zeros(capacity, dtype=np.int8),
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _on_event(self, event: EnvEvent, data: dict):
+        n = self._n_events
+        if n == len(self._event_columns["event"]):
+            self._event_columns = {name: np.resize(column, 2 * n) for name, column in self._event_columns.items()}
+        # -1 marca campo ausente (vira null na escrita)
+        turn = data.get("turn", data.get("winner", data.get("by", data.get("server"))))
+        action = data.get("action")
+        detail = data.get("reason", data.get("cause"))
+        columns = self._event_columns
+        columns["event"][n] = EVENT_CODES[event]
+        columns["turn"][n] = turn.value if turn is not None else -1
+        columns["shot"][n] = self._shot_keys.get(tuple(action), -1) if action is not None else -1
+        columns["detail"][n] = DETAIL_CODES.get(detail, -1)
+        self._n_events = n + 1
+
+    def _states(self, states) -> np.ndarray:
+        """Stored form (ids or encodings) of a ``State``, of ids or of encoded states (float arrays)."""
+        if isinstance(states, State):
+            ids = np.array([self.state_index.id_of(states)])
+        else:
+            states = np.asarray(states)
+            if states.dtype.kind == "f":
+                encoded = np.atleast_2d(states)
+                return encoded if self.observation == "encoded" else self.state_index.ids_from_encodings(encoded)
+            ids = np.atleast_1d(states)
+        return ids if self.observation == "id" else self.state_index.encode(ids)
+
+    def record(self, state, action: int, reward: float, next_state, done: bool, truncated: bool = False):
+        """
+        Record one ``TennisEnv`` step. ``state``/``next_state`` are ``State``
+        objects or ids and ``action`` an index of ``action_space``; the
+        episode counter moves on after a ``done`` step.
+        """
+        self.record_batch(
+            self._states(state), np.array([action]), np.array([reward]), self._states(next_state),
+            np.array([done]), np.array([truncated]),
+        )
+
+    def record_batch(self, states, actions, rewards, next_states, dones, truncated=None):
+        """
+        Record one step of every env of a vector env. States are (num_envs,)
+        ids or (num_envs, observation size) encodings; ``next_states`` must be
+        the final observations of the envs that finished (``info["final_observation"]``),
+        not their reset observations.
+        """
+        states = self._states(states)
+        next_states = self._states(next_states)
+        n = len(states)
+        envs = np.arange(n)
+        actions = np.asarray(actions)
+        rewards = np.asarray(rewards)
+        dones = np.asarray(dones, dtype=bool)
+        truncated = np.broadcast_to(np.asarray(False if truncated is None else truncated, dtype=bool), n)
+        # Lote maior que o buffer: vai em pedaços de até chunk_size linhas
+        for start in range(0, n, self.chunk_size):
+            piece = slice(start, start + self.chunk_size)
+            self._append(
+                envs[piece], states[piece], actions[piece], rewards[piece], next_states[piece], dones[piece],
+                truncated[piece],
+            )
+
+        self._step[envs] += 1
+        self._step[envs[dones]] = 0
+        self._episode[envs[dones]] += 1
+
+    def _append(self, envs, states, actions, rewards, next_states, dones, truncated):
+        """Copy at most ``chunk_size`` rows into the buffers, flushing them first if they would overflow."""
+        n = len(envs)
+        if self._rows + n > self.chunk_size:
+            self.flush()
+        rows = slice(self._rows, self._rows + n)
+        columns = self._columns
+        columns["env"][rows] = envs
+        columns["episode"][rows] = self._episode[envs]
+        columns["step"][rows] = self._step[envs]
+        columns["state"][rows] = states
+        columns["action"][rows] = actions
+        columns["reward"][rows] = rewards
+        columns["next_state"][rows] = next_states
+        columns["done"][rows] = dones
+        columns["truncated"][rows] = truncated
+        if self._events:
+            # Todos os eventos pendentes vão para a linha do passo (um env só)
+            self._event_offsets[self._rows + 1 : self._rows + n + 1] = self._n_events
+        self._rows += n
+
+    def _event_array(self) -> pa.Array:
+        n = self._n_events
+        columns = {name: column[:n] for name, column in self._event_columns.items()}
+        values = pa.StructArray.from_arrays(
+            [
+                pa.DictionaryArray.from_arrays(pa.array(columns["event"]), pa.array(EVENT_NAMES)),
+                pa.array(columns["turn"], mask=columns["turn"] < 0),
+                pa.array(columns["shot"], mask=columns["shot"] < 0),
+                pa.DictionaryArray.from_arrays(
+                    pa.array(columns["detail"], mask=columns["detail"] < 0), pa.array(EVENT_DETAILS)
+                ),
+            ],
+            fields=list(EVENT_TYPE),
+        )
+        return pa.ListArray.from_arrays(pa.array(self._event_offsets[: self._rows + 1]), values)
+
+    def _record_batch(self) -> pa.RecordBatch:
+        n = self._rows
+        arrays = []
+        for field in self.schema:
+            if field.name == "events":
+                arrays.append(self._event_array())
+                continue
+            column = self._columns[field.name][:n]
+            if column.ndim == 2:
+                arrays.append(pa.FixedSizeListArray.from_arrays(pa.array(column.ravel()), column.shape[1]))
+            else:
+                arrays.append(pa.array(column, type=field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+    def _open_writer(self):
+        path = self.directory / f"part-{self._files:05d}.{FORMATS[self.file_format]}"
+        self._files += 1
+        self._file_rows = 0
+        if self.file_format == "parquet":
+            self._writer = pq.ParquetWriter(path, self.schema, compression=self.compression)
+        else:
+            self._writer = pa.ipc.new_file(path, self.schema)
+
+    def flush(self):
+        """Write the buffered rows as one record batch."""
+        if not self._rows:
+            return
+        if self._writer is None:
+            self._open_writer()
+        self._writer.write_batch(self._record_batch())
+        self._file_rows += self._rows
+        self.rows_written += self._rows
+        # Eventos do passo ainda não gravado (emitidos antes do flush) passam para a próxima batch
+        start = self._event_offsets[self._rows]
+        pending = self._n_events - start
+        for column in self._event_columns.values():
+            column[:pending] = column[start : self._n_events]
+        self._n_events = pending
+        self._rows = 0
+        if self._file_rows >= self.rows_per_file:
+            self._writer.close()
+            self._writer = None
+
+    def close(self):
+        """Flush the buffer, close the current file and stop listening to the env."""
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._events:
+            self.env.unsubscribe(self._on_event)
+            self._events = False
+
+
+def read_trajectories(path: Union[str, pathlib.Path], file_format: str = "parquet") -> pa.Table:
+    """Load a dataset written by ``TrajectoryRecorder``, partition columns included."""
+    return ds.dataset(str(path), format=FORMATS[file_format], partitioning="hive").to_table()
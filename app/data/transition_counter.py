@@ -1,11 +1,11 @@
 from collections import defaultdict
 import polars as pl
+from app.models.rules import is_legal_transition
 from app.models.shot import Shot
 
 class TransitionBuilder:
     def __init__(self):
         self.unwanted_characters = {"unknown", "q", "0"}
-        self.errors_and_winners = {"@", "#", "winner"}
 
 
     def build(self, df: pl.DataFrame) -> pl.DataFrame:
@@ -24,19 +24,8 @@ class TransitionBuilder:
                 last_shot_direction in self.unwanted_characters):
                 continue
 
-            # Transições entre erros e winners não são consideradas
-            if (shot_type in self.errors_and_winners and
-                last_shot_type in self.errors_and_winners):
-                continue
-
-            # Antes de um saque só pode vir erro ou winner
-            if (last_shot_type not in self.errors_and_winners and
-                shot_type == "serve"):
-                continue
-
-            # Depois de um erro ou winner só pode vir saque
-            if (last_shot_type in self.errors_and_winners and
-                shot_type != "serve"):
+            # Saque só depois de erro/winner, e depois de erro/winner só saque
+            if not is_legal_transition(last_shot_type, shot_type):
                 continue
 
             state = (last_shot_type, last_shot_direction)
@@ -3,6 +3,7 @@ import numpy as np
 from scipy.special import softmax
 import pandas as pd
 from typing import Dict, Any
+from app.models.rules import is_legal_transition
 
 
 class TransitionBuilder:
@@ -12,7 +13,6 @@ class TransitionBuilder:
         self.df = pd.read_csv(transitions_path)
         self.transition_counts: Dict[tuple, int] = {}
 
-        self.errors_and_winners = {"#", "@", "winner"}
         self.possible_types = [
             "serve",
             "@",
@@ -49,19 +49,8 @@ class TransitionBuilder:
                 # Garantir que todas as combinações de last_s_type e last_s_dir existam
                 for last_s_type in self.possible_types:
                     for last_s_dir in self.possible_directions:
-                        if last_s_type == "serve" and s_type == "serve":
-                            continue  # Regra 1
-
-                        # Transições entre erros e winners não são consideradas
-                        if s_type in self.errors_and_winners and last_s_type in self.errors_and_winners:
-                            continue
-
-                        # Antes de um saque só pode vir erro ou winner
-                        if last_s_type not in self.errors_and_winners and s_type == "serve":
-                            continue
-
-                        # Depois de um erro ou winner só pode vir saque
-                        if last_s_type in self.errors_and_winners and s_type != "serve":
+                        # Saque só depois de erro/winner, e depois de erro/winner só saque
+                        if not is_legal_transition(last_s_type, s_type):
                             continue
 
                         key = (last_s_type, last_s_dir, s_type, s_dir)
@@ -0,0 +1,267 @@
+"""
+Multiprocess vectorized ``TennisEnv``.
+
+``AsyncVectorTennisEnv`` splits N matches into shards, one per worker process.
+Each worker runs a ``VectorTennisEnv`` over its shard and reads actions from /
+writes observations, rewards and dones to NumPy arrays backed by
+``multiprocessing.shared_memory``. Only a short command goes through the pipe
+of each worker, so a step costs no pickling of arrays.
+
+``step_async`` hands the actions to the workers and returns immediately;
+``step_wait`` collects the results. The learner can run its update in between
+while the workers simulate.
+"""
+import multiprocessing as mp
+import traceback
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.environment.tennis_engine import MatchFormat
+from app.environment.tennis_env import TennisEnv
+from app.environment.vector_env import VectorTennisEnv
+from app.utils.rng import SeedLike, as_seed_sequence
+
+
+def _buffer_specs(num_envs: int, observation_size: int, action_size: int) -> Dict[str, Tuple[tuple, str]]:
+    """Shape and dtype of every shared buffer."""
+    return {
+        "actions": ((num_envs,), "int64"),
+        "observations": ((num_envs, observation_size), "float32"),
+        "rewards": ((num_envs,), "float32"),
+        "dones": ((num_envs,), "bool"),
+        "illegal": ((num_envs,), "bool"),
+        "truncated": ((num_envs,), "bool"),
+        "action_mask": ((num_envs, action_size), "bool"),
+        "final_observations": ((num_envs, observation_size), "float32"),
+        "episode_reward": ((num_envs,), "float64"),
+        "episode_length": ((num_envs,), "int64"),
+    }
+
+
+def _attach(names: Dict[str, str], specs: Dict[str, Tuple[tuple, str]]):
+    """Open the shared blocks by name and view them as arrays."""
+    blocks = {key: shared_memory.SharedMemory(name=name) for key, name in names.items()}
+    arrays = {key: np.ndarray(specs[key][0], dtype=specs[key][1], buffer=blocks[key].buf) for key in names}
+    return blocks, arrays
+
+
+def _worker(conn, transition_graph, start, stop, seed, env_kwargs, names, specs):
+    blocks, arrays = _attach(names, specs)
+    shard = slice(start, stop)
+    try:
+        vec = VectorTennisEnv(transition_graph, stop - start, seed=seed, env_ids=np.arange(start, stop), **env_kwargs)
+        while True:
+            command, data = conn.recv()
+            if command == "step":
+                observations, rewards, dones, info = vec.step(arrays["actions"][shard])
+                arrays["observations"][shard] = observations
+                arrays["rewards"][shard] = rewards
+                arrays["dones"][shard] = dones
+                arrays["illegal"][shard] = info["illegal"]
+                arrays["truncated"][shard] = info["truncated"]
+                arrays["action_mask"][shard] = info["action_mask"]
+                if dones.any():
+                    arrays["final_observations"][shard][dones] = info["final_observation"][dones]
+                    arrays["episode_reward"][shard][dones] = info["episode_reward"][dones]
+                    arrays["episode_length"][shard][dones] = info["episode_length"][dones]
+                conn.send(("ok", None))
+            elif command == "reset":
+                arrays["observations"][shard] = vec.reset()
+                arrays["action_mask"][shard] = vec.action_mask()
+                conn.send(("ok", None))
+            elif command == "set_match_format":
+                vec.set_match_format(data)
+                conn.send(("ok", None))
+            elif command == "close":
+                conn.send(("ok", None))
+                break
+            else:
+                raise ValueError(f"Unknown command: {command}")
+    except Exception:
+        conn.send(("error", traceback.format_exc()))
+    finally:
+        del arrays
+        for block in blocks.values():
+            block.close()
+        conn.close()
+
+
+class AsyncVectorTennisEnv:
+    """
+    ``VectorTennisEnv`` sharded over worker processes.
+
+    Args:
+        transition_graph: Graph from ``TransitionBuilder.build``.
+        num_envs: Total number of concurrent matches.
+        num_workers: Worker processes (default: ``os.cpu_count()``, at most ``num_envs``).
+        seed: Root seed of the per-env streams. Env ``i`` draws from the same
+            stream whatever ``num_workers`` is, so rollouts are reproducible
+            across worker counts.
+        context: ``multiprocessing`` start method (default: platform default).
+        copy: Return copies of the shared buffers from ``step_wait``/``reset``.
+            With ``copy=False`` the arrays are views that the next step overwrites.
+        backend: Step backend of the workers, ``"numpy"`` or ``"numba"``.
+        **env_kwargs: ``TennisEnv`` arguments, as in ``VectorTennisEnv``.
+    """
+
+    def __init__(
+        self,
+        transition_graph,
+        num_envs: int,
+        num_workers: Optional[int] = None,
+        seed: SeedLike = None,
+        context: Optional[str] = None,
+        copy: bool = True,
+        backend: str = "numpy",
+        **env_kwargs,
+    ):
+        # Env local só para expor os mesmos espaços e recompensas
+        self.env = TennisEnv(transition_graph, **env_kwargs)
+        self.action_space = self.env.action_space
+        self.observation_size = len(self.env.state)
+        self.num_envs = num_envs
+        self.num_workers = min(num_workers or mp.cpu_count(), num_envs)
+        self.copy = copy
+        self.closed = False
+        self._waiting = False
+
+        specs = _buffer_specs(num_envs, self.observation_size, len(self.action_space))
+        self._blocks = {
+            key: shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize))
+            for key, (shape, dtype) in specs.items()
+        }
+        self._arrays = {
+            key: np.ndarray(shape, dtype=dtype, buffer=self._blocks[key].buf) for key, (shape, dtype) in specs.items()
+        }
+        names = {key: block.name for key, block in self._blocks.items()}
+
+        ctx = mp.get_context(context)
+        bounds = np.linspace(0, num_envs, self.num_workers + 1).astype(int)
+        # Mesma raiz para todos os workers: o stream depende só do id global do env
+        seed = as_seed_sequence(seed)
+        self._pipes = []
+        self._processes = []
+        for w in range(self.num_workers):
+            parent, child = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker,
+                args=(
+                    child,
+                    transition_graph,
+                    int(bounds[w]),
+                    int(bounds[w + 1]),
+                    seed,
+                    dict(env_kwargs, backend=backend),
+                    names,
+                    specs,
+                ),
+                daemon=True,
+            )
+            process.start()
+            child.close()
+            self._pipes.append(parent)
+            self._processes.append(process)
+
+    def _send_all(self, command: str, data=None):
+        for pipe in self._pipes:
+            pipe.send((command, data))
+
+    def _receive_all(self):
+        errors = []
+        for pipe in self._pipes:
+            status, message = pipe.recv()
+            if status == "error":
+                errors.append(message)
+        if errors:
+            self.close(terminate=True)
+            raise RuntimeError("Worker failed:\n" + "\n".join(errors))
+
+    def _out(self, key: str) -> np.ndarray:
+        array = self._arrays[key]
+        return array.copy() if self.copy else array
+
+    def set_match_format(self, match_format: MatchFormat):
+        """Play ``match_format`` in every worker from the next ``reset()`` on."""
+        self._send_all("set_match_format", match_format)
+        self._receive_all()
+
+    def reset(self) -> np.ndarray:
+        self._send_all("reset")
+        self._receive_all()
+        return self._out("observations")
+
+    def action_mask(self) -> np.ndarray:
+        """(N, actions) mask of the legal actions, as of the last ``reset``/``step_wait``."""
+        return self._out("action_mask")
+
+    def step_async(self, actions):
+        """Write the actions to shared memory and start every worker."""
+        if self._waiting:
+            raise RuntimeError("step_async called twice without step_wait.")
+        self._arrays["actions"][:] = actions
+        self._send_all("step")
+        self._waiting = True
+
+    def step_wait(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, dict]:
+        """Wait for the workers and return the same tuple as ``VectorTennisEnv.step``."""
+        if not self._waiting:
+            raise RuntimeError("step_wait called without step_async.")
+        self._receive_all()
+        self._waiting = False
+        dones = self._out("dones")
+        info = {
+            "illegal": self._out("illegal"),
+            "truncated": self._out("truncated"),
+            "action_mask": self._out("action_mask"),
+        }
+        if dones.any():
+            info["final_observation"] = self._out("final_observations")
+            info["episode_reward"] = self._out("episode_reward")
+            info["episode_length"] = self._out("episode_length")
+        return self._out("observations"), self._out("rewards"), dones, info
+
+    def step(self, actions) -> Tuple[np.ndarray, np.ndarray, np.ndarray, dict]:
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self, terminate: bool = False):
+        """Stop the workers and free the shared memory."""
+        if self.closed:
+            return
+        self.closed = True
+        if not terminate:
+            if self._waiting:
+                for pipe in self._pipes:
+                    pipe.recv()
+            try:
+                self._send_all("close")
+                for pipe in self._pipes:
+                    pipe.recv()
+            except (BrokenPipeError, EOFError):
+                pass
+        for process in self._processes:
+            if terminate:
+                process.terminate()
+            process.join()
+        for pipe in self._pipes:
+            pipe.close()
+        self._arrays = {}
+        for block in self._blocks.values():
+            try:
+                block.close()
+            except BufferError:
+                # Ainda há views (copy=False) apontando para o bloco
+                pass
+            block.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        if not getattr(self, "closed", True):
+            self.close()
@@ -0,0 +1,170 @@
+"""
+NumPy-backed batch scoring engine.
+
+``BatchTennisMatch`` holds N matches as parallel arrays and applies a vector of
+point winners to all of them in one call, using the same transition tables as
+``CompactTennisMatch``. Regular game states and tiebreak states are stacked in
+a single table so one fancy-index advances every match regardless of whether
+it is in a tiebreak.
+"""
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.environment.compact_engine import GAME_SCORE_LABELS, P1, P2, ScoreTable, engine_tables
+from app.environment.tennis_engine import STANDARD, MatchFormat
+from app.models.env import Turn
+
+# Valor usado nos arrays de vencedores quando ninguém venceu o game/set
+NO_WINNER = -1
+
+
+def _table_arrays(table: ScoreTable, offset: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Convert a ``ScoreTable`` to (next, won, shift) arrays of shape (states, 2)."""
+    nxt = np.array([[t[0] + offset for t in row] for row in table.next], dtype=np.int16)
+    won = np.array([[t[1] for t in row] for row in table.next], dtype=bool)
+    shift = np.array([[t[2] for t in row] for row in table.next], dtype=np.int16)
+    return nxt, won, shift
+
+
+class BatchTables:
+    """Stacked game + tiebreak tables and the set table as NumPy arrays."""
+
+    def __init__(self, game: ScoreTable, tiebreak: ScoreTable, set_table: ScoreTable):
+        self.tiebreak_offset = len(game)
+        game_next, game_won, game_shift = _table_arrays(game)
+        tb_next, tb_won, tb_shift = _table_arrays(tiebreak, self.tiebreak_offset)
+        self.game_next = np.concatenate([game_next, tb_next])
+        self.game_won = np.concatenate([game_won, tb_won])
+        self.game_shift = np.concatenate([game_shift, tb_shift])
+        # Pontos (p1, p2) de cada estado: códigos 0..4 no game normal, pontos no tiebreak
+        self.game_points = np.array(game.states + tiebreak.states, dtype=np.int16)
+
+        self.set_next, self.set_won, self.set_tiebreak = _table_arrays(set_table)
+        self.set_tiebreak = self.set_tiebreak.astype(bool)
+        self.set_games = np.array(set_table.states, dtype=np.int16)
+
+
+def score_ids(score: tuple, match_format: MatchFormat = STANDARD) -> Tuple[int, int, int, bool]:
+    """
+    (game id, game shift, set id, tiebreak) in the ``BatchTables`` of
+    ``match_format`` of a ``TennisMatch.score()``/``CompactTennisMatch.score()``
+    tuple; tiebreak scores are folded as in the tiebreak table.
+    """
+    game_p1, game_p2, set_p1, set_p2 = score[:4]
+    game_table, tiebreak_table, set_table = engine_tables(match_format)
+    set_id = set_table.index[(set_p1, set_p2)]
+    if isinstance(game_p1, str):
+        codes = (GAME_SCORE_LABELS.index(game_p1), GAME_SCORE_LABELS.index(game_p2))
+        return game_table.index[codes], 0, set_id, False
+    # O excesso acima de max_score - 1 vira shift
+    shift = max(0, min(game_p1, game_p2) - (match_format.tiebreak_points - 1))
+    return len(game_table) + tiebreak_table.index[(game_p1 - shift, game_p2 - shift)], shift, set_id, True
+
+
+@lru_cache(maxsize=None)
+def batch_tables(match_format: MatchFormat = STANDARD) -> BatchTables:
+    """``BatchTables`` of ``match_format``, built once per format."""
+    return BatchTables(*engine_tables(match_format))
+
+
+class BatchTennisMatch:
+    """
+    N concurrent matches stored as parallel arrays.
+
+    Attributes:
+        game (np.ndarray): Game state id per match (tiebreak ids are offset).
+        game_shift (np.ndarray): Folded tiebreak shift per match.
+        set (np.ndarray): Set state id per match.
+        tiebreak (np.ndarray): Whether each match is playing a tiebreak.
+        sets_won (np.ndarray): Sets won by (player1, player2), shape (N, 2).
+        server (np.ndarray): ``Turn`` value of the current server.
+        winner (np.ndarray): ``Turn`` value of the match winner, or ``NO_WINNER``.
+    """
+
+    def __init__(self, n: int, server: Turn = Turn.PLAYER, match_format: MatchFormat = STANDARD):
+        self.n = n
+        self.format = match_format
+        self.tables = batch_tables(match_format)
+        self.initial_server = server
+        self.player1 = Turn.PLAYER
+        self.player2 = Turn.PC
+        self.game = np.zeros(n, dtype=np.int16)
+        self.game_shift = np.zeros(n, dtype=np.int16)
+        self.set = np.zeros(n, dtype=np.int16)
+        self.tiebreak = np.zeros(n, dtype=bool)
+        self.sets_won = np.zeros((n, 2), dtype=np.int16)
+        self.server = np.full(n, server.value, dtype=np.int8)
+        self.winner = np.full(n, NO_WINNER, dtype=np.int8)
+        self.reset()
+
+    def reset(self, idx: Optional[np.ndarray] = None):
+        """Reset every match, or only those at ``idx``, to the start of a match."""
+        if idx is None:
+            idx = slice(None)
+        match_tiebreak = self.format.match_tiebreak
+        self.game[idx] = self.tables.tiebreak_offset if match_tiebreak else 0
+        self.game_shift[idx] = 0
+        self.set[idx] = 0
+        self.tiebreak[idx] = match_tiebreak
+        self.sets_won[idx] = 0
+        self.server[idx] = self.initial_server.value
+        self.winner[idx] = NO_WINNER
+
+    def point(self, p1_won: np.ndarray, idx: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score one point in each selected match.
+
+        Args:
+            p1_won: Boolean array, True where player1 won the point.
+            idx: Optional match indices ``p1_won`` refers to (default: all).
+
+        Returns:
+            (game_winner, set_winner) arrays aligned with ``p1_won``, holding
+            the ``Turn`` value of the winner or ``NO_WINNER``.
+        """
+        t = self.tables
+        if idx is None:
+            idx = np.arange(self.n)
+        p1_won = np.asarray(p1_won, dtype=bool)
+        winner = np.where(p1_won, P1, P2)
+        winner_turn = np.where(p1_won, self.player1.value, self.player2.value).astype(np.int8)
+
+        game = self.game[idx]
+        game_won = t.game_won[game, winner]
+        self.game[idx] = t.game_next[game, winner]
+        self.game_shift[idx] += t.game_shift[game, winner]
+
+        game_winner = np.where(game_won, winner_turn, NO_WINNER).astype(np.int8)
+        set_winner = np.full(len(idx), NO_WINNER, dtype=np.int8)
+        if not game_won.any():
+            return game_winner, set_winner
+
+        done = idx[game_won]
+        w = winner[game_won]
+        set_state = self.set[done]
+        set_won = t.set_won[set_state, w]
+        enters_tiebreak = t.set_tiebreak[set_state, w]
+
+        self.set[done] = np.where(set_won, 0, t.set_next[set_state, w])
+        self.sets_won[done[set_won], w[set_won]] += 1
+        self.tiebreak[done] = np.where(set_won, self.format.match_tiebreak, enters_tiebreak)
+        self.game[done] = np.where(self.tiebreak[done], t.tiebreak_offset, 0)
+        self.game_shift[done] = 0
+        self.server[done] = 1 - self.server[done]
+
+        set_winner[game_won] = np.where(set_won, winner_turn[game_won], NO_WINNER)
+        match_won = set_won & (self.sets_won[done, w] >= self.format.sets_to_win)
+        self.winner[done[match_won]] = winner_turn[game_won][match_won]
+        return game_winner, set_winner
+
+    @property
+    def game_points(self) -> np.ndarray:
+        """(N, 2) game score: codes 0..4 in regular games, points in a tiebreak."""
+        return self.tables.game_points[self.game] + self.game_shift[:, None]
+
+    @property
+    def set_games(self) -> np.ndarray:
+        """(N, 2) games won by each player in the current set."""
+        return self.tables.set_games[self.set]
@@ -0,0 +1,296 @@
+"""
+Throughput benchmark of the environments, with baselines to catch regressions.
+
+A scenario is (graph, variant, policy):
+
+- graph: ``synthetic`` (``synthetic_graph``, always available) or the
+  combined graph built from ``scripts/sum_transition_counts.py`` output;
+- variant: the scalar ``TennisEnv`` (default, compact engine and macro steps)
+  and the ``VectorTennisEnv`` backends;
+- policy: ``random`` (any action, illegal ones included), ``fixed`` (the
+  first legal action after each shot) or ``masked`` (uniform over legal
+  actions).
+
+Only the ``step`` calls are timed. Each scenario reports steps/s, episodes/s,
+p50/p99 latency of a ``step`` call and the memory a step allocates on top of
+what it holds (tracemalloc peak per call, on a short separate pass).
+``compare`` checks a run against stored baselines with a relative tolerance
+per metric; by default only throughput and allocation are gated, the
+latency percentiles of a single run being too noisy for it.
+"""
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.environment import numba_kernel
+from app.environment.tennis_env import TennisEnv
+from app.environment.vector_env import VectorTennisEnv
+from app.models.rules import DIRECTIONS, SHOT_TYPES, TERMINAL_SHOTS, is_legal_transition
+
+POLICIES = ("random", "fixed", "masked")
+
+# Métrica -> (maior é melhor?, tolerância relativa padrão; None: só informativa)
+METRICS = {
+    "steps_per_s": (True, 0.5),
+    "episodes_per_s": (True, 0.5),
+    "p50_us": (False, None),
+    "p99_us": (False, None),
+    "alloc_bytes_per_step": (False, 0.25),
+}
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Measurements of one scenario.
+
+    Attributes:
+        steps (int): Env steps timed (a vector step counts one per env).
+        episodes (int): Episodes finished during them.
+        seconds (float): Time spent inside ``step`` calls.
+        p50_us, p99_us (float): Latency percentiles of a ``step`` call, in microseconds.
+        alloc_bytes_per_step (float): Mean tracemalloc peak of a step above the memory held before it.
+    """
+
+    steps: int
+    episodes: int
+    seconds: float
+    p50_us: float
+    p99_us: float
+    alloc_bytes_per_step: float
+
+    @property
+    def steps_per_s(self) -> float:
+        return self.steps / self.seconds if self.seconds else 0.0
+
+    @property
+    def episodes_per_s(self) -> float:
+        return self.episodes / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> dict:
+        return dict(asdict(self), steps_per_s=self.steps_per_s, episodes_per_s=self.episodes_per_s)
+
+    @classmethod
+    def median(cls, runs: List["BenchmarkResult"]) -> "BenchmarkResult":
+        """Median of each measurement over runs of the same scenario (same steps and episodes)."""
+        return cls(
+            steps=runs[0].steps,
+            episodes=runs[0].episodes,
+            seconds=float(np.median([r.seconds for r in runs])),
+            p50_us=float(np.median([r.p50_us for r in runs])),
+            p99_us=float(np.median([r.p99_us for r in runs])),
+            alloc_bytes_per_step=float(np.median([r.alloc_bytes_per_step for r in runs])),
+        )
+
+
+def synthetic_graph(seed: int = 0, p_terminal: float = 0.2) -> Dict[str, Dict[int, Dict[tuple, float]]]:
+    """
+    Random transition graph in the format of ``TransitionBuilder.build``
+    following the shot rules: each reply to a rally shot is an error or a
+    winner with probability about ``p_terminal``.
+    """
+    rng = np.random.default_rng(seed)
+    graph = {}
+    for last_type in SHOT_TYPES:
+        graph[last_type] = {}
+        for direction in DIRECTIONS:
+            weights = {}
+            for shot_type in SHOT_TYPES:
+                if not is_legal_transition(last_type, shot_type):
+                    continue
+                scale = p_terminal if shot_type in TERMINAL_SHOTS else 1.0 - p_terminal
+                for shot_direction in DIRECTIONS:
+                    weights[(shot_type, shot_direction)] = scale * (rng.random() + 0.1)
+            total = sum(weights.values())
+            graph[last_type][direction] = {shot: w / total for shot, w in weights.items()}
+    return graph
+
+
+def _scalar_policy(env: TennisEnv, policy: str, rng: np.random.Generator) -> Callable[[np.ndarray], int]:
+    """Action index from the legal-action mask of the current state."""
+    n_actions = len(env.action_space)
+    if policy == "random":
+        return lambda mask: int(rng.integers(n_actions))
+    if policy == "fixed":
+        return lambda mask: int(mask.argmax())
+    if policy == "masked":
+        return lambda mask: int(rng.choice(np.flatnonzero(mask)))
+    raise ValueError(f"Unknown policy {policy!r}, expected one of {POLICIES}.")
+
+
+def _vector_policy(vec: VectorTennisEnv, policy: str, rng: np.random.Generator) -> Callable[[np.ndarray], np.ndarray]:
+    """Action indices from the (num_envs, actions) legal-action masks."""
+    n_actions = len(vec.action_space)
+    if policy == "random":
+        return lambda masks: rng.integers(n_actions, size=len(masks))
+    if policy == "fixed":
+        return lambda masks: masks.argmax(axis=1)
+    if policy == "masked":
+        return lambda masks: np.where(masks, rng.random(masks.shape), -1.0).argmax(axis=1)
+    raise ValueError(f"Unknown policy {policy!r}, expected one of {POLICIES}.")
+
+
+def _measure(
+    act: Callable[[], object], step: Callable[[object], int], calls: int, alloc_calls: int, steps_per_call: int
+) -> BenchmarkResult:
+    """
+    Time ``calls`` calls of ``step(act())``, ``step`` returning the number of
+    finished episodes, then trace ``alloc_calls`` more. Only ``step`` is measured.
+    """
+    latencies = np.empty(calls, dtype=np.int64)
+    episodes = 0
+    for i in range(calls):
+        action = act()
+        start = time.perf_counter_ns()
+        episodes += step(action)
+        latencies[i] = time.perf_counter_ns() - start
+
+    # Passada curta e separada: o tracemalloc deixa cada chamada bem mais lenta
+    allocated = 0
+    if alloc_calls:
+        tracemalloc.start()
+        try:
+            for _ in range(alloc_calls):
+                action = act()
+                held, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                step(action)
+                allocated += tracemalloc.get_traced_memory()[1] - held
+        finally:
+            tracemalloc.stop()
+
+    return BenchmarkResult(
+        steps=calls * steps_per_call,
+        episodes=episodes,
+        seconds=latencies.sum() / 1e9,
+        p50_us=float(np.percentile(latencies, 50)) / 1e3,
+        p99_us=float(np.percentile(latencies, 99)) / 1e3,
+        alloc_bytes_per_step=allocated / max(alloc_calls * steps_per_call, 1),
+    )
+
+
+def bench_scalar(
+    graph, policy: str, steps: int, seed: int = 0, alloc_steps: int = 1000, **env_kwargs
+) -> BenchmarkResult:
+    """Benchmark ``TennisEnv(graph, **env_kwargs)`` for ``steps`` steps."""
+    env = TennisEnv(graph, seed=seed, **env_kwargs)
+    choose = _scalar_policy(env, policy, np.random.default_rng(seed))
+    env.reset()
+    mask = env.action_mask()
+
+    def step(action: int) -> int:
+        nonlocal mask
+        _, _, done, info = env.step(action)
+        if done:
+            env.reset()
+            mask = env.action_mask()
+        else:
+            mask = info["action_mask"]
+        return int(done)
+
+    return _measure(lambda: choose(mask), step, steps, alloc_steps, 1)
+
+
+def bench_vector(
+    graph, policy: str, steps: int, num_envs: int = 64, seed: int = 0, alloc_steps: int = 1000, **env_kwargs
+) -> BenchmarkResult:
+    """Benchmark ``VectorTennisEnv(graph, num_envs, **env_kwargs)`` for about ``steps`` env steps."""
+    vec = VectorTennisEnv(graph, num_envs, seed=seed, **env_kwargs)
+    choose = _vector_policy(vec, policy, np.random.default_rng(seed))
+    vec.reset()
+    masks = vec.action_mask()
+
+    def step(actions: np.ndarray) -> int:
+        nonlocal masks
+        _, _, dones, info = vec.step(actions)
+        masks = info["action_mask"]
+        return int(dones.sum())
+
+    step(choose(masks))  # aquece (compila o kernel do backend numba)
+    calls = max(steps // num_envs, 1)
+    return _measure(lambda: choose(masks), step, calls, max(alloc_steps // num_envs, 1), num_envs)
+
+
+def variants(num_envs: int = 64) -> Dict[str, Callable[..., BenchmarkResult]]:
+    """Benchmark functions by variant name, ``(graph, policy, steps, seed)`` -> result."""
+    table = {
+        "scalar": bench_scalar,
+        "scalar-compact": lambda *args, **kw: bench_scalar(*args, compact_engine=True, **kw),
+        "macro": lambda *args, **kw: bench_scalar(*args, compact_engine=True, macro_steps=True, **kw),
+        f"vector{num_envs}": lambda *args, **kw: bench_vector(*args, num_envs=num_envs, **kw),
+    }
+    if numba_kernel.NUMBA_AVAILABLE:
+        table[f"vector{num_envs}-numba"] = lambda *args, **kw: bench_vector(
+            *args, num_envs=num_envs, backend="numba", **kw
+        )
+    return table
+
+
+def run(
+    graphs: Dict[str, dict],
+    steps: int = 20_000,
+    vector_steps: int = 200_000,
+    num_envs: int = 64,
+    policies=POLICIES,
+    seed: int = 0,
+    repeats: int = 3,
+    only: Optional[List[str]] = None,
+    log: Callable[[str], None] = print,
+) -> Dict[str, dict]:
+    """
+    Run every (graph, variant, policy) scenario, or those whose name
+    ``graph/variant/policy`` contains one of ``only``, and return
+    ``{scenario name: BenchmarkResult.to_dict()}``. Each scenario runs once
+    untimed to warm up, then ``repeats`` times; every metric is the median
+    over those runs.
+    """
+    results = {}
+    for graph_name, graph in graphs.items():
+        for variant, bench in variants(num_envs).items():
+            for policy in policies:
+                name = f"{graph_name}/{variant}/{policy}"
+                if only and not any(pattern in name for pattern in only):
+                    continue
+                n_steps = vector_steps if variant.startswith("vector") else steps
+                # Aquecimento descartado: caches, alocador e compilação do kernel
+                bench(graph, policy, max(n_steps // 10, 1), seed=seed)
+                result = BenchmarkResult.median([bench(graph, policy, n_steps, seed=seed) for _ in range(repeats)])
+                results[name] = result.to_dict()
+                log(
+                    f"{name:40s} {result.steps_per_s:>12,.0f} steps/s {result.episodes_per_s:>9,.1f} eps/s "
+                    f"p50 {result.p50_us:>8.1f}us p99 {result.p99_us:>8.1f}us "
+                    f"{result.alloc_bytes_per_step:>8.0f} B/step"
+                )
+    return results
+
+
+def compare(results: Dict[str, dict], baselines: dict) -> List[str]:
+    """
+    Regressions of ``results`` against ``baselines`` (``{"results": {...},
+    "tolerance": {metric: relative tolerance}}``); scenarios missing from
+    either side and metrics whose tolerance is ``None`` are not compared.
+    """
+    tolerance = {metric: default for metric, (_, default) in METRICS.items()}
+    tolerance.update(baselines.get("tolerance", {}))
+    regressions = []
+    for name, baseline in baselines.get("results", {}).items():
+        current = results.get(name)
+        if current is None:
+            continue
+        for metric, (higher_is_better, _) in METRICS.items():
+            if metric not in baseline or tolerance.get(metric) is None:
+                continue
+            expected, value = baseline[metric], current[metric]
+            if higher_is_better:
+                limit = expected * (1.0 - tolerance[metric])
+                failed = value < limit
+            else:
+                # Folga absoluta de 1 para métricas que podem ser 0 (alocação)
+                limit = expected * (1.0 + tolerance[metric]) + 1.0
+                failed = value > limit
+            if failed:
+                regressions.append(f"{name}: {metric} {value:,.1f} vs baseline {expected:,.1f} (limit {limit:,.1f})")
+    return regressions
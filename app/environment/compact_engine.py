@@ -0,0 +1,310 @@
+"""
+Integer-coded, table-driven scoring engine.
+
+``TennisMatch`` keeps game scores as strings and decides every point through
+if/elif chains, allocating new ``Game``/``Set``/``Tiebreak`` objects at each
+boundary. ``CompactTennisMatch`` keeps the whole scoreboard as a few ints and
+advances it through transition tables built once at import time, while
+returning exactly what ``TennisMatch.point()`` returns.
+"""
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple
+
+from app.environment.tennis_engine import STANDARD, Game, MatchFormat, MatchMoment, Set, Tiebreak
+from app.models.env import Turn
+
+# Labels of a regular game score, indexed by its integer code
+GAME_SCORE_LABELS = ("0", "15", "30", "40", "AD")
+
+# Index of the point winner in the tables
+P1 = 0
+P2 = 1
+
+# A transition is (next state, won?, shift increment)
+Transition = Tuple[int, bool, int]
+
+
+class ScoreTable:
+    """
+    Transition table for one kind of scoring unit (game, tiebreak or set).
+
+    Attributes:
+        states (list[tuple[int, int]]): (p1, p2) score of each state.
+        next (list[tuple[Transition, Transition]]): Transition from each state
+            when ``P1`` or ``P2`` wins the point.
+        labels (list[tuple]): Displayed score of each state.
+        index (dict): Maps a (p1, p2) score to its state id.
+    """
+
+    def __init__(self, states, next_fn, label_fn):
+        self.states: List[Tuple[int, int]] = list(states)
+        self.index = {s: i for i, s in enumerate(self.states)}
+        self.labels = [label_fn(s) for s in self.states]
+        self.next: List[Tuple[Transition, Transition]] = []
+        for s in self.states:
+            row = []
+            for winner in (P1, P2):
+                nxt, won, shift = next_fn(s, winner)
+                row.append((self.index[nxt] if nxt is not None else 0, won, shift))
+            self.next.append(tuple(row))
+
+    def __len__(self):
+        return len(self.states)
+
+
+def build_game_table(no_ad: bool = False) -> ScoreTable:
+    """
+    Regular game: codes 0..4 stand for 0, 15, 30, 40 and AD. With ``no_ad``
+    the point at 40-40 decides the game.
+    """
+    states = [(a, b) for a in range(4) for b in range(4)]
+    if not no_ad:
+        states += [(4, 3), (3, 4)]
+
+    def next_fn(state, winner):
+        mine, other = state if winner == P1 else state[::-1]
+        if mine < 3:
+            mine += 1
+        elif mine == 3 and other < 3:
+            return None, True, 0
+        elif mine == 3 and other == 3:
+            if no_ad:
+                return None, True, 0
+            mine = 4
+        elif mine == 4:
+            return None, True, 0
+        elif other == 4:
+            mine, other = 3, 3
+        nxt = (mine, other) if winner == P1 else (other, mine)
+        return nxt, False, 0
+
+    return ScoreTable(states, next_fn, lambda s: (GAME_SCORE_LABELS[s[0]], GAME_SCORE_LABELS[s[1]]))
+
+
+def build_tiebreak_table(max_score: int = 7, min_difference: int = 2) -> ScoreTable:
+    """
+    Tiebreak with a folded score: once both players pass ``max_score - 1`` the
+    score is pulled back and the excess goes to a shift, so the table stays
+    finite and the real score is ``state + shift``.
+    """
+    top = max_score - 1
+    states = [(a, b) for a in range(max_score) for b in range(max_score)]
+    states += [(top + d, top) for d in range(1, min_difference)]
+    states += [(top, top + d) for d in range(1, min_difference)]
+
+    def next_fn(state, winner):
+        a, b = state
+        if winner == P1:
+            a += 1
+        else:
+            b += 1
+        if a >= max_score and a - b >= min_difference:
+            return None, True, 0
+        if b >= max_score and b - a >= min_difference:
+            return None, True, 0
+        shift = 0
+        if a > top and b > top:
+            shift = min(a, b) - top
+            a, b = a - shift, b - shift
+        return (a, b), False, shift
+
+    return ScoreTable(states, next_fn, lambda s: s)
+
+
+def build_set_table(games_per_set: int = 6, match_tiebreak: bool = False) -> ScoreTable:
+    """
+    Games of a set. A transition is flagged ``True`` when the set ends and its
+    shift is 1 when the next game is a tiebreak. With ``match_tiebreak`` the
+    set is a single tiebreak, so any won "game" wins the set.
+    """
+    if match_tiebreak:
+        return ScoreTable([(0, 0)], lambda state, winner: (None, True, 0), lambda s: s)
+
+    states = [
+        (a, b)
+        for a in range(games_per_set + 1)
+        for b in range(games_per_set + 1)
+        if not (a == games_per_set and b < games_per_set - 1)
+        and not (b == games_per_set and a < games_per_set - 1)
+    ]
+
+    def next_fn(state, winner):
+        a, b = state
+        if winner == P1:
+            a += 1
+        else:
+            b += 1
+        mine, other = (a, b) if winner == P1 else (b, a)
+        if (mine >= games_per_set and mine - other >= 2) or mine == games_per_set + 1:
+            return None, True, 0
+        tiebreak = 1 if a == games_per_set and b == games_per_set else 0
+        return (a, b), False, tiebreak
+
+    return ScoreTable(states, next_fn, lambda s: s)
+
+
+class EngineTables(NamedTuple):
+    """Game, tiebreak and set tables of one ``MatchFormat``."""
+
+    game: ScoreTable
+    tiebreak: ScoreTable
+    set: ScoreTable
+
+
+@lru_cache(maxsize=None)
+def engine_tables(match_format: MatchFormat = STANDARD) -> EngineTables:
+    """Build (once per format) the transition tables of ``match_format``."""
+    return EngineTables(
+        build_game_table(match_format.no_ad),
+        build_tiebreak_table(match_format.tiebreak_points),
+        build_set_table(match_format.games_per_set, match_format.match_tiebreak),
+    )
+
+
+GAME_TABLE, TIEBREAK_TABLE, SET_TABLE = engine_tables(STANDARD)
+
+
+class CompactSnapshot(NamedTuple):
+    """Immutable copy of a ``CompactTennisMatch`` scoreboard."""
+
+    game: int
+    game_shift: int
+    set: int
+    tiebreak: bool
+    sets_p1: int
+    sets_p2: int
+    winner: Optional[Turn] = None
+
+
+class CompactTennisMatch:
+    """
+    Compact drop-in for ``TennisMatch``.
+
+    The scoreboard is a handful of ints (game state, tiebreak shift, set state,
+    tiebreak flag and sets won) and ``point()`` returns the same tuple as
+    ``TennisMatch.point()``.
+    """
+
+    __slots__ = (
+        "player1",
+        "player2",
+        "format",
+        "max_sets",
+        "game_table",
+        "tiebreak_table",
+        "set_table",
+        "game",
+        "game_shift",
+        "set",
+        "tiebreak",
+        "sets_p1",
+        "sets_p2",
+        "winner",
+    )
+
+    def __init__(self, match_format: MatchFormat = STANDARD):
+        self.player1 = Turn.PLAYER
+        self.player2 = Turn.PC
+        self.format = match_format
+        self.max_sets = match_format.best_of
+        self.game_table, self.tiebreak_table, self.set_table = engine_tables(match_format)
+        self.start_match()
+
+    def start_match(self):
+        self.game = 0
+        self.game_shift = 0
+        self.set = 0
+        self.tiebreak = self.format.match_tiebreak
+        self.sets_p1 = 0
+        self.sets_p2 = 0
+        self.winner = None
+
+    def end_match(self):
+        pass
+
+    def point(self, player):
+        winner = P1 if player == self.player1 else P2
+        if self.tiebreak:
+            game, game_won, shift = self.tiebreak_table.next[self.game][winner]
+        else:
+            game, game_won, shift = self.game_table.next[self.game][winner]
+
+        if not game_won:
+            self.game = game
+            if self.tiebreak:
+                self.game_shift += shift
+                a, b = self.tiebreak_table.states[game]
+                set_p1, set_p2 = self.set_table.states[self.set]
+                return a + self.game_shift, b + self.game_shift, set_p1, set_p2, None, None
+            game_p1, game_p2 = self.game_table.labels[game]
+            set_p1, set_p2 = self.set_table.states[self.set]
+            return game_p1, game_p2, set_p1, set_p2, None, None
+
+        self.game = 0
+        self.game_shift = 0
+        set_state, set_won, tiebreak = self.set_table.next[self.set][winner]
+        if set_won:
+            self.set = 0
+            self.tiebreak = self.format.match_tiebreak
+            if winner == P1:
+                self.sets_p1 += 1
+                sets_won = self.sets_p1
+            else:
+                self.sets_p2 += 1
+                sets_won = self.sets_p2
+            if sets_won >= self.format.sets_to_win:
+                self.winner = player
+            if self.tiebreak:
+                return 0, 0, 0, 0, player, player
+            return "0", "0", 0, 0, player, player
+
+        self.set = set_state
+        self.tiebreak = tiebreak == 1
+        set_p1, set_p2 = self.set_table.states[set_state]
+        if self.tiebreak:
+            return 0, 0, set_p1, set_p2, player, None
+        return "0", "0", set_p1, set_p2, player, None
+
+    def snapshot(self) -> CompactSnapshot:
+        """Capture the whole scoreboard in a small immutable value."""
+        return CompactSnapshot(
+            self.game, self.game_shift, self.set, self.tiebreak, self.sets_p1, self.sets_p2, self.winner
+        )
+
+    def restore(self, snapshot: CompactSnapshot):
+        """Restore a ``snapshot`` in place."""
+        (
+            self.game,
+            self.game_shift,
+            self.set,
+            self.tiebreak,
+            self.sets_p1,
+            self.sets_p2,
+            self.winner,
+        ) = snapshot
+
+    def score(self) -> tuple:
+        """(game_p1, game_p2, set_p1, set_p2, sets_p1, sets_p2) before the next point."""
+        return self.game_score() + self.set_score() + (self.sets_p1, self.sets_p2)
+
+    def game_score(self) -> tuple:
+        """Current game score, in the same format ``TennisMatch`` uses."""
+        if self.tiebreak:
+            a, b = self.tiebreak_table.states[self.game]
+            return a + self.game_shift, b + self.game_shift
+        return self.game_table.labels[self.game]
+
+    def set_score(self) -> tuple:
+        """Games won by each player in the current set."""
+        return self.set_table.states[self.set]
+
+    def to_match_moment(self):
+        """Build the equivalent ``MatchMoment``, for reports and serialization."""
+        moment = MatchMoment()
+        moment.current_set = Set()
+        moment.current_set.player1_score, moment.current_set.player2_score = self.set_score()
+        moment.current_game = Tiebreak(max_score=self.format.tiebreak_points) if self.tiebreak else Game()
+        moment.current_game.player1_score, moment.current_game.player2_score = self.game_score()
+        moment.match_score_p1 = self.sets_p1
+        moment.match_score_p2 = self.sets_p2
+        return moment
@@ -0,0 +1,217 @@
+"""
+Engine conformance and throughput harness over real charted points.
+
+The Match Charting Project point files read by ``scripts/parse_all_matches.py``
+record, for every point, the score before it was played (``Pts``, ``Gm1``/``Gm2``,
+``Set1``/``Set2``), the server (``Svr``) and the point winner (``PtWinner``).
+``replay`` streams those files, feeds the winners into a scoring engine and
+checks the engine's scoreboard against the recorded one before every point.
+"""
+import csv
+import itertools
+import pathlib
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.environment.tennis_engine import MatchFormat, TennisMatch
+from app.models.env import Turn
+
+# Sets decisivos que o engine sabe jogar: tiebreak comum a 6-6
+SUPPORTED_FINAL_SETS = {"1"}
+
+
+@dataclass
+class ConformanceReport:
+    """
+    Result of a replay.
+
+    Attributes:
+        matches (int): Matches replayed.
+        points (int): Points read from the files.
+        checked_points (int): Points whose recorded score was compared.
+        mismatched_matches (int): Matches where the engine diverged.
+        skipped_matches (int): Matches not replayed because their format in
+            the matches file is malformed (their points count as skipped).
+        skipped_points (int): Points not checked (after a mismatch, or in an
+            unsupported deciding set).
+        replay_seconds (float): Wall time of the whole replay, I/O included.
+        engine_seconds (float): Time spent only in ``point()`` calls.
+        engine_points (int): Points fed to the engine in the timed pass.
+        examples (list[dict]): First mismatches found, for debugging.
+    """
+
+    matches: int = 0
+    points: int = 0
+    checked_points: int = 0
+    mismatched_matches: int = 0
+    skipped_matches: int = 0
+    skipped_points: int = 0
+    replay_seconds: float = 0.0
+    engine_seconds: float = 0.0
+    engine_points: int = 0
+    examples: List[dict] = field(default_factory=list)
+
+    @property
+    def points_per_second(self) -> float:
+        """End-to-end replay rate, parsing included."""
+        return self.points / self.replay_seconds if self.replay_seconds else 0.0
+
+    @property
+    def engine_points_per_second(self) -> float:
+        """Scoring-only throughput of the engine."""
+        return self.engine_points / self.engine_seconds if self.engine_seconds else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "matches": self.matches,
+            "points": self.points,
+            "checked_points": self.checked_points,
+            "mismatched_matches": self.mismatched_matches,
+            "skipped_matches": self.skipped_matches,
+            "skipped_points": self.skipped_points,
+            "points_per_second": self.points_per_second,
+            "engine_points_per_second": self.engine_points_per_second,
+            "examples": self.examples,
+        }
+
+    def summary(self) -> str:
+        return (
+            f"{self.matches} matches, {self.points} points, {self.checked_points} checked, "
+            f"{self.mismatched_matches} mismatched matches, {self.skipped_matches} skipped matches, "
+            f"{self.skipped_points} skipped points | "
+            f"replay {self.points_per_second:,.0f} pts/s, engine {self.engine_points_per_second:,.0f} pts/s"
+        )
+
+
+def load_match_formats(matches_path: pathlib.Path) -> Dict[str, Optional[Tuple[MatchFormat, str]]]:
+    """
+    Map match_id -> (format, ``Final TB?`` code) from the charting matches
+    file; ``None`` when its ``Best of`` is not a number of sets.
+    """
+    formats = {}
+    with open(matches_path, newline="", encoding="utf-8", errors="replace") as fh:
+        for row in csv.DictReader(fh):
+            best_of = (row.get("Best of") or "").strip()
+            if not best_of.isdigit() or int(best_of) == 0:
+                # Formato desconhecido: replay com outro formato acusaria divergências falsas
+                formats[row["match_id"]] = None
+                continue
+            sets_to_win = (int(best_of) + 1) // 2
+            final_tb = (row.get("Final TB?") or "").strip()
+            formats[row["match_id"]] = (MatchFormat(sets_to_win=sets_to_win), final_tb)
+    return formats
+
+
+def iter_points(paths: Iterable[pathlib.Path]) -> Iterator[dict]:
+    """Stream point rows from the charting point files, one dict at a time."""
+    for path in paths:
+        with open(path, newline="", encoding="utf-8", errors="replace") as fh:
+            yield from csv.DictReader(fh)
+
+
+def recorded_score(row: dict) -> Optional[tuple]:
+    """
+    Recorded score before the point, as (game_p1, game_p2, set_p1, set_p2, sets_p1, sets_p2).
+
+    ``Pts`` is written server first, so it is swapped when player 2 serves.
+    """
+    try:
+        server_pts, returner_pts = row["Pts"].strip().split("-")
+        server = int(row["Svr"])
+        score = (int(row["Gm1"]), int(row["Gm2"]), int(row["Set1"]), int(row["Set2"]))
+    except (KeyError, ValueError, AttributeError):
+        return None
+    game = (server_pts, returner_pts) if server == 1 else (returner_pts, server_pts)
+    return game + score
+
+
+def _engine_score(engine) -> tuple:
+    game_p1, game_p2, *rest = engine.score()
+    return (str(game_p1), str(game_p2), *rest)
+
+
+def replay(
+    paths: Iterable[pathlib.Path],
+    engine_factory: Callable[[MatchFormat], object] = TennisMatch,
+    matches_path: Optional[pathlib.Path] = None,
+    max_matches: Optional[int] = None,
+    max_examples: int = 20,
+) -> ConformanceReport:
+    """
+    Replay charted points through a scoring engine and check its scoreboard.
+
+    Args:
+        paths: Charting point CSV files.
+        engine_factory: Builds an engine for a ``MatchFormat`` (``TennisMatch``,
+            ``CompactTennisMatch``, ...).
+        matches_path: Charting matches CSV, used for best-of and deciding-set
+            formats; matches with a malformed ``Best of`` are skipped. Without
+            it every match is treated as best of 3.
+        max_matches: Stop after this many matches.
+        max_examples: Number of mismatches kept in the report.
+    """
+    formats = load_match_formats(matches_path) if matches_path else {}
+    report = ConformanceReport()
+    start = time.perf_counter()
+
+    grouped = itertools.groupby(iter_points(paths), key=lambda row: row["match_id"])
+    for match_id, rows in itertools.islice(grouped, max_matches):
+        entry = formats.get(match_id, (MatchFormat(sets_to_win=2), "1"))
+        if entry is None:
+            rows = list(rows)
+            report.skipped_matches += 1
+            report.points += len(rows)
+            report.skipped_points += len(rows)
+            continue
+        match_format, final_tb = entry
+        decider = match_format.sets_to_win - 1
+        engine = engine_factory(match_format)
+        engine.start_match()
+        report.matches += 1
+
+        winners = []
+        checking = True
+        for row in rows:
+            report.points += 1
+            try:
+                winner = Turn.PLAYER if int(row["PtWinner"]) == 1 else Turn.PC
+            except (KeyError, ValueError, TypeError):
+                report.skipped_points += 1
+                checking = False
+                continue
+
+            expected = recorded_score(row)
+            # Sets decisivos com outras regras (vantagem, super tiebreak...) não são verificados
+            if expected and expected[4] == expected[5] == decider and final_tb not in SUPPORTED_FINAL_SETS:
+                checking = False
+
+            if checking and expected is not None:
+                actual = _engine_score(engine)
+                if actual != expected:
+                    checking = False
+                    report.mismatched_matches += 1
+                    if len(report.examples) < max_examples:
+                        report.examples.append(
+                            {"match_id": match_id, "pt": row.get("Pt"), "expected": expected, "engine": actual}
+                        )
+                else:
+                    report.checked_points += 1
+            if not checking:
+                report.skipped_points += 1
+
+            engine.point(winner)
+            winners.append(winner)
+
+        # Segunda passada só com point(), para medir o throughput do engine sem I/O
+        engine = engine_factory(match_format)
+        engine.start_match()
+        point = engine.point
+        tic = time.perf_counter()
+        for winner in winners:
+            point(winner)
+        report.engine_seconds += time.perf_counter() - tic
+        report.engine_points += len(winners)
+
+    report.replay_seconds = time.perf_counter() - start
+    return report
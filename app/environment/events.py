@@ -0,0 +1,119 @@
+"""
+Event hooks for ``TennisEnv``.
+
+The env emits an ``EnvEvent`` whenever something happens in a step (a shot is
+sampled, a point/game/set is won, an illegal action is rejected...). Callbacks
+are registered with ``subscribe`` and receive ``(event, data)``. Every call
+site checks ``self._subscribers`` before building the payload, so an env with
+no subscribers pays a single truthiness test per event and never formats text.
+
+``ConsoleNarrator`` is the built-in subscriber that prints the same narration
+the env used to print on every shot.
+"""
+from enum import Enum
+from typing import Callable, Dict, Iterable, List, Optional
+
+from app.models.env import Turn
+
+
+class EnvEvent(Enum):
+    """
+    Events emitted by ``TennisEnv``, with the keys of their ``data`` dict.
+
+    - ``TURN``: ``turn``; ``reason`` is ``"step"``, ``"point"`` or ``"rally"``.
+    - ``SHOT_SAMPLED``: ``action``, the opponent/rally shot drawn from the graph.
+    - ``RALLY_ENDED``: ``by`` (``Turn``), ``cause`` (``"error"`` or ``"winner"``),
+      ``second_shot`` (whether it was the second sampled shot of the step).
+    - ``FAULT``: ``server``, first serve missed.
+    - ``POINT_WON``: ``winner``.
+    - ``GAME_WON``: ``winner``, ``server`` (the server of the next game).
+    - ``SET_WON``: ``winner``.
+    - ``MATCH_WON``: ``winner``.
+    - ``ILLEGAL_ACTION``: ``action``, ``last_shot_type``.
+    """
+
+    TURN = "turn"
+    SHOT_SAMPLED = "shot_sampled"
+    RALLY_ENDED = "rally_ended"
+    FAULT = "fault"
+    POINT_WON = "point_won"
+    GAME_WON = "game_won"
+    SET_WON = "set_won"
+    MATCH_WON = "match_won"
+    ILLEGAL_ACTION = "illegal_action"
+
+
+EventCallback = Callable[[EnvEvent, dict], None]
+
+
+class EventSource:
+    """Mixin holding the subscribers of each ``EnvEvent``."""
+
+    def __init__(self):
+        # Vazio (falsy) enquanto ninguém se inscrever: é o que os pontos de emissão testam
+        self._subscribers: Dict[EnvEvent, List[EventCallback]] = {}
+
+    def subscribe(self, callback: EventCallback, events: Optional[Iterable[EnvEvent]] = None) -> EventCallback:
+        """
+        Call ``callback(event, data)`` on ``events`` (default: every event).
+
+        Returns the callback, so it can be passed to ``unsubscribe`` later.
+        """
+        for event in EnvEvent if events is None else events:
+            self._subscribers.setdefault(event, []).append(callback)
+        return callback
+
+    def unsubscribe(self, callback: EventCallback):
+        """Remove ``callback`` from every event it was subscribed to."""
+        for event in list(self._subscribers):
+            callbacks = [c for c in self._subscribers[event] if c != callback]
+            if callbacks:
+                self._subscribers[event] = callbacks
+            else:
+                del self._subscribers[event]
+
+    def _emit(self, event: EnvEvent, **data):
+        for callback in self._subscribers.get(event, ()):
+            callback(event, data)
+
+
+class ConsoleNarrator:
+    """Subscriber that prints the point-by-point narration of the match."""
+
+    def __init__(self, printer: Callable[[str], None] = print):
+        self.printer = printer
+
+    def __call__(self, event: EnvEvent, data: dict):
+        message = self.format(event, data)
+        if message is not None:
+            self.printer(message)
+
+    @staticmethod
+    def format(event: EnvEvent, data: dict) -> Optional[str]:
+        if event is EnvEvent.TURN:
+            if data["reason"] == "step":
+                return f"Vez do {data['turn']}"
+            if data["reason"] == "rally":
+                return f"Ponto continua, turno de: {data['turn']}"
+            return f"Turno para: {data['turn']}"
+        if event is EnvEvent.SHOT_SAMPLED:
+            action = data["action"]
+            return f"Chosen next action: ({action.shot_type}, {action.shot_direction})"
+        if event is EnvEvent.RALLY_ENDED:
+            who = "Player" if data["by"] == Turn.PLAYER else "PC"
+            if data["cause"] == "error":
+                return "PC errou seu lance no segundo lance" if data["second_shot"] else f"{who} errou"
+            return "PC fez um winner no segundo lance" if data["second_shot"] else f"{who} fez um winner"
+        if event is EnvEvent.FAULT:
+            return "Primeiro saque perdido, segunda chance."
+        if event is EnvEvent.POINT_WON:
+            return "Ponto para o PLAYER" if data["winner"] == Turn.PLAYER else "Ponto para o PC"
+        if event is EnvEvent.GAME_WON:
+            return f"Game ended! Server switched to: {data['server']}"
+        if event is EnvEvent.SET_WON:
+            return f"Set ended! Winner: {data['winner']}"
+        if event is EnvEvent.MATCH_WON:
+            return "Match ended!"
+        if event is EnvEvent.ILLEGAL_ACTION:
+            return f"Ação ilegal detectada: {data['action']}"
+        return None
@@ -0,0 +1,82 @@
+"""
+Gymnasium wrapper for ``TennisEnv``.
+
+``TennisGymEnv`` exposes the env with the standard Gymnasium contract:
+``Discrete(54)`` actions (indices into ``TennisEnv.action_space``), ``Box``
+float32 observations (``State.encode``, computed once per step) and
+``reset(seed=...) -> (obs, info)`` / ``step(a) -> (obs, reward, terminated,
+truncated, info)``. It is also registered as ``"Tennis-v0"``, so
+``gymnasium.make("Tennis-v0", transition_graph=graph)`` and the Gymnasium
+vectorization/benchmark tooling work out of the box.
+
+Gymnasium is an optional dependency: ``pip install gymnasium``.
+"""
+from typing import Optional
+
+import numpy as np
+
+try:
+    import gymnasium as gym
+    from gymnasium import spaces
+except ImportError as exc:
+    raise ImportError("TennisGymEnv requires gymnasium, install it with `pip install gymnasium`.") from exc
+
+from app.environment.events import ConsoleNarrator
+from app.environment.tennis_env import TennisEnv
+
+
+class TennisGymEnv(gym.Env):
+    """
+    ``TennisEnv`` behind the Gymnasium API.
+
+    Args:
+        transition_graph: Graph from ``TransitionBuilder.build``.
+        render_mode: ``"human"`` narrates every shot on the console.
+        **env_kwargs: Any other ``TennisEnv`` argument.
+    """
+
+    metadata = {"render_modes": ["human"]}
+
+    def __init__(self, transition_graph, render_mode: Optional[str] = None, **env_kwargs):
+        self.env = TennisEnv(transition_graph, **env_kwargs)
+        self.render_mode = render_mode
+        if render_mode == "human":
+            self.env.subscribe(ConsoleNarrator())
+
+        self.action_space = spaces.Discrete(len(self.env.action_space))
+        self._build_observation_space()
+
+    def _build_observation_space(self):
+        """``Box`` of the observations under the env's current match format."""
+        self._space_format = self.env.match_format
+        n_shot = len(self.env.last_shot_space) + len(self.env.direction_space)
+        max_games = self._space_format.games_per_set + 1
+        # Limites por posição: one-hots, códigos de game (0..4), games no set, sacador
+        high = np.array([1.0] * n_shot + [4.0, 4.0, max_games, max_games, 1.0], dtype=np.float32)
+        self.observation_space = spaces.Box(low=0.0, high=high, dtype=np.float32)
+
+    def _observation(self) -> np.ndarray:
+        return self.env.state_index.encode(self.env.state_id())
+
+    def reset(self, *, seed: Optional[int] = None, options: Optional[dict] = None):
+        super().reset(seed=seed)
+        if seed is not None:
+            # Amostragem do PC passa a usar o gerador semeado pelo Gymnasium
+            self.env.seed(self.np_random)
+        if self.env.match_format != self._space_format:
+            # set_match_format vale a partir deste reset: o Box acompanha o novo formato
+            self._build_observation_space()
+        self.env.reset()
+        return self._observation(), {"action_mask": self.env.action_mask().copy()}
+
+    def step(self, action):
+        _, reward, done, info = self.env.step(int(action))
+        truncated = info.get("TimeLimit.truncated", False)
+        return self._observation(), float(reward), done and not truncated, truncated, info
+
+    def render(self):
+        # No modo "human" a narração já sai durante o step
+        return None
+
+
+gym.register(id="Tennis-v0", entry_point=TennisGymEnv)
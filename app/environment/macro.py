@@ -0,0 +1,170 @@
+"""
+Macro-step tables: whole rally outcomes drawn from absorbing-chain distributions.
+
+Inside ``TennisEnv.step`` a round starts from (turn, last shot key, first
+serve flag): two shots are sampled and the round either hands control back to
+the player, ends the point, or is a fault that starts another round with the
+opponent to play. Taking those round-start states as transient states, the
+rest of a step is an absorbing Markov chain whose absorbing states are
+
+- ``CONTROL``: the player is to play after shot ``key``;
+- ``POINT``: ``scorer`` won the point and ``key`` was the last shot;
+- ``DEAD``: a shot without transitions was reached (the shot-by-shot env
+  raises there too).
+
+Faults are the only transient -> transient moves and they clear the first
+serve flag, so a point takes one or two rounds; the absorbing states record
+the flag of the round they end in, which gives the number of rounds (and of
+``BASE_PENALTY`` rewards) without sampling them.
+
+``MacroTransitions`` solves ``(I - Q) B = R`` once per graph and keeps an alias
+table per transient state over its absorbing states, so ``TennisEnv(macro_steps=True)``
+draws one outcome per point instead of looping shot by shot.
+"""
+from typing import List
+
+import numpy as np
+
+from app.environment.sampling import build_alias
+from app.models.env import Action, Turn
+
+CONTROL = 0
+POINT = 1
+DEAD = 2
+
+
+class MacroTransitions:
+    """
+    Absorption distributions of the rounds of a ``TennisEnv``.
+
+    Transient states are indexed by ``transient_index(turn, key, first_serve)``
+    and absorbing outcomes by position in the per-outcome lists below.
+
+    Attributes:
+        absorption (np.ndarray): (transient states, outcomes) absorption probabilities.
+        kind (list[int]): ``CONTROL``, ``POINT`` or ``DEAD`` per outcome.
+        scorer (list[int]): ``Turn`` value of the point winner (``POINT`` outcomes).
+        key (list[int]): Last shot key per outcome.
+        actions (list[Action]): Prebuilt ``Action`` of that last shot.
+        first_serve (list[bool]): First serve flag when control returns (``CONTROL`` outcomes).
+        round_first_serve (list[bool]): First serve flag of the round the outcome ends.
+        prob, alias, outcomes (list[list]): Alias table per transient state over
+            the outcomes it can reach.
+    """
+
+    def __init__(self, env):
+        graph = env.compiled_graph
+        n_keys = len(graph.keys)
+        n_dirs = len(graph.directions)
+        self.n_keys = n_keys
+        key_types = np.array([graph.shot_types[k // n_dirs] for k in range(n_keys)], dtype=object)
+        is_error = np.isin(key_types, list(env.errors))
+        is_winner = np.isin(key_types, list(env.winners))
+        is_serve = key_types == "serve"
+        key_actions = [
+            Action(shot_type=graph.shot_types[k // n_dirs], shot_direction=graph.directions[k % n_dirs])
+            for k in range(n_keys)
+        ]
+
+        # Desfechos: CONTROL(key, first_serve, first_serve da rodada), POINT(scorer, key, first_serve da rodada), DEAD
+        self.kind: List[int] = []
+        self.scorer: List[int] = []
+        self.key: List[int] = []
+        self.first_serve: List[bool] = []
+        self.round_first_serve: List[bool] = []
+        for key in range(n_keys):
+            for fs in (False, True):
+                for round_fs in (False, True):
+                    self._add_outcome(CONTROL, -1, key, fs, round_fs)
+        for scorer in (Turn.PC.value, Turn.PLAYER.value):
+            for key in range(n_keys):
+                for round_fs in (False, True):
+                    self._add_outcome(POINT, scorer, key, True, round_fs)
+        self._add_outcome(DEAD, -1, 0, True, True)
+        self.actions = [key_actions[k] for k in self.key]
+        dead = len(self.kind) - 1
+
+        n_transient = 4 * n_keys
+        q = np.zeros((n_transient, n_transient))
+        r = np.zeros((n_transient, len(self.kind)))
+        matrix = graph.transition_matrix
+        a1, a2 = np.meshgrid(np.arange(n_keys), np.arange(n_keys), indexing="ij")
+        error1 = is_error[a1]
+        winner1 = is_winner[a1]
+        rally = ~(error1 | winner1)
+        error2 = rally & is_error[a2]
+        winner2 = rally & is_winner[a2]
+        serve1 = is_serve[a1]
+
+        for turn in (Turn.PC, Turn.PLAYER):
+            pc_turn = turn == Turn.PC
+            # Quem pontua quando o primeiro lance sorteado é erro/winner depende de quem bateu
+            error1_scorer = Turn.PLAYER.value if pc_turn else Turn.PC.value
+            winner1_scorer = Turn.PC.value if pc_turn else Turn.PLAYER.value
+            for key in range(n_keys):
+                # Probabilidade de cada par (a1, a2) sorteado na rodada
+                pairs = matrix[key][:, None] * matrix
+                for fs in (False, True):
+                    row = self.transient_index(turn, key, fs)
+                    # Erro logo depois de um saque é falta: o primeiro saque não vale ponto
+                    fault1 = error1 & bool(not pc_turn and is_serve[key] and fs)
+                    fault2 = error2 & serve1 & fs
+                    targets = np.select(
+                        [fault1, error1, winner1, error2, winner2],
+                        [
+                            self._control(a1, False, fs),
+                            self._point(error1_scorer, a1, fs),
+                            self._point(winner1_scorer, a1, fs),
+                            self._point(Turn.PLAYER.value, a2, fs),
+                            self._point(Turn.PC.value, a2, fs),
+                        ],
+                        default=self._control(a1, fs, fs),
+                    )
+                    absorbed = ~fault2
+                    np.add.at(r[row], targets[absorbed], pairs[absorbed])
+                    # Falta depois do saque do PC: nova rodada do PC, agora no segundo saque
+                    np.add.at(q[row], self.transient_index(Turn.PC, a2[fault2], False), pairs[fault2])
+                    r[row, dead] = max(0.0, 1.0 - pairs.sum())
+
+        self.absorption = np.clip(np.linalg.solve(np.eye(n_transient) - q, r), 0.0, None)
+        self.outcomes: List[List[int]] = []
+        self.prob: List[List[float]] = []
+        self.alias: List[List[int]] = []
+        for row in self.absorption:
+            outcomes = np.flatnonzero(row > 0)
+            self.outcomes.append(outcomes.tolist())
+            prob, alias = build_alias(row[outcomes].tolist())
+            self.prob.append(prob)
+            self.alias.append(alias)
+
+    def _add_outcome(self, kind: int, scorer: int, key: int, first_serve: bool, round_first_serve: bool):
+        self.kind.append(kind)
+        self.scorer.append(scorer)
+        self.key.append(key)
+        self.first_serve.append(first_serve)
+        self.round_first_serve.append(round_first_serve)
+
+    def _control(self, key, first_serve, round_first_serve):
+        return (key * 2 + int(first_serve)) * 2 + int(round_first_serve)
+
+    def _point(self, scorer: int, key, round_first_serve):
+        return 4 * self.n_keys + (scorer * self.n_keys + key) * 2 + int(round_first_serve)
+
+    def transient_index(self, turn: Turn, key, first_serve: bool):
+        """Index of the round-start state (``turn``, ``key``, ``first_serve``)."""
+        return (turn.value * self.n_keys + key) * 2 + int(first_serve)
+
+    def sample(self, transient: int, u: float) -> int:
+        """Absorbing outcome reached from ``transient``, drawn with the uniform ``u``."""
+        prob = self.prob[transient]
+        n = len(prob)
+        x = u * n
+        i = int(x)
+        if i == n:  # u * n pode arredondar para n
+            i -= 1
+        return self.outcomes[transient][i if x - i < prob[i] else self.alias[transient][i]]
+
+    def rounds(self, outcome: int, first_serve: bool) -> int:
+        """Rounds played to reach ``outcome`` from a state with ``first_serve``."""
+        # Só uma falta que devolve a vez ao PC gera uma segunda rodada
+        return 2 if first_serve and not self.round_first_serve[outcome] else 1
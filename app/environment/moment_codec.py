@@ -0,0 +1,150 @@
+"""
+Packed fixed-width binary codec for match moments.
+
+Every moment is stored in ``MOMENT_DTYPE``, 7 bytes per state:
+
+- ``game_p1``/``game_p2``: regular game score code (0, 15, 30, 40, AD -> 0..4),
+  or the raw points when ``flags & TIEBREAK``;
+- ``set_p1``/``set_p2``: games in the current set;
+- ``match_p1``/``match_p2``: sets won;
+- ``flags``: bit field, ``TIEBREAK`` set while a tiebreak is being played;
+  the bits above it hold the points needed to win that tiebreak
+  (``MatchFormat.tiebreak_points``), 0 read as the standard 7.
+
+The per-set history kept in ``MatchMoment.sets`` is not packed, only the sets
+won. Arrays of moments convert to and from ``bytes`` with ``tobytes`` and
+``from_bytes``, so millions of states can be stored or shipped without going
+through dicts or JSON.
+"""
+from typing import Iterable, List
+
+import numpy as np
+
+from app.environment.batch_engine import BatchTennisMatch
+from app.environment.compact_engine import GAME_SCORE_LABELS, CompactTennisMatch
+from app.environment.tennis_engine import Game, MatchFormat, MatchMoment, Set, Tiebreak
+
+MOMENT_DTYPE = np.dtype(
+    [
+        ("game_p1", np.uint8),
+        ("game_p2", np.uint8),
+        ("set_p1", np.uint8),
+        ("set_p2", np.uint8),
+        ("match_p1", np.uint8),
+        ("match_p2", np.uint8),
+        ("flags", np.uint8),
+    ]
+)
+
+TIEBREAK = 1
+# Pontos do tiebreak nos bits acima de TIEBREAK (cabem até 127)
+TIEBREAK_POINTS_SHIFT = 1
+
+_GAME_CODES = {label: code for code, label in enumerate(GAME_SCORE_LABELS)}
+_GAME_LABELS = np.array(GAME_SCORE_LABELS, dtype=object)
+
+
+def _moment_row(moment: MatchMoment) -> tuple:
+    game = moment.current_game
+    if isinstance(game, Tiebreak):
+        game_p1, game_p2 = game.player1_score, game.player2_score
+        flags = TIEBREAK | game.max_score << TIEBREAK_POINTS_SHIFT
+    else:
+        game_p1, game_p2, flags = _GAME_CODES[game.player1_score], _GAME_CODES[game.player2_score], 0
+    return (
+        game_p1,
+        game_p2,
+        moment.current_set.player1_score,
+        moment.current_set.player2_score,
+        moment.match_score_p1,
+        moment.match_score_p2,
+        flags,
+    )
+
+
+def encode_moments(moments: Iterable[MatchMoment]) -> np.ndarray:
+    """Pack ``MatchMoment`` objects into a ``MOMENT_DTYPE`` array."""
+    return np.array([_moment_row(m) for m in moments], dtype=MOMENT_DTYPE)
+
+
+def decode_moments(packed: np.ndarray) -> List[MatchMoment]:
+    """Unpack a ``MOMENT_DTYPE`` array into ``MatchMoment`` objects."""
+    tiebreak = (packed["flags"] & TIEBREAK).astype(bool)
+    tiebreak_points = (packed["flags"] >> TIEBREAK_POINTS_SHIFT).tolist()
+    game_p1 = packed["game_p1"].astype(object)
+    game_p2 = packed["game_p2"].astype(object)
+    # Games normais voltam para os rótulos em string, de uma vez só
+    regular = ~tiebreak
+    game_p1[regular] = _GAME_LABELS[packed["game_p1"][regular]]
+    game_p2[regular] = _GAME_LABELS[packed["game_p2"][regular]]
+    columns = zip(
+        game_p1,
+        game_p2,
+        packed["set_p1"].tolist(),
+        packed["set_p2"].tolist(),
+        packed["match_p1"].tolist(),
+        packed["match_p2"].tolist(),
+        tiebreak.tolist(),
+        tiebreak_points,
+    )
+
+    moments = []
+    for g1, g2, s1, s2, m1, m2, tb, points in columns:
+        moment = MatchMoment()
+        moment.current_set = Set()
+        moment.current_set.player1_score = s1
+        moment.current_set.player2_score = s2
+        moment.current_game = (Tiebreak(max_score=points) if points else Tiebreak()) if tb else Game()
+        moment.current_game.player1_score = g1
+        moment.current_game.player2_score = g2
+        moment.match_score_p1 = m1
+        moment.match_score_p2 = m2
+        moments.append(moment)
+    return moments
+
+
+def encode_moment(moment: MatchMoment) -> bytes:
+    """Pack a single ``MatchMoment`` into ``MOMENT_DTYPE.itemsize`` bytes."""
+    return encode_moments([moment]).tobytes()
+
+
+def decode_moment(data: bytes) -> MatchMoment:
+    """Unpack a single moment packed by ``encode_moment``."""
+    return decode_moments(from_bytes(data))[0]
+
+
+def from_bytes(data: bytes) -> np.ndarray:
+    """View a buffer of packed moments as a ``MOMENT_DTYPE`` array (no copy)."""
+    return np.frombuffer(data, dtype=MOMENT_DTYPE)
+
+
+def _tiebreak_flags(tiebreak, match_format: MatchFormat):
+    """``flags`` of scoreboards in a tiebreak (or not) of ``match_format``."""
+    return np.where(tiebreak, TIEBREAK | match_format.tiebreak_points << TIEBREAK_POINTS_SHIFT, 0).astype(np.uint8)
+
+
+def encode_compact(match: CompactTennisMatch) -> np.ndarray:
+    """Pack the current scoreboard of a ``CompactTennisMatch`` without building a ``MatchMoment``."""
+    game_p1, game_p2 = match.game_score()
+    if not match.tiebreak:
+        game_p1, game_p2 = _GAME_CODES[game_p1], _GAME_CODES[game_p2]
+    set_p1, set_p2 = match.set_score()
+    return np.array(
+        [(game_p1, game_p2, set_p1, set_p2, match.sets_p1, match.sets_p2, int(_tiebreak_flags(match.tiebreak, match.format)))],
+        dtype=MOMENT_DTYPE,
+    )
+
+
+def encode_batch(batch: BatchTennisMatch) -> np.ndarray:
+    """Pack every match of a ``BatchTennisMatch`` at once, fully vectorized."""
+    packed = np.empty(batch.n, dtype=MOMENT_DTYPE)
+    game_points = batch.game_points
+    set_games = batch.set_games
+    packed["game_p1"] = game_points[:, 0]
+    packed["game_p2"] = game_points[:, 1]
+    packed["set_p1"] = set_games[:, 0]
+    packed["set_p2"] = set_games[:, 1]
+    packed["match_p1"] = batch.sets_won[:, 0]
+    packed["match_p2"] = batch.sets_won[:, 1]
+    packed["flags"] = _tiebreak_flags(batch.tiebreak, batch.format)
+    return packed
@@ -0,0 +1,588 @@
+"""
+Compiled rally/point kernel for the vector env.
+
+The rally logic of ``TennisEnv`` (``_choose_next_2_actions`` + ``_compute_actions``)
+and the scoring of ``TennisMatch.point`` are written here as plain functions
+over integer-coded state arrays:
+
+- ``KernelTables`` holds everything that is fixed for a graph and a format: the
+  dense (keys, max_outcomes) alias tables of ``CompiledTransitionGraph``, the
+  error/winner/serve flags of each shot key, the ``BatchTables`` score tables
+  and the rewards;
+- ``KernelState`` holds the arrays of N matches (the ``BatchTennisMatch``
+  arrays, shot, turn, first serve and the ``CounterStreams`` keys/counters).
+
+With Numba installed the functions are compiled in nopython mode, so a whole
+step (player round + opponent rounds) or a whole match under a fixed policy
+table runs without going back to the interpreter; ``parallel=True`` spreads the
+envs over threads. ``rollout`` plays N copies of a ``TennisEnv`` position
+(``state_from_env``) for a number of steps, e.g. to value a search leaf. Draws follow ``CounterStreams`` exactly, so the kernel
+reproduces the NumPy ``VectorTennisEnv`` bit for bit (see ``cross_check``).
+Without Numba the same functions run as (slow) pure Python.
+
+Numba is an optional dependency: ``pip install numba``.
+"""
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.environment.batch_engine import NO_WINNER, batch_tables, score_ids
+from app.environment.compact_engine import P1, P2
+from app.environment.tennis_engine import MatchFormat
+from app.environment.tennis_env import TennisEnv
+from app.models.env import Turn
+from app.utils.rng import SeedLike, CounterStreams
+
+try:
+    from numba import njit, prange
+
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        # Sem Numba o "kernel" é o próprio código Python
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+PLAYER = Turn.PLAYER.value
+PC = Turn.PC.value
+
+# Mesmas constantes do CounterStreams (SplitMix64)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+_TO_UNIT = 1.0 / (1 << 53)
+
+# Códigos de erro do kernel: levantar exceções dentro dele custa caro
+OK = 0
+NO_TRANSITIONS = -1
+UNKNOWN_SHOT = -2
+_ERRORS = {
+    NO_TRANSITIONS: "No transitions available from given action.",
+    UNKNOWN_SHOT: "Transition to a shot outside of last_shot_space.",
+}
+
+
+class KernelTables(NamedTuple):
+    """Graph, flags, score tables and rewards of a ``TennisEnv``, as arrays."""
+
+    prob: np.ndarray
+    alias: np.ndarray
+    outcome_codes: np.ndarray
+    n_outcomes: np.ndarray
+    is_error: np.ndarray
+    is_winner: np.ndarray
+    is_serve: np.ndarray
+    action_masks: np.ndarray
+    n_dirs: int
+    game_next: np.ndarray
+    game_won: np.ndarray
+    game_shift: np.ndarray
+    set_next: np.ndarray
+    set_won: np.ndarray
+    set_tiebreak: np.ndarray
+    tiebreak_offset: int
+    sets_to_win: int
+    match_tiebreak: bool
+    # base, ponto ganho/perdido, game ganho/perdido, set ganho/perdido, ação ilegal
+    rewards: np.ndarray
+
+
+class KernelState(NamedTuple):
+    """Integer-coded state of N matches; the kernel updates it in place."""
+
+    game: np.ndarray
+    game_shift: np.ndarray
+    set: np.ndarray
+    tiebreak: np.ndarray
+    sets_won: np.ndarray
+    server: np.ndarray
+    winner: np.ndarray
+    shot: np.ndarray
+    turn: np.ndarray
+    first_serve: np.ndarray
+    stream_keys: np.ndarray
+    counters: np.ndarray
+
+
+def build_tables(env: TennisEnv, match_format: Optional[MatchFormat] = None) -> KernelTables:
+    """``KernelTables`` of ``env``, scored with ``match_format`` (default: the env's)."""
+    match_format = match_format or env.match_format
+    graph = env.compiled_graph
+    n_types = len(env.last_shot_space)
+    n_dirs = len(env.direction_space)
+    key_types = np.repeat(np.array([env.last_shot_space[i] for i in range(n_types)], dtype=object), n_dirs)
+    score = batch_tables(match_format)
+    return KernelTables(
+        prob=graph.prob_array,
+        alias=graph.alias_array,
+        outcome_codes=graph.outcome_codes,
+        n_outcomes=graph.n_outcomes,
+        is_error=np.isin(key_types, list(env.errors)),
+        is_winner=np.isin(key_types, list(env.winners)),
+        is_serve=key_types == "serve",
+        action_masks=np.ascontiguousarray(env.action_masks),
+        n_dirs=n_dirs,
+        game_next=score.game_next,
+        game_won=score.game_won,
+        game_shift=score.game_shift,
+        set_next=score.set_next,
+        set_won=score.set_won,
+        set_tiebreak=score.set_tiebreak,
+        tiebreak_offset=score.tiebreak_offset,
+        sets_to_win=match_format.sets_to_win,
+        match_tiebreak=match_format.match_tiebreak,
+        rewards=np.array(
+            [
+                env.BASE_PENALTY,
+                env.POINT_WIN_REWARD,
+                env.POINT_LOSS_PENALTY,
+                env.GAME_WIN_REWARD,
+                env.GAME_LOSS_PENALTY,
+                env.SET_WIN_REWARD,
+                env.SET_LOSS_PENALTY,
+                env.ILLEGAL_ACTION_PENALTY,
+            ],
+            dtype=np.float64,
+        ),
+    )
+
+
+# Os passos por env não alocam nada: sem NRT o Numba não gera incref/decref dos
+# arrays das tuplas a cada chamada, que custavam mais que o próprio ponto
+@njit(_nrt=False)
+def _uniform(state, i):
+    """Next draw of stream ``i``, as in ``CounterStreams.random``."""
+    state.counters[i] += np.uint64(1)
+    z = state.stream_keys[i] + state.counters[i] * _GOLDEN
+    z ^= z >> np.uint64(30)
+    z *= _MIX1
+    z ^= z >> np.uint64(27)
+    z *= _MIX2
+    z ^= z >> np.uint64(31)
+    return (z >> np.uint64(11)) * _TO_UNIT
+
+
+@njit(_nrt=False)
+def _sample(tables, state, i, key):
+    """
+    Next shot key after ``key``, drawn from stream ``i`` (``sample_index``),
+    or a negative error code (``NO_TRANSITIONS``, ``UNKNOWN_SHOT``).
+    """
+    n = tables.n_outcomes[key]
+    if n == 0:
+        return NO_TRANSITIONS
+    x = _uniform(state, i) * n
+    j = int(x)
+    if j >= n:
+        j = n - 1
+    if not x - j < tables.prob[key, j]:
+        j = tables.alias[key, j]
+    next_key = tables.outcome_codes[key, j]
+    return next_key if next_key >= 0 else UNKNOWN_SHOT
+
+
+@njit(_nrt=False)
+def _point(tables, state, i, p1_won):
+    """``BatchTennisMatch.point`` for match ``i``. Returns (game_winner, set_winner)."""
+    w = P1 if p1_won else P2
+    winner_turn = PLAYER if p1_won else PC
+    game = state.game[i]
+    game_won = tables.game_won[game, w]
+    state.game[i] = tables.game_next[game, w]
+    state.game_shift[i] += tables.game_shift[game, w]
+    if not game_won:
+        return NO_WINNER, NO_WINNER
+
+    set_state = state.set[i]
+    set_won = tables.set_won[set_state, w]
+    if set_won:
+        state.set[i] = 0
+        state.sets_won[i, w] += 1
+        tiebreak = tables.match_tiebreak
+    else:
+        state.set[i] = tables.set_next[set_state, w]
+        tiebreak = tables.set_tiebreak[set_state, w]
+    state.tiebreak[i] = tiebreak
+    state.game[i] = tables.tiebreak_offset if tiebreak else 0
+    state.game_shift[i] = 0
+    state.server[i] = 1 - state.server[i]
+    if not set_won:
+        return winner_turn, NO_WINNER
+    if state.sets_won[i, w] >= tables.sets_to_win:
+        state.winner[i] = winner_turn
+    return winner_turn, winner_turn
+
+
+@njit(_nrt=False)
+def _play_round(tables, state, i, turn):
+    """
+    One ``_choose_next_2_actions`` + ``_compute_actions`` round of match ``i``.
+    Returns (reward, status).
+    """
+    shot = state.shot[i]
+    a1 = _sample(tables, state, i, shot)
+    if a1 < 0:
+        return 0.0, a1
+    a2 = _sample(tables, state, i, a1)
+    if a2 < 0:
+        return 0.0, a2
+
+    error1 = tables.is_error[a1]
+    winner1 = tables.is_winner[a1]
+    rally = not (error1 or winner1)
+    error2 = rally and tables.is_error[a2]
+    winner2 = rally and tables.is_winner[a2]
+    pc_turn = turn == PC
+
+    if error2 or winner2:
+        state.shot[i] = a2
+        state.turn[i] = PC
+    else:
+        state.shot[i] = a1
+        state.turn[i] = PLAYER if rally else turn
+
+    reward = tables.rewards[0]
+    # Erro logo depois de um saque é falta: o primeiro saque não vale ponto
+    fault = ((error1 and not pc_turn and tables.is_serve[shot]) or (error2 and tables.is_serve[a1])) and state.first_serve[i]
+    if fault:
+        state.first_serve[i] = False
+        return reward, OK
+    if not (error1 or winner1 or error2 or winner2):
+        return reward, OK
+
+    won = (error1 and pc_turn) or (winner1 and not pc_turn) or error2
+    game_winner, set_winner = _point(tables, state, i, won)
+    state.first_serve[i] = True
+    state.turn[i] = state.server[i]
+    if won:
+        reward += (
+            tables.rewards[1]
+            + tables.rewards[3] * (game_winner == PLAYER)
+            + tables.rewards[5] * (set_winner == PLAYER)
+        )
+    else:
+        reward += (
+            tables.rewards[2]
+            + tables.rewards[4] * (game_winner == PC)
+            + tables.rewards[6] * (set_winner == PC)
+        )
+    return reward, OK
+
+
+@njit(_nrt=False)
+def _step_one(tables, state, i, action):
+    """``TennisEnv.step`` of match ``i`` for an action index. Returns (reward, illegal, status)."""
+    if not tables.action_masks[state.shot[i] // tables.n_dirs, action]:
+        return tables.rewards[7], True, OK
+    reward = 0.0
+    state.shot[i] = action
+    r, status = _play_round(tables, state, i, state.turn[i])
+    reward += r
+    # Simula até acabar a rodada do PC
+    while status == OK and state.turn[i] == PC and state.winner[i] == NO_WINNER:
+        r, status = _play_round(tables, state, i, PC)
+        reward += r
+    state.turn[i] = PLAYER
+    return reward, False, status
+
+
+@njit(_nrt=False)
+def _simulate_one(tables, state, i, policy, max_steps):
+    """Play match ``i`` to the end with ``policy``. Returns (total_reward, steps, status)."""
+    n = 0
+    total = 0.0
+    status = OK
+    while state.winner[i] == NO_WINNER and n < max_steps and status == OK:
+        action = policy[state.shot[i], state.game[i], state.set[i], state.server[i]]
+        reward, _, status = _step_one(tables, state, i, action)
+        total += reward
+        n += 1
+    return total, n, status
+
+
+@njit(_nrt=False)
+def _rollout_action(tables, state, i, policy):
+    """
+    Action of match ``i`` from a (shot_keys,) ``policy`` table; a negative
+    entry draws a uniform legal action from the match's stream.
+    """
+    shot = state.shot[i]
+    action = policy[shot]
+    if action >= 0:
+        return action
+    row = shot // tables.n_dirs
+    n_actions = tables.action_masks.shape[1]
+    n_legal = 0
+    for a in range(n_actions):
+        n_legal += tables.action_masks[row, a]
+    j = int(_uniform(state, i) * n_legal)
+    for a in range(n_actions):
+        if tables.action_masks[row, a]:
+            if j == 0:
+                return a
+            j -= 1
+    return 0
+
+
+@njit(_nrt=False)
+def _rollout_one(tables, state, i, policy, max_steps, gamma):
+    """Discounted return of match ``i`` over at most ``max_steps`` steps of ``policy``. Returns (return, status)."""
+    n = 0
+    total = 0.0
+    discount = 1.0
+    status = OK
+    while state.winner[i] == NO_WINNER and n < max_steps and status == OK:
+        reward, _, status = _step_one(tables, state, i, _rollout_action(tables, state, i, policy))
+        total += discount * reward
+        discount *= gamma
+        n += 1
+    return total, status
+
+
+def _step_all(tables, state, actions, rewards, illegal, status):
+    for i in prange(actions.shape[0]):
+        reward, is_illegal, code = _step_one(tables, state, i, actions[i])
+        rewards[i] = reward
+        illegal[i] = is_illegal
+        status[i] = code
+
+
+def _simulate_all(tables, state, policy, max_steps, total_reward, steps, status):
+    for i in prange(total_reward.shape[0]):
+        total, n, code = _simulate_one(tables, state, i, policy, max_steps)
+        total_reward[i] = total
+        steps[i] = n
+        status[i] = code
+
+
+def _rollout_all(tables, state, policy, max_steps, gamma, returns, status):
+    for i in prange(returns.shape[0]):
+        total, code = _rollout_one(tables, state, i, policy, max_steps, gamma)
+        returns[i] = total
+        status[i] = code
+
+
+# Duas versões de cada laço: a paralela só compensa com muitos envs e vários núcleos
+_step_serial = njit(_step_all)
+_step_parallel = njit(parallel=True)(_step_all)
+_simulate_serial = njit(_simulate_all)
+_simulate_parallel = njit(parallel=True)(_simulate_all)
+_rollout_serial = njit(_rollout_all)
+_rollout_parallel = njit(parallel=True)(_rollout_all)
+
+
+def _check(status: np.ndarray):
+    """Raise the ``ValueError`` of the first failed env, like the Python path."""
+    if status.any():
+        raise ValueError(_ERRORS[int(status[np.flatnonzero(status)[0]])])
+
+
+def step(
+    tables: KernelTables, state: KernelState, actions: np.ndarray, parallel: bool = False
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Play one action index in each of the N matches of ``state``, in place.
+
+    Returns:
+        (rewards, illegal) float64 and bool arrays of shape (N,).
+    """
+    actions = np.ascontiguousarray(actions, dtype=np.int64)
+    rewards = np.zeros(actions.size, dtype=np.float64)
+    illegal = np.zeros(actions.size, dtype=bool)
+    status = np.zeros(actions.size, dtype=np.int8)
+    with np.errstate(over="ignore"):
+        (_step_parallel if parallel else _step_serial)(tables, state, actions, rewards, illegal, status)
+    _check(status)
+    return rewards, illegal
+
+
+def new_state(
+    n: int, env: TennisEnv, match_format: Optional[MatchFormat] = None, seed: SeedLike = None
+) -> Tuple[KernelState, np.ndarray]:
+    """
+    ``KernelState`` of ``n`` matches at their start, with the streams of
+    ``VectorTennisEnv(seed=seed)`` envs ``0..n-1``.
+
+    Returns:
+        (state, initial_shot): the initial shot key of each match, whose
+        direction is the first draw of its stream, as in ``VectorTennisEnv``.
+    """
+    match_format = match_format or env.match_format
+    streams = CounterStreams(seed, n=n)
+    n_dirs = len(env.direction_space)
+    initial_type = env.reverse_last_shot_space[env.initial_shot_type]
+    initial_shot = initial_type * n_dirs + (streams.random() * n_dirs).astype(np.int64)
+    offset = batch_tables(match_format).tiebreak_offset
+    state = KernelState(
+        game=np.full(n, offset if match_format.match_tiebreak else 0, dtype=np.int16),
+        game_shift=np.zeros(n, dtype=np.int16),
+        set=np.zeros(n, dtype=np.int16),
+        tiebreak=np.full(n, match_format.match_tiebreak, dtype=bool),
+        sets_won=np.zeros((n, 2), dtype=np.int16),
+        server=np.full(n, env.initial_server.value, dtype=np.int8),
+        winner=np.full(n, NO_WINNER, dtype=np.int8),
+        shot=initial_shot.copy(),
+        turn=np.full(n, env.initial_turn.value, dtype=np.int8),
+        first_serve=np.ones(n, dtype=bool),
+        stream_keys=streams.keys,
+        counters=streams.counters,
+    )
+    return state, initial_shot
+
+
+def state_from_env(env: TennisEnv, streams: CounterStreams, n: Optional[int] = None) -> KernelState:
+    """
+    ``KernelState`` of ``n`` (default ``len(streams)``) copies of the position
+    ``env`` is at (scoreboard, last shot, turn, server and first serve flag),
+    match ``i`` drawing from stream ``i`` of ``streams``; the kernel advances
+    their counters in place.
+    """
+    n = len(streams) if n is None else n
+    score = env.match.score()
+    game, game_shift, set_state, tiebreak = score_ids(score, env.match_format)
+    shot = env.compiled_graph.keys[(env.state.last_shot_type, env.state.last_shot_direction)]
+    return KernelState(
+        game=np.full(n, game, dtype=np.int16),
+        game_shift=np.full(n, game_shift, dtype=np.int16),
+        set=np.full(n, set_state, dtype=np.int16),
+        tiebreak=np.full(n, tiebreak, dtype=bool),
+        sets_won=np.tile(np.array(score[4:6], dtype=np.int16), (n, 1)),
+        server=np.full(n, env.server.value, dtype=np.int8),
+        winner=np.full(n, NO_WINNER if env.match.winner is None else env.match.winner.value, dtype=np.int8),
+        shot=np.full(n, shot, dtype=np.int64),
+        turn=np.full(n, env.turn.value, dtype=np.int8),
+        first_serve=np.full(n, env.first_serve, dtype=bool),
+        stream_keys=streams.keys[:n],
+        counters=streams.counters[:n],
+    )
+
+
+def rollout(
+    tables: KernelTables,
+    state: KernelState,
+    policy: np.ndarray,
+    max_steps: int,
+    gamma: float = 1.0,
+    parallel: bool = True,
+) -> np.ndarray:
+    """
+    Play the N matches of ``state`` in place for at most ``max_steps`` steps
+    (or to their end) and return their discounted returns. ``policy`` is a
+    (shot_keys,) table of action indices over the last shot, ``-1`` entries
+    drawing a uniform legal action.
+    """
+    policy = np.ascontiguousarray(policy, dtype=np.int64)
+    returns = np.zeros(len(state.shot), dtype=np.float64)
+    status = np.zeros(len(state.shot), dtype=np.int8)
+    with np.errstate(over="ignore"):
+        (_rollout_parallel if parallel else _rollout_serial)(
+            tables, state, policy, max_steps, gamma, returns, status
+        )
+    _check(status)
+    return returns
+
+
+def simulate_matches(
+    env: TennisEnv,
+    policy: np.ndarray,
+    n_matches: int,
+    seed: SeedLike = None,
+    match_format: Optional[MatchFormat] = None,
+    max_steps: Optional[int] = None,
+    parallel: bool = True,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Play ``n_matches`` whole matches with a fixed policy table.
+
+    ``policy`` maps a state to an action index of ``env.action_space``: either
+    a (shot_keys,) table over the last shot, or a (shot_keys, game_states,
+    set_states, 2) table over (last shot, ``BatchTennisMatch`` game id, set
+    id, server). Match ``i`` is the first episode of env ``i`` of a
+    ``VectorTennisEnv`` with the same ``seed``.
+
+    Returns:
+        (total_reward, winner, steps) per match; ``winner`` is the ``Turn``
+        value of the winner, or ``NO_WINNER`` when ``max_steps`` was hit.
+    """
+    match_format = match_format or env.match_format
+    tables = build_tables(env, match_format)
+    policy = np.asarray(policy, dtype=np.int64)
+    if policy.ndim == 1:
+        shape = (len(policy), len(tables.game_next), len(tables.set_next), 2)
+        policy = np.broadcast_to(policy[:, None, None, None], shape)
+    if max_steps is None:
+        max_steps = env.max_episode_steps if env.max_episode_steps is not None else np.iinfo(np.int64).max
+
+    state, _ = new_state(n_matches, env, match_format, seed)
+    total_reward = np.zeros(n_matches, dtype=np.float64)
+    steps = np.zeros(n_matches, dtype=np.int64)
+    status = np.zeros(n_matches, dtype=np.int8)
+    with np.errstate(over="ignore"):
+        (_simulate_parallel if parallel else _simulate_serial)(
+            tables, state, policy, max_steps, total_reward, steps, status
+        )
+    _check(status)
+    return total_reward, state.winner.copy(), steps
+
+
+def cross_check(
+    transition_graph, num_envs: int = 64, steps: int = 2_000, seed: int = 0, **env_kwargs
+) -> int:
+    """
+    Check the kernel against the Python path of ``VectorTennisEnv``.
+
+    Two vector envs, one per backend, are stepped with the same random legal
+    actions and must return identical observations, rewards, dones and infos;
+    then ``simulate_matches`` with a random last-shot policy must reproduce
+    the first episode of each env of the NumPy backend driven by that policy.
+
+    Returns:
+        Number of env steps compared. Raises ``AssertionError`` on a mismatch.
+    """
+    from app.environment.vector_env import VectorTennisEnv
+
+    reference = VectorTennisEnv(transition_graph, num_envs, seed=seed, **env_kwargs)
+    compiled = VectorTennisEnv(transition_graph, num_envs, seed=seed, backend="numba", **env_kwargs)
+    np.testing.assert_array_equal(reference.reset(), compiled.reset())
+
+    rng = np.random.default_rng(seed)
+    for t in range(steps):
+        mask = reference.action_mask()
+        actions = np.where(mask, rng.random(mask.shape), -1.0).argmax(axis=1)
+        # Algumas ações ilegais, para cobrir a penalidade
+        actions[rng.random(num_envs) < 0.01] = 0
+        expected = reference.step(actions)
+        result = compiled.step(actions)
+        for name, a, b in zip(("observations", "rewards", "dones"), expected[:3], result[:3]):
+            np.testing.assert_array_equal(a, b, err_msg=f"{name} differ at step {t}")
+        assert expected[3].keys() == result[3].keys(), f"info keys differ at step {t}"
+        for key in expected[3]:
+            np.testing.assert_array_equal(expected[3][key], result[3][key], err_msg=f"info[{key!r}] differs at step {t}")
+
+    # Partidas inteiras com uma política fixa pelo último golpe
+    env = reference.env
+    masks = env.action_masks[np.arange(len(env.last_shot_space) * reference.n_dirs) // reference.n_dirs]
+    policy = np.where(masks, rng.random(masks.shape), -1.0).argmax(axis=1)
+    total_reward, winner, n_steps = simulate_matches(env, policy, num_envs, seed=seed)
+
+    vec = VectorTennisEnv(transition_graph, num_envs, seed=seed, **env_kwargs)
+    vec.reset()
+    expected_reward = np.zeros(num_envs)
+    expected_steps = np.zeros(num_envs, dtype=np.int64)
+    pending = np.ones(num_envs, dtype=bool)
+    while pending.any():
+        _, _, dones, info = vec.step(policy[vec.shot])
+        ended = dones & pending
+        if not ended.any():
+            continue
+        expected_reward[ended] = info["episode_reward"][ended]
+        expected_steps[ended] = info["episode_length"][ended]
+        pending &= ~dones
+    np.testing.assert_array_equal(total_reward, expected_reward, err_msg="match rewards differ")
+    np.testing.assert_array_equal(n_steps, expected_steps, err_msg="match lengths differ")
+    return num_envs * steps + int(n_steps.sum())
@@ -0,0 +1,140 @@
+"""
+Alias-method samplers for the opponent's shot selection.
+
+``CompiledTransitionGraph`` compiles the nested ``transition_graph`` dict once
+into one alias table per (shot_type, direction), over integer-coded outcomes.
+Drawing the next shot then costs one uniform and two list lookups instead of
+rebuilding candidate/probability lists and calling ``random.choices``.
+"""
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.models.env import Action
+
+
+def build_alias(probs: Sequence[float]) -> Tuple[List[float], List[int]]:
+    """
+    Vose's alias method.
+
+    Returns:
+        (prob, alias): with ``n = len(probs)``, ``u ~ U[0, 1)``, ``x = u * n``
+        and ``i = int(x)``, the sample is ``i`` if ``x - i < prob[i]`` and
+        ``alias[i]`` otherwise.
+    """
+    n = len(probs)
+    total = float(sum(probs))
+    scaled = [p * n / total for p in probs]
+    prob = [0.0] * n
+    alias = list(range(n))
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        s = small.pop()
+        l = large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] = scaled[l] + scaled[s] - 1.0
+        if scaled[l] < 1.0:
+            small.append(l)
+        else:
+            large.append(l)
+    # Sobras só existem por erro de arredondamento: ficam com probabilidade 1
+    for i in large + small:
+        prob[i] = 1.0
+    return prob, alias
+
+
+class CompiledTransitionGraph:
+    """
+    Transition graph compiled into alias tables.
+
+    Shots are keyed by ``shot_code * n_directions + direction_code``, where the
+    codes are positions in ``shot_types`` and ``directions``.
+
+    Attributes:
+        keys (dict): Maps (shot_type, shot_direction) to its key.
+        outcomes (list[list[tuple]]): (shot_type, shot_direction) of each outcome, per key.
+        actions (list[list[Action]]): Prebuilt ``Action`` of each outcome, per key.
+        prob, alias (list[list]): Alias tables per key, as Python lists for the scalar path.
+        outcome_codes (np.ndarray): (keys, max_outcomes) next key of each outcome, -1 if padded.
+        prob_array, alias_array (np.ndarray): Padded alias tables for vectorized sampling.
+        n_outcomes (np.ndarray): Number of outcomes per key.
+        transition_matrix (np.ndarray): (keys, keys) probability of each next key;
+            rows of keys without transitions are zero and transitions to shots
+            outside the key space are left out, so rows may sum to less than 1.
+    """
+
+    def __init__(
+        self,
+        transition_graph: Dict[str, Dict[int, Dict[tuple, float]]],
+        shot_types: Sequence[str],
+        directions: Sequence[int],
+    ):
+        self.shot_types = list(shot_types)
+        self.directions = list(directions)
+        n_dirs = len(self.directions)
+        self.keys = {
+            (shot_type, direction): t * n_dirs + d
+            for t, shot_type in enumerate(self.shot_types)
+            for d, direction in enumerate(self.directions)
+        }
+        n_keys = len(self.keys)
+
+        self.outcomes: List[List[tuple]] = [[] for _ in range(n_keys)]
+        self.actions: List[List[Action]] = [[] for _ in range(n_keys)]
+        self.prob: List[List[float]] = [[] for _ in range(n_keys)]
+        self.alias: List[List[int]] = [[] for _ in range(n_keys)]
+
+        for (shot_type, direction), key in self.keys.items():
+            possible_next_actions = transition_graph.get(shot_type, {}).get(direction, {})
+            if not possible_next_actions or sum(possible_next_actions.values()) <= 0:
+                continue
+            candidates = list(possible_next_actions.keys())
+            self.outcomes[key] = candidates
+            self.actions[key] = [Action(shot_type=t, shot_direction=d) for t, d in candidates]
+            self.prob[key], self.alias[key] = build_alias(list(possible_next_actions.values()))
+
+        width = max(1, max(len(o) for o in self.outcomes))
+        self.n_outcomes = np.array([len(o) for o in self.outcomes], dtype=np.int64)
+        self.prob_array = np.ones((n_keys, width), dtype=np.float64)
+        self.alias_array = np.zeros((n_keys, width), dtype=np.int64)
+        self.outcome_codes = np.full((n_keys, width), -1, dtype=np.int64)
+        self.transition_matrix = np.zeros((n_keys, n_keys), dtype=np.float64)
+        for (shot_type, direction), key in self.keys.items():
+            possible_next_actions = transition_graph.get(shot_type, {}).get(direction, {})
+            total = sum(possible_next_actions.values())
+            if total <= 0:
+                continue
+            for outcome, weight in possible_next_actions.items():
+                if outcome in self.keys:
+                    self.transition_matrix[key, self.keys[outcome]] += weight / total
+        for key in range(n_keys):
+            n = len(self.outcomes[key])
+            self.prob_array[key, :n] = self.prob[key]
+            self.alias_array[key, :n] = self.alias[key]
+            self.outcome_codes[key, :n] = [self.keys.get(o, -1) for o in self.outcomes[key]]
+
+    def key(self, shot_type: str, shot_direction: int) -> int:
+        return self.keys[(shot_type, shot_direction)]
+
+    def sample_index(self, key: int, u: float) -> int:
+        """Outcome index drawn from ``key`` with the uniform ``u``."""
+        prob = self.prob[key]
+        if not prob:
+            raise ValueError("No transitions available from given action.")
+        n = len(prob)
+        x = u * n
+        i = int(x)
+        if i == n:  # u * n pode arredondar para n
+            i -= 1
+        return i if x - i < prob[i] else self.alias[key][i]
+
+    def sample_indices(self, keys: np.ndarray, u: np.ndarray) -> np.ndarray:
+        """Vectorized ``sample_index`` over arrays of keys and uniforms."""
+        n = self.n_outcomes[keys]
+        if (n == 0).any():
+            raise ValueError("No transitions available from given action.")
+        x = u * n
+        i = np.minimum(x.astype(np.int64), n - 1)
+        return np.where(x - i < self.prob_array[keys, i], i, self.alias_array[keys, i])
@@ -0,0 +1,174 @@
+"""
+Dense ids of the observable states and their precomputed encodings.
+
+The observation of a ``TennisEnv`` (last shot type and direction, game score
+codes, set games and server) takes few values, so every reachable one gets an
+integer id in mixed radix
+
+    id = ((key * n_game_scores + game) * n_set_scores + set) * 2 + player_serves
+
+where ``key = shot_type_idx * n_directions + direction_idx`` is the shot key of
+``CompiledTransitionGraph`` and ``game``/``set`` index the reachable (player,
+pc) score pairs. ``StateIndex.encodings`` holds ``State.encode`` of every id as
+a float32 matrix, so a batch of ids is encoded with one fancy-index and a
+replay buffer can store ints instead of states or arrays. ``mirror`` maps ids
+to the same position seen from the other side of the net (scores swapped,
+server flipped), the observation of a self-play opponent.
+"""
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+
+from app.environment.compact_engine import GAME_SCORE_LABELS, build_game_table, build_set_table
+from app.environment.tennis_engine import STANDARD
+from app.models.env import State
+
+# Código de cada rótulo de game como em State.encode (qualquer outro rótulo, p. ex. tiebreak, vira 0)
+GAME_SCORE_CODES = {label: code for code, label in enumerate(GAME_SCORE_LABELS)}
+
+
+class StateIndex:
+    """
+    Dense enumeration of the observable states of an env with spaces
+    ``last_shot_space`` (index -> shot type) and ``direction_space``.
+
+    Set scores are enumerated as in a set of ``max_set_games`` games, which
+    also covers every format with shorter sets, so ids stay valid when the
+    env switches format (e.g. a curriculum of short matches).
+
+    Attributes:
+        n_states (int): Number of ids.
+        n_directions (int): Directions per shot type.
+        game_scores (np.ndarray): (player, pc) game code pair of each game index.
+        set_scores (np.ndarray): (player, pc) set games of each set index.
+        game_lookup (np.ndarray): Game index of each (player, pc) code pair, -1 if unreachable.
+        set_lookup (np.ndarray): Set index of each (player, pc) set games pair, -1 if unreachable.
+        encodings (np.ndarray): (n_states, observation size) float32 ``State.encode`` of each id.
+    """
+
+    def __init__(self, last_shot_space: dict, direction_space: list, max_set_games: int = STANDARD.games_per_set):
+        self.last_shot_space = dict(last_shot_space)
+        self.reverse_last_shot_space = {v: k for k, v in last_shot_space.items()}
+        self.direction_space = list(direction_space)
+        n_types = len(last_shot_space)
+        self.n_directions = len(self.direction_space)
+        self.n_keys = n_types * self.n_directions
+        self.max_set_games = max_set_games
+
+        # Placar de game: códigos 0..4 do game normal com vantagem (o sem vantagem é um subconjunto)
+        self.game_scores = np.array(build_game_table(no_ad=False).states, dtype=np.int64)
+        self.set_scores = np.array(build_set_table(max_set_games).states, dtype=np.int64)
+        self.game_lookup = np.full((len(GAME_SCORE_LABELS),) * 2, -1, dtype=np.int64)
+        self.game_lookup[self.game_scores[:, 0], self.game_scores[:, 1]] = np.arange(len(self.game_scores))
+        self.set_lookup = np.full((max_set_games + 1,) * 2, -1, dtype=np.int64)
+        self.set_lookup[self.set_scores[:, 0], self.set_scores[:, 1]] = np.arange(len(self.set_scores))
+        self.n_game_scores = len(self.game_scores)
+        self.n_set_scores = len(self.set_scores)
+        # Placar visto pelo outro lado: (player, pc) trocados, sempre alcançável
+        self.game_mirror = self.game_lookup[self.game_scores[:, 1], self.game_scores[:, 0]]
+        self.set_mirror = self.set_lookup[self.set_scores[:, 1], self.set_scores[:, 0]]
+        self.n_states = self.n_keys * self.n_game_scores * self.n_set_scores * 2
+
+        key, game, set_, serves = self.decompose(np.arange(self.n_states))
+        self.encodings = np.zeros((self.n_states, n_types + self.n_directions + 5), dtype=np.float32)
+        rows = np.arange(self.n_states)
+        self.encodings[rows, key // self.n_directions] = 1.0
+        self.encodings[rows, n_types + key % self.n_directions] = 1.0
+        scores = n_types + self.n_directions
+        self.encodings[:, scores : scores + 2] = self.game_scores[game]
+        self.encodings[:, scores + 2 : scores + 4] = self.set_scores[set_]
+        self.encodings[:, scores + 4] = serves
+        self.encodings.setflags(write=False)
+
+    def __len__(self):
+        return self.n_states
+
+    def compose(self, key, game, set_, player_serves) -> np.ndarray:
+        """Ids of (shot key, game index, set index, player serves), broadcast."""
+        return ((np.asarray(key) * self.n_game_scores + game) * self.n_set_scores + set_) * 2 + np.asarray(
+            player_serves, dtype=np.int64
+        )
+
+    def decompose(self, ids) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Inverse of ``compose``: (shot key, game index, set index, player serves) of ``ids``."""
+        ids = np.asarray(ids)
+        rest, serves = np.divmod(ids, 2)
+        rest, set_ = np.divmod(rest, self.n_set_scores)
+        key, game = np.divmod(rest, self.n_game_scores)
+        return key, game, set_, serves.astype(bool)
+
+    def mirror(self, ids) -> np.ndarray:
+        """Ids of the same positions seen by the opponent: same last shot, scores swapped, server flipped."""
+        key, game, set_, serves = self.decompose(ids)
+        return self.compose(key, self.game_mirror[game], self.set_mirror[set_], ~serves)
+
+    def state_of(self, state_id: int) -> State:
+        """``State`` of an id (tiebreak points read as ``"0"``, as in the encoding)."""
+        key, game, set_, serves = self.decompose(int(state_id))
+        player_game, pc_game = self.game_scores[game]
+        player_set, pc_set = self.set_scores[set_]
+        return State(
+            last_shot_type=self.last_shot_space[int(key) // self.n_directions],
+            last_shot_direction=self.direction_space[int(key) % self.n_directions],
+            player_game_score=GAME_SCORE_LABELS[player_game],
+            player_set_score=int(player_set),
+            pc_game_score=GAME_SCORE_LABELS[pc_game],
+            pc_set_score=int(pc_set),
+            player_serves=bool(serves),
+        )
+
+    def keys(self, ids) -> np.ndarray:
+        """Shot key of each id (``keys // n_directions`` is its ``last_shot_space`` index)."""
+        return np.asarray(ids) // (self.n_game_scores * self.n_set_scores * 2)
+
+    def scores(self, player_games, pc_games, player_sets, pc_sets) -> Tuple[np.ndarray, np.ndarray]:
+        """Game and set indices of score arrays, checking that they are covered."""
+        game = self.game_lookup[player_games, pc_games]
+        if np.any(player_sets > self.max_set_games) or np.any(pc_sets > self.max_set_games):
+            raise ValueError(f"Set score above {self.max_set_games} games is not covered by this StateIndex.")
+        set_ = self.set_lookup[player_sets, pc_sets]
+        if np.any(game < 0) or np.any(set_ < 0):
+            raise ValueError("Unreachable score has no state id.")
+        return game, set_
+
+    def id_of(self, state: State) -> int:
+        """Id of ``state``, with the same fallbacks as ``State.encode`` for unknown shots and labels."""
+        type_idx = self.reverse_last_shot_space.get(state.last_shot_type, 0)
+        direction = state.last_shot_direction
+        direction_idx = self.direction_space.index(direction) if direction in self.direction_space else 0
+        game, set_ = self.scores(
+            GAME_SCORE_CODES.get(state.player_game_score, 0),
+            GAME_SCORE_CODES.get(state.pc_game_score, 0),
+            state.player_set_score,
+            state.pc_set_score,
+        )
+        return int(self.compose(type_idx * self.n_directions + direction_idx, game, set_, state.player_serves))
+
+    def ids_from_encodings(self, encoded: np.ndarray) -> np.ndarray:
+        """Ids of a (batch, observation size) array of ``State.encode`` vectors."""
+        encoded = np.asarray(encoded)
+        n_types = self.n_keys // self.n_directions
+        scores = n_types + self.n_directions
+        key = encoded[:, :n_types].argmax(axis=1) * self.n_directions + encoded[:, n_types:scores].argmax(axis=1)
+        values = encoded[:, scores : scores + 4].astype(np.int64)
+        game, set_ = self.scores(values[:, 0], values[:, 1], values[:, 2], values[:, 3])
+        return self.compose(key, game, set_, encoded[:, scores + 4] > 0.5)
+
+    def encode(self, ids) -> np.ndarray:
+        """``State.encode`` of ``ids`` as float32 (a copy, one row per id)."""
+        return np.take(self.encodings, ids, axis=0)
+
+
+@lru_cache(maxsize=None)
+def _cached_index(last_shot_space: tuple, direction_space: tuple, max_set_games: int) -> StateIndex:
+    return StateIndex(dict(last_shot_space), list(direction_space), max_set_games)
+
+
+def state_index(env) -> StateIndex:
+    """
+    ``StateIndex`` of ``env`` (a ``TennisEnv``), built once per action spaces
+    and set length and shared by every env, vector env and agent using them.
+    """
+    max_set_games = max(STANDARD.games_per_set, env.match_format.games_per_set)
+    return _cached_index(tuple(env.last_shot_space.items()), tuple(env.direction_space), max_set_games)
@@ -1,23 +1,134 @@
 import copy
+from dataclasses import dataclass
 from datetime import datetime
+from typing import NamedTuple, Optional, Tuple, Union
 from app.models.env import Turn
 
 
+@dataclass(frozen=True)
+class MatchFormat:
+    """
+    Scoring format of a match.
+
+    Attributes:
+        games_per_set (int): Games needed to win a set (tiebreak at games-all).
+        tiebreak_points (int): Points needed to win a tiebreak.
+        no_ad (bool): Deciding point at deuce instead of advantage.
+        sets_to_win (int): Sets needed to win the match (best of 2n - 1).
+        match_tiebreak (bool): Each set is a single standalone tiebreak.
+    """
+
+    games_per_set: int = 6
+    tiebreak_points: int = 7
+    no_ad: bool = False
+    sets_to_win: int = 1
+    match_tiebreak: bool = False
+
+    @property
+    def best_of(self) -> int:
+        return 2 * self.sets_to_win - 1
+
+
+STANDARD = MatchFormat()
+NO_AD = MatchFormat(no_ad=True)
+SHORT_SET = MatchFormat(games_per_set=4, no_ad=True)
+MATCH_TIEBREAK = MatchFormat(tiebreak_points=10, match_tiebreak=True)
+BEST_OF_3 = MatchFormat(sets_to_win=2)
+
+MATCH_FORMATS = {
+    "standard": STANDARD,
+    "no_ad": NO_AD,
+    "short_set": SHORT_SET,
+    "match_tiebreak": MATCH_TIEBREAK,
+    "best_of_3": BEST_OF_3,
+}
+
+
+class MatchSnapshot(NamedTuple):
+    """Immutable copy of a ``TennisMatch`` scoreboard, see ``TennisMatch.snapshot``."""
+
+    sets: Tuple[Tuple[int, int], ...]
+    set_p1: int
+    set_p2: int
+    game_p1: Union[str, int]
+    game_p2: Union[str, int]
+    tiebreak: bool
+    match_score_p1: int
+    match_score_p2: int
+    winner: Optional[Turn] = None
+
+
 class TennisMatch:
-    def __init__(self):
+    def __init__(self, match_format: MatchFormat = STANDARD):
         self.match_moment = MatchMoment()
-        self.max_sets = 1
+        self.format = match_format
+        self.max_sets = match_format.best_of
         self.player1 = Turn.PLAYER
         self.player2 = Turn.PC
+        self.winner = None
 
     def start_match(self):
         self.match_moment.current_set = Set()
-        self.match_moment.current_game = Game()
+        self.match_moment.current_game = self._new_game()
+        self.winner = None
+
+    def _new_game(self):
+        if self.format.match_tiebreak:
+            return Tiebreak(max_score=self.format.tiebreak_points)
+        return Game()
 
     def end_match(self):
         # Perform any necessary cleanup or calculations
         pass
 
+    def snapshot(self) -> MatchSnapshot:
+        """Capture the whole scoreboard in a small immutable value."""
+        moment = self.match_moment
+        return MatchSnapshot(
+            tuple((s.player1_score, s.player2_score) for s in moment.sets),
+            moment.current_set.player1_score,
+            moment.current_set.player2_score,
+            moment.current_game.player1_score,
+            moment.current_game.player2_score,
+            isinstance(moment.current_game, Tiebreak),
+            moment.match_score_p1,
+            moment.match_score_p2,
+            self.winner,
+        )
+
+    def score(self) -> tuple:
+        """(game_p1, game_p2, set_p1, set_p2, sets_p1, sets_p2) before the next point."""
+        moment = self.match_moment
+        return (
+            moment.current_game.player1_score,
+            moment.current_game.player2_score,
+            moment.current_set.player1_score,
+            moment.current_set.player2_score,
+            moment.match_score_p1,
+            moment.match_score_p2,
+        )
+
+    def restore(self, snapshot: MatchSnapshot):
+        """Restore a ``snapshot`` in place, reusing the existing objects."""
+        moment = self.match_moment
+        # Só troca o objeto do game quando muda entre Game e Tiebreak
+        if isinstance(moment.current_game, Tiebreak) != snapshot.tiebreak:
+            moment.current_game = Tiebreak(max_score=self.format.tiebreak_points) if snapshot.tiebreak else Game()
+        moment.current_game.player1_score = snapshot.game_p1
+        moment.current_game.player2_score = snapshot.game_p2
+        moment.current_set.player1_score = snapshot.set_p1
+        moment.current_set.player2_score = snapshot.set_p2
+        moment.match_score_p1 = snapshot.match_score_p1
+        moment.match_score_p2 = snapshot.match_score_p2
+        self.winner = snapshot.winner
+
+        del moment.sets[len(snapshot.sets):]
+        while len(moment.sets) < len(snapshot.sets):
+            moment.sets.append(Set())
+        for set, (p1, p2) in zip(moment.sets, snapshot.sets):
+            set.player1_score = p1
+            set.player2_score = p2
+
     def point(self, player):
         if isinstance(self.match_moment.current_game, Tiebreak):
             game_winner, set_winner = self.update_tiebreak(player)
@@ -55,6 +166,10 @@ class TennisMatch:
                 self.match_moment.current_game.player1_score == "40"
                 and self.match_moment.current_game.player2_score == "40"
             ):
+                if self.format.no_ad:
+                    # Ponto decisivo: sem vantagem no 40-40
+                    set_winner = self.update_set(player)
+                    return player, set_winner
                 self.match_moment.current_game.player1_score = "AD"
                 return None, None
             elif self.match_moment.current_game.player1_score == "AD":
@@ -85,6 +200,10 @@ class TennisMatch:
                 self.match_moment.current_game.player2_score == "40"
                 and self.match_moment.current_game.player1_score == "40"
             ):
+                if self.format.no_ad:
+                    # Ponto decisivo: sem vantagem no 40-40
+                    set_winner = self.update_set(player)
+                    return player, set_winner
                 self.match_moment.current_game.player2_score = "AD"
                 return None, None
             elif self.match_moment.current_game.player2_score == "AD":
@@ -98,52 +217,36 @@ class TennisMatch:
             return None, None
 
     def update_set(self, player):
+        current_set = self.match_moment.current_set
         if player == self.player1:
-            self.match_moment.current_set.player1_score += 1
-            self.match_moment.current_game = Game()
-            if (
-                self.match_moment.current_set.player1_score >= 6
-                and self.match_moment.current_set.player1_score
-                - self.match_moment.current_set.player2_score
-                >= 2
-            ):
-                self.match_moment.sets.append(self.match_moment.current_set)
-                self.match_moment.current_set = Set()
-                self.match_moment.current_game = Game()
-                self.match_moment.match_score_p1 += 1
-                return player
-            elif self.match_moment.current_set.player1_score == 7:
-                self.match_moment.sets.append(self.match_moment.current_set)
-                self.match_moment.current_set = Set()
-                self.match_moment.current_game = Game()
-                self.match_moment.match_score_p1 += 1
-                return player
-
-        if player == self.player2:
-            self.match_moment.current_set.player2_score += 1
-            self.match_moment.current_game = Game()
-            if (
-                self.match_moment.current_set.player2_score >= 6
-                and self.match_moment.current_set.player2_score
-                - self.match_moment.current_set.player1_score
-                >= 2
-            ):
-                self.match_moment.sets.append(self.match_moment.current_set)
-                self.match_moment.current_set = Set()
-                self.match_moment.match_score_p2 += 1
-                return player
-            elif self.match_moment.current_set.player2_score == 7:
-                self.match_moment.sets.append(self.match_moment.current_set)
-                self.match_moment.current_set = Set()
-                self.match_moment.current_game = Game()
-                self.match_moment.match_score_p2 += 1
-                return player
+            current_set.player1_score += 1
+            mine, other = current_set.player1_score, current_set.player2_score
+        else:
+            current_set.player2_score += 1
+            mine, other = current_set.player2_score, current_set.player1_score
+        self.match_moment.current_game = Game()
 
+        games = self.format.games_per_set
         if (
-            self.match_moment.current_set.player1_score == 6
-            and self.match_moment.current_set.player2_score == 6
+            self.format.match_tiebreak
+            or (mine >= games and mine - other >= 2)
+            or mine == games + 1
         ):
-            self.match_moment.current_game = Tiebreak()
+            self.match_moment.sets.append(current_set)
+            self.match_moment.current_set = Set()
+            self.match_moment.current_game = self._new_game()
+            if player == self.player1:
+                self.match_moment.match_score_p1 += 1
+                sets_won = self.match_moment.match_score_p1
+            else:
+                self.match_moment.match_score_p2 += 1
+                sets_won = self.match_moment.match_score_p2
+            if sets_won >= self.format.sets_to_win:
+                self.winner = player
+            return player
+
+        if current_set.player1_score == games and current_set.player2_score == games:
+            self.match_moment.current_game = Tiebreak(max_score=self.format.tiebreak_points)
 
         return None
 
@@ -238,6 +341,18 @@ class MatchMoment:
 
         return moment
 
+    def to_bytes(self) -> bytes:
+        """Packed binary form, see ``app.environment.moment_codec``."""
+        from app.environment.moment_codec import encode_moment
+
+        return encode_moment(self)
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        from app.environment.moment_codec import decode_moment
+
+        return decode_moment(data)
+
 
 class Set:
     def __init__(self):
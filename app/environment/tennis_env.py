@@ -1,11 +1,34 @@
 import time
-from typing import Dict, Tuple, Optional
-from app.environment.tennis_engine import TennisMatch
+from typing import Any, Dict, List, NamedTuple, Tuple, Optional, Union
+from app.agents.base_agent import BaseAgent
+from app.environment.tennis_engine import STANDARD, MatchFormat, TennisMatch
+from app.environment.compact_engine import CompactTennisMatch
+from app.environment.events import EnvEvent, EventSource
+from app.environment.macro import CONTROL, DEAD, MacroTransitions
+from app.environment.sampling import CompiledTransitionGraph
+from app.environment.state_index import StateIndex, state_index
 from app.models.env import Action, State, Turn
-import random
+from app.models.rules import SHOT_TYPES, action_mask_table, is_legal_transition
+from app.utils.rng import SeedLike, make_generator
+import numpy as np
 
 
-class TennisEnv:
+class EnvSnapshot(NamedTuple):
+    """Immutable copy of everything ``TennisEnv.step`` depends on."""
+
+    match: tuple
+    state: tuple
+    turn: Turn
+    server: Turn
+    first_serve: bool
+    rng_state: Any
+    episode_steps: int = 0
+
+
+class TennisEnv(EventSource):
+    # Uniformes sorteadas por bloco para a amostragem do PC
+    UNIFORM_BLOCK_SIZE = 4096
+
     def __init__(
         self,
         transition_graph: Dict[str, Dict[str, Dict[tuple, float]]],
@@ -18,7 +41,20 @@ class TennisEnv:
         set_loss_penalty: int = -50,
         base_penalty: float = -0.0,
         illegal_action_penalty: int = -20,
+        compact_engine: bool = False,
+        match_format: MatchFormat = STANDARD,
+        rng: Optional[np.random.Generator] = None,
+        max_episode_steps: Optional[int] = 10_000,
+        seed: SeedLike = None,
+        macro_steps: bool = False,
+        opponent: Optional[BaseAgent] = None,
     ):
+        # Sem inscritos, nenhum evento é montado (ver app/environment/events.py)
+        super().__init__()
+        # Gerador próprio do env (direção inicial e amostragem do PC), nada de estado global
+        self.rng = rng if rng is not None else make_generator(seed)
+        self._uniforms: list = []
+        self._uniform_pos = 0
         self.POINT_WIN_REWARD = point_win_reward
         self.POINT_LOSS_PENALTY = point_loss_penalty
         self.GAME_WIN_REWARD = game_win_reward
@@ -56,6 +92,9 @@ class TennisEnv:
         self.action_space = [
             (shot_type, shot_direction) for shot_type in self.stroke_space.values() for shot_direction in self.direction_space
         ]
+        # Ações prontas, indexadas pelo índice da ação (o mesmo das máscaras e da rede)
+        self.action_table = [Action(shot_type, shot_direction) for shot_type, shot_direction in self.action_space]
+        self.action_index = {action: idx for idx, action in enumerate(self.action_table)}
 
         self.errors = {"@", "#"}
         self.winners = {"winner"}
@@ -84,20 +123,30 @@ class TennisEnv:
             20: "winner",
         }
         self.reverse_last_shot_space = {v: k for k, v in self.last_shot_space.items()}
+        # Máscara de ações legais (linhas: last_shot_space, colunas: action_space)
+        self.action_masks = action_mask_table(list(self.stroke_space.values()), len(self.direction_space))[
+            [SHOT_TYPES.index(t) for t in self.last_shot_space.values()]
+        ]
+        self.action_masks.flags.writeable = False
+        # Orçamento de passos por episódio: um laço de ações ilegais não roda para sempre
+        self.max_episode_steps = max_episode_steps
+        self.episode_steps = 0
         
 
         self.first_serve = True
 
         if serve_first:
             self.initial_shot_type = "#"
-            self.initial_shot_direction = random.choice(self.direction_space)
+            self.initial_shot_direction = self._random_direction()
             self.turn = Turn.PLAYER  # Player's turn
             self.server = Turn.PLAYER
         else:
             self.initial_shot_type = "serve"
-            self.initial_shot_direction = random.choice(self.direction_space)
+            self.initial_shot_direction = self._random_direction()
             self.turn = Turn.PC  # PC's turn
             self.server = Turn.PC
+        self.initial_turn = self.turn
+        self.initial_server = self.server
 
         self.state: State = State(
             last_shot_type=self.initial_shot_type,
@@ -109,11 +158,39 @@ class TennisEnv:
             player_serves=serve_first,
         )
         self.transition_graph = transition_graph
-        self.match = TennisMatch()
+        # Grafo compilado uma vez em tabelas de alias por (shot_type, direção)
+        self.compiled_graph = CompiledTransitionGraph(
+            transition_graph, list(self.last_shot_space.values()), self.direction_space
+        )
+        # Scoring engine: the compact one keeps an integer scoreboard driven by tables
+        self.match_cls = CompactTennisMatch if compact_engine else TennisMatch
+        self.match_format = match_format
+        self.match = self.match_cls(self.match_format)
         self.match.start_match()
+        # Modo macro: cada ponto sai de uma única amostra da cadeia absorvente (app/environment/macro.py)
+        self.macro = MacroTransitions(self) if macro_steps else None
+        self.opponent = None
+        self.set_opponent(opponent)
+
+    def set_opponent(self, opponent: Optional[BaseAgent]):
+        """
+        Self-play: let ``opponent`` choose the PC's shots (``None`` restores the
+        graph). The graph still decides whether each shot ends the point; when
+        it does not, the reply is ``opponent.act`` on the state seen from the
+        PC's side (scores swapped, server flipped).
+        """
+        if opponent is not None and self.macro is not None:
+            raise ValueError("Self-play needs shot-by-shot steps, macro_steps samples whole points from the graph.")
+        self.opponent = opponent
+
+    def set_match_format(self, match_format: MatchFormat):
+        """Play ``match_format`` from the next ``reset()`` on (e.g. shorter matches early in training)."""
+        self.match_format = match_format
 
     def reset(self):
-        # TODO
+        # Cada episódio começa do mesmo saque inicial, com o formato de partida atual
+        self.turn = self.initial_turn
+        self.server = self.initial_server
         self.state: State = State(
             last_shot_type=self.initial_shot_type,
             last_shot_direction=self.initial_shot_direction,
@@ -123,36 +200,89 @@ class TennisEnv:
             pc_set_score=0,
             player_serves=self.server == Turn.PLAYER,
         )
-        self.match = TennisMatch()
+        self.match = self.match_cls(self.match_format)
         # ensure TennisMatch is properly initialized (match_moment etc.)
         self.match.start_match()
         # reset serve flag so scoring logic behaves like at match start
         self.first_serve = True
+        self.episode_steps = 0
         # return initial state so callers (scripts/test.py) receive it
-        return self.state
+        return self.state.copy()
+
+    def snapshot(self) -> EnvSnapshot:
+        """
+        Capture the scoreboard, state, turn, server, first_serve flag and RNG
+        state, so rollouts can fork the env and come back with ``restore``.
+        """
+        return EnvSnapshot(
+            self.match.snapshot(),
+            self.state.to_tuple(),
+            self.turn,
+            self.server,
+            self.first_serve,
+            (self.rng.bit_generator.state, self._uniforms, self._uniform_pos),
+            self.episode_steps,
+        )
 
-    def step(self, action) -> Tuple[State, int, bool, dict]:
+    def seed(self, seed: Union[SeedLike, np.random.Generator] = None):
+        """Reseed the env's stream (or adopt a ``Generator``), dropping buffered uniforms."""
+        self.rng = seed if isinstance(seed, np.random.Generator) else make_generator(seed)
+        self._uniforms = []
+        self._uniform_pos = 0
+
+    def restore(self, snapshot: EnvSnapshot, restore_rng: bool = True):
+        """Restore a ``snapshot`` in place, without rebuilding the match or the state."""
+        self.match.restore(snapshot.match)
+        (
+            self.state.last_shot_type,
+            self.state.last_shot_direction,
+            self.state.player_game_score,
+            self.state.player_set_score,
+            self.state.pc_game_score,
+            self.state.pc_set_score,
+            self.state.player_serves,
+        ) = snapshot.state
+        self.turn = snapshot.turn
+        self.server = snapshot.server
+        self.first_serve = snapshot.first_serve
+        self.episode_steps = snapshot.episode_steps
+        if restore_rng:
+            self.rng.bit_generator.state, self._uniforms, self._uniform_pos = snapshot.rng_state
 
+    def step(self, action) -> Tuple[State, int, bool, dict]:
+        """
+        Play ``action`` (an ``Action``, a ``(shot_type, shot_direction)`` tuple
+        or an index of ``action_space``) and simulate until it is the player's
+        turn again. The returned state is a copy, safe to keep (e.g. in a
+        replay buffer) while the env keeps updating ``self.state``.
+        """
         reward = 0
         done = False
 
-        if not isinstance(action, Action):
-            action = Action(shot_type=action[0], shot_direction=action[1])
+        if isinstance(action, (int, np.integer)):
+            action = self.action_table[action]
+        elif not isinstance(action, Action):
+            action = Action(*action)
+
+        self.episode_steps += 1
+        truncated = self.max_episode_steps is not None and self.episode_steps >= self.max_episode_steps
 
         is_illegal = self._filter_illegal_action(action)
         if is_illegal:
-            print("Ação ilegal detectada:", action)
-            return self.state, self.ILLEGAL_ACTION_PENALTY, False, {}
+            if self._subscribers:
+                self._emit(EnvEvent.ILLEGAL_ACTION, action=action, last_shot_type=self.state.last_shot_type)
+            return self.state.copy(), self.ILLEGAL_ACTION_PENALTY, truncated, self._info(truncated)
         
         # Aplica ação do jogador
         self._update_state(action)
         # Simula até acabar a rodada do PC
-        print(f"Vez do {self.turn}")
+        if self._subscribers:
+            self._emit(EnvEvent.TURN, turn=self.turn, reason="step")
+        if self.macro is not None:
+            reward, done = self._macro_step()
+            self.turn = Turn.PLAYER
+            return self.state.copy(), reward, done or truncated, self._info(truncated and not done)
         # Sample next state
-        action = Action(
-            shot_type=self.state.last_shot_type,
-            shot_direction=self.state.last_shot_direction,
-        )
         next_actions = self._choose_next_2_actions(action)
 
         new_state, new_reward = self._compute_actions(next_actions)
@@ -165,16 +295,11 @@ class TennisEnv:
             self.state.player_set_score = new_state[2]
             self.state.pc_set_score = new_state[3]
 
-            if new_state[5] is not None:
-                    done = True
-                    print("Match ended!")
-
-        while self.turn == Turn.PC:
-            action = Action(
-                shot_type=self.state.last_shot_type,
-                shot_direction=self.state.last_shot_direction,
-            )
-            next_actions = self._choose_next_2_actions(action)
+            if self.match.winner is not None:
+                done = True
+
+        while self.turn == Turn.PC and not done:
+            next_actions = self._choose_next_2_actions((self.state.last_shot_type, self.state.last_shot_direction))
             self._update_state(next_actions[0])
             new_state, new_reward = self._compute_actions(next_actions)
             reward += new_reward
@@ -185,86 +310,142 @@ class TennisEnv:
                 self.state.player_set_score = new_state[2]
                 self.state.pc_set_score = new_state[3]
 
-                if new_state[5] is not None:
+                if self.match.winner is not None:
                     done = True
-                    print("Match ended!")
 
         # Apply action to the environment and update state
-        info = {}
         self.turn = Turn.PLAYER
-        return self.state, reward, done, info
+        return self.state.copy(), reward, done or truncated, self._info(truncated and not done)
+
+    def _macro_step(self) -> Tuple[float, bool]:
+        """
+        Rest of the step after the player's shot, one absorbing-chain draw per
+        point. Returns (reward, done).
+        """
+        macro = self.macro
+        key = self.compiled_graph.keys.get((self.state.last_shot_type, self.state.last_shot_direction))
+        if key is None:
+            raise ValueError("No transitions available from given action.")
+        turn = self.turn
+        first_serve = self.first_serve
+        reward = 0
+        while True:
+            outcome = macro.sample(macro.transient_index(turn, key, first_serve), self._next_uniform())
+            kind = macro.kind[outcome]
+            if kind == DEAD:
+                raise ValueError("No transitions available from given action.")
+            rounds = macro.rounds(outcome, first_serve)
+            self._update_state(macro.actions[outcome])
+            if self._subscribers and first_serve and (rounds == 2 or not macro.first_serve[outcome]):
+                self._emit(EnvEvent.FAULT, server=self.server)
+            if kind == CONTROL:
+                self.first_serve = macro.first_serve[outcome]
+                return reward + self.BASE_PENALTY * rounds, False
+
+            # Ponto decidido: a última rodada já entra no _get_reward
+            player_scored = macro.scorer[outcome] == Turn.PLAYER.value
+            new_state = self._update_score(player_scored=player_scored)
+            reward += self.BASE_PENALTY * (rounds - 1) + self._get_reward(new_state, player_scored=player_scored)
+            if self.match.winner is not None:
+                return reward, True
+            if self.turn == Turn.PLAYER:
+                return reward, False
+            # PC saca o próximo ponto sem decisão do jogador
+            turn = Turn.PC
+            key = macro.key[outcome]
+            first_serve = True
+
+    def _info(self, truncated: bool) -> dict:
+        info = {"action_mask": self.action_mask().copy()}
+        if truncated:
+            info["TimeLimit.truncated"] = True
+        return info
+
+    @property
+    def state_index(self) -> StateIndex:
+        """Dense ids and encodings of the observable states (shared by envs with the same spaces)."""
+        return state_index(self)
+
+    def state_id(self, state: Optional[State] = None) -> int:
+        """Dense id of ``state`` (default: current state); ``state_index.encodings[id]`` is its encoding."""
+        return self.state_index.id_of(self.state if state is None else state)
+
+    def action_mask(self, state: Optional[State] = None) -> np.ndarray:
+        """Boolean mask over ``action_space`` of the actions legal in ``state`` (default: current state)."""
+        state = self.state if state is None else state
+        return self.action_masks[self.reverse_last_shot_space[state.last_shot_type]]
 
     def _filter_illegal_action(self, action: Action) -> bool:
-        # Verifica se a ação é legal no estado atual
-        if self.state.last_shot_type in self.errors or self.state.last_shot_type in self.winners:
-            if action.shot_type != "serve":
-                return True  # Apenas saque é permitido após erro ou winner
-            
-        if self.state.last_shot_type in self.stroke_space.values():
-            if action.shot_type == "serve":
-                return True  # Saque não é permitido após saque ou golpe
-
-        return False
-
-    def _choose_next_action(self, action: Action) -> Action:
-        possible_next_actions = self.transition_graph.get(action.shot_type, {}).get(
-            action.shot_direction, {}
-        )
-        if possible_next_actions is None:
-            raise ValueError("No possible transitions from current state.")
-
-        # Sample next state based on transition probabilities
-        # Build lists of candidates and their probabilities
-        candidates = list(possible_next_actions.keys())
-        # print(possible_next_actions)
-        probs = list(possible_next_actions.values())
-
-        if not candidates:
+        # Verifica se a ação é legal no estado atual (regras em app/models/rules.py)
+        return not is_legal_transition(self.state.last_shot_type, action.shot_type)
+
+    def _random_direction(self) -> int:
+        return self.direction_space[int(self.rng.integers(len(self.direction_space)))]
+
+    def _next_uniform(self) -> float:
+        if self._uniform_pos >= len(self._uniforms):
+            self._uniforms = self.rng.random(self.UNIFORM_BLOCK_SIZE).tolist()
+            self._uniform_pos = 0
+        u = self._uniforms[self._uniform_pos]
+        self._uniform_pos += 1
+        return u
+
+    def _choose_next_action(self, action: tuple, opponent: bool = False) -> Action:
+        key = self.compiled_graph.keys.get(action)
+        if key is None:
             raise ValueError("No transitions available from given action.")
 
-        total = sum(probs)
-        if total <= 0:
-            raise ValueError("Transition probabilities sum to zero.")
-
-        # Sample next state
-        next_shot_type, next_shot_direction = random.choices(
-            candidates, weights=probs, k=1
-        )[0]
+        # Sample next state from the precompiled alias table
+        idx = self.compiled_graph.sample_index(key, self._next_uniform())
+        next_action = self.compiled_graph.actions[key][idx]
+        if opponent and next_action.shot_type not in self.errors and next_action.shot_type not in self.winners:
+            # Lance anterior não encerrou o ponto: o golpe de resposta é do oponente
+            next_action = self._opponent_action(action)
 
-        # FIXME: DADOS MOCKADOS PARA TESTE
-        # next_shot_type, next_shot_direction = random.choices(
-        #     [("#", "3"), ("f","1"), ("b","2"), ("winner","1")], k=1
-        # )[0]
+        if self._subscribers:
+            self._emit(EnvEvent.SHOT_SAMPLED, action=next_action)
 
-        # if action.shot_type in self.errors or action.shot_type in self.winners:
-        #     next_shot_direction = random.choice(["1", "2", "3"])
-        #     next_shot_type = "serve"
+        return next_action
 
-        print(f"Chosen next action: ({next_shot_type}, {next_shot_direction})")
-
-        return Action(shot_type=next_shot_type, shot_direction=next_shot_direction)
-
-    def _choose_next_2_actions(self, action: Action) -> Action:
+    def _choose_next_2_actions(self, action: tuple) -> List[Action]:
+        """Sample the two shots following ``action`` (the last shot played)."""
         executed_actions = []
-        action = Action(
-            shot_type=self.state.last_shot_type,
-            shot_direction=self.state.last_shot_direction,
-        )
-        for _ in range(2):
-            next_action = self._choose_next_action(action)
+        for i in range(2):
+            # O primeiro lance sorteado é sempre do PC (resposta ou saque)
+            next_action = self._choose_next_action(action, opponent=i == 0 and self.opponent is not None)
             executed_actions.append(next_action)
             action = next_action
         return executed_actions
 
+    def _opponent_action(self, action: tuple) -> Action:
+        """Shot of the self-play opponent in reply to ``action``, from its side of the net."""
+        state = State(
+            last_shot_type=action[0],
+            last_shot_direction=action[1],
+            player_game_score=self.state.pc_game_score,
+            player_set_score=self.state.pc_set_score,
+            pc_game_score=self.state.player_game_score,
+            pc_set_score=self.state.player_set_score,
+            player_serves=not self.state.player_serves,
+        )
+        reply = self.opponent.act(state)
+        if isinstance(reply, (int, np.integer)):
+            reply = self.action_table[reply]
+        elif not isinstance(reply, Action):
+            reply = Action(*reply)
+        if not is_legal_transition(action[0], reply.shot_type):
+            raise ValueError(f"Opponent played {reply} after {action[0]!r}, an illegal shot.")
+        return reply
+
     def _update_score(self, player_scored: bool, is_serve: Optional[bool] = False):
 
         if is_serve and self.first_serve:
             self.first_serve = False
-            print("Primeiro saque perdido, segunda chance.")
+            if self._subscribers:
+                self._emit(EnvEvent.FAULT, server=self.server)
             return None
 
         if player_scored:
-            print("Ponto para o PLAYER")
             (
                 current_game_p1,
                 current_game_p2,
@@ -274,7 +455,6 @@ class TennisEnv:
                 set_winner,
             ) = self.match.point(player=Turn.PLAYER)
         else:
-            print("Ponto para o PC")
             (
                 current_game_p1,
                 current_game_p2,
@@ -288,12 +468,20 @@ class TennisEnv:
             # Switch server for new game
             self.server = Turn.PLAYER if self.server == Turn.PC else Turn.PC
             self.state.player_serves = self.server == Turn.PLAYER
-            print(f"Game ended! Server switched to: {self.server}")
 
         # Passa a vez para o sacador
         self.first_serve = True
         self.turn = Turn.PLAYER if self.server == Turn.PLAYER else Turn.PC
-        print(f"Turno para: {self.turn}")
+
+        if self._subscribers:
+            self._emit(EnvEvent.POINT_WON, winner=Turn.PLAYER if player_scored else Turn.PC)
+            if game_winner is not None:
+                self._emit(EnvEvent.GAME_WON, winner=game_winner, server=self.server)
+            if set_winner is not None:
+                self._emit(EnvEvent.SET_WON, winner=set_winner)
+            if self.match.winner is not None:
+                self._emit(EnvEvent.MATCH_WON, winner=self.match.winner)
+            self._emit(EnvEvent.TURN, turn=self.turn, reason="point")
 
         # Atualiza o placar do estado
         self.state.player_game_score = current_game_p1
@@ -340,14 +528,16 @@ class TennisEnv:
         if next_actions[0].shot_type in self.errors:
             if self.turn == Turn.PLAYER:
                 # Erro do player, PC scores
-                print("Player errou")
+                if self._subscribers:
+                    self._emit(EnvEvent.RALLY_ENDED, by=Turn.PLAYER, cause="error", second_shot=False)
                 new_state = self._update_score(player_scored=False, is_serve=is_serve)
                 new_reward = self._get_reward(new_state, player_scored=False)
                 self._update_state(next_actions[0])
                 return new_state, new_reward
             elif self.turn == Turn.PC:
                 # Erro do PC, Player scores
-                print("PC errou")
+                if self._subscribers:
+                    self._emit(EnvEvent.RALLY_ENDED, by=Turn.PC, cause="error", second_shot=False)
                 new_state = self._update_score(player_scored=True, is_serve=is_serve)
                 new_reward = self._get_reward(new_state, player_scored=True)
                 self._update_state(next_actions[0])
@@ -356,14 +546,16 @@ class TennisEnv:
         elif next_actions[0].shot_type in self.winners:
             if self.turn == Turn.PLAYER:
                 # Player made a winner, Player scores
-                print("Player fez um winner")
+                if self._subscribers:
+                    self._emit(EnvEvent.RALLY_ENDED, by=Turn.PLAYER, cause="winner", second_shot=False)
                 new_state = self._update_score(player_scored=True)
                 new_reward = self._get_reward(new_state, player_scored=True)
                 self._update_state(next_actions[0])
                 return new_state, new_reward
             elif self.turn == Turn.PC:
                 # PC made a winner, PC scores
-                print("PC fez um winner")
+                if self._subscribers:
+                    self._emit(EnvEvent.RALLY_ENDED, by=Turn.PC, cause="winner", second_shot=False)
                 new_state = self._update_score(player_scored=False)
                 new_reward = self._get_reward(new_state, player_scored=False)
                 self._update_state(next_actions[0])
@@ -377,7 +569,8 @@ class TennisEnv:
 
         if next_actions[1].shot_type in self.errors:
             # Erro do Player, PC scores
-            print("PC errou seu lance no segundo lance")
+            if self._subscribers:
+                self._emit(EnvEvent.RALLY_ENDED, by=Turn.PC, cause="error", second_shot=True)
             new_state = self._update_score(player_scored=True, is_serve=is_serve)
             new_reward = self._get_reward(new_state, player_scored=True)
             self._update_state(next_actions[1])
@@ -385,7 +578,8 @@ class TennisEnv:
         # Agora ver se o PC fez um winner no segundo lance
         elif next_actions[1].shot_type in self.winners:
             # Player made a winner, Player scores
-            print("PC fez um winner no segundo lance")
+            if self._subscribers:
+                self._emit(EnvEvent.RALLY_ENDED, by=Turn.PC, cause="winner", second_shot=True)
             new_state = self._update_score(player_scored=False)
             new_reward = self._get_reward(new_state, player_scored=False)
             self._update_state(next_actions[1])
@@ -394,7 +588,8 @@ class TennisEnv:
         # Se chegou aqui, o ponto continua
         self._update_state(next_actions[0])
         self.turn = Turn.PLAYER
-        print("Ponto continua, turno de:", self.turn)
+        if self._subscribers:
+            self._emit(EnvEvent.TURN, turn=self.turn, reason="rally")
         return None, self.BASE_PENALTY
 
     def _update_state(self, action: Action):
@@ -402,14 +597,16 @@ class TennisEnv:
         self.state.last_shot_direction = action.shot_direction
 
     def sample_action(self) -> Action:
-        shot_type = random.choice(list(self.transition_graph.keys()))
-        shot_direction = random.choice(self.direction_space)
+        shot_types = list(self.transition_graph.keys())
+        shot_type = shot_types[int(self.rng.integers(len(shot_types)))]
+        shot_direction = self._random_direction()
         return Action(shot_type=shot_type, shot_direction=shot_direction)
 
 
 if __name__ == "__main__":
     # Example usage
     from app.data.transition_graph import TransitionBuilder
+    from app.environment.events import ConsoleNarrator
     import random
     import pathlib
 
@@ -429,6 +626,7 @@ if __name__ == "__main__":
     print(f"Transition graph built in {end - start} seconds")
     # print(transition_graph)
     env = TennisEnv(transition_graph, serve_first=True)
+    env.subscribe(ConsoleNarrator())
     print(env.action_space)
 
     start = time.time()
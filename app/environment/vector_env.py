@@ -0,0 +1,325 @@
+"""
+Synchronous vectorized ``TennisEnv``.
+
+``VectorTennisEnv`` steps N matches in lockstep with the same rules as
+``TennisEnv.step``, but keeps every match as integer-coded NumPy arrays:
+
+- the last shot is a key ``shot_type_idx * n_directions + direction_idx`` over
+  ``last_shot_space`` (the same keys as ``CompiledTransitionGraph``), so an
+  action index of ``action_space`` is also the key of the shot it plays;
+- the scoreboard lives in a ``BatchTennisMatch``;
+- opponent shots are drawn for all envs at once from the compiled alias tables,
+  each env reading its own ``CounterStreams`` stream, so env ``i`` plays the
+  same match for a given seed however the envs are batched or sharded.
+
+Actions are indices into ``action_space`` and observations are the
+``State.encode`` vectors stacked in a float32 array, read from the
+``StateIndex`` encodings of ``state_ids()``. Finished matches, and
+matches that reach ``max_episode_steps``, are reset automatically; their
+last observation is returned in ``info["final_observation"]``.
+
+With ``backend="numba"`` the rounds of each step run in the compiled kernel of
+``numba_kernel`` instead of NumPy; both backends give identical results.
+
+Self-play: with an ``opponent`` agent (e.g. a frozen ``DQNAgent`` snapshot) the
+PC's shots are chosen by the agent instead of drawn from the graph, as in
+``TennisEnv.set_opponent``. The replies of every match in a round are asked in
+one ``opponent.act_batch`` call on the mirrored observations, so each round
+is a single forward pass whatever ``num_envs`` is, like the player's actions.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.agents.base_agent import BaseAgent
+from app.environment import numba_kernel
+from app.environment.batch_engine import NO_WINNER, BatchTennisMatch
+from app.environment.tennis_engine import MatchFormat
+from app.environment.tennis_env import TennisEnv
+from app.models.env import Action, Turn
+from app.utils.rng import CounterStreams, SeedLike
+
+PLAYER = Turn.PLAYER.value
+PC = Turn.PC.value
+
+
+class VectorTennisEnv:
+    """
+    N ``TennisEnv`` matches stepped together.
+
+    Args:
+        transition_graph: Graph from ``TransitionBuilder.build``.
+        num_envs: Number of concurrent matches.
+        seed: Root seed of the per-env random streams.
+        env_ids: Global ids of these envs (default: ``range(num_envs)``), used
+            by sharded rollouts so each env keeps its stream in any shard.
+        backend: ``"numpy"`` or ``"numba"`` (needs Numba installed).
+        **env_kwargs: Any ``TennisEnv`` argument (``serve_first``, rewards,
+            ``match_format``, ``opponent``...). A single ``TennisEnv`` is built
+            with them and its spaces, rewards and compiled graph are shared.
+    """
+
+    def __init__(
+        self,
+        transition_graph,
+        num_envs: int,
+        seed: SeedLike = None,
+        env_ids: Optional[np.ndarray] = None,
+        backend: str = "numpy",
+        **env_kwargs,
+    ):
+        if backend not in ("numpy", "numba"):
+            raise ValueError(f"Unknown backend {backend!r}, expected 'numpy' or 'numba'.")
+        if backend == "numba" and not numba_kernel.NUMBA_AVAILABLE:
+            raise ImportError("The numba backend requires numba, install it with `pip install numba`.")
+        self.backend = backend
+        self.env = TennisEnv(transition_graph, **env_kwargs)
+        self.num_envs = num_envs
+        self.streams = CounterStreams(seed, ids=env_ids, n=num_envs)
+
+        env = self.env
+        self.action_space = env.action_space
+        self.direction_space = env.direction_space
+        self.last_shot_space = env.last_shot_space
+        self.compiled_graph = env.compiled_graph
+        self.observation_size = len(env.state)
+        self.match_format = env.match_format
+
+        n_types = len(env.last_shot_space)
+        n_dirs = len(env.direction_space)
+        self.n_dirs = n_dirs
+        shot_types = np.array([env.last_shot_space[i] for i in range(n_types)], dtype=object)
+        key_types = np.repeat(shot_types, n_dirs)
+        self.is_error = np.isin(key_types, list(env.errors))
+        self.is_winner = np.isin(key_types, list(env.winners))
+        self.is_terminal = self.is_error | self.is_winner
+        self.is_serve = key_types == "serve"
+        self.action_masks = env.action_masks
+        self.max_episode_steps = env.max_episode_steps
+
+        # Observações saem da tabela de encodings por id de estado
+        self.state_index = env.state_index
+
+        # Como no TennisEnv, a direção inicial é sorteada uma vez por partida
+        initial_type = env.reverse_last_shot_space[env.initial_shot_type]
+        self.initial_shot = initial_type * n_dirs + (self.streams.random() * n_dirs).astype(np.int64)
+        self.initial_turn = env.initial_turn.value
+
+        self.match = BatchTennisMatch(num_envs, server=env.initial_server, match_format=self.match_format)
+        self._kernel_tables = numba_kernel.build_tables(env, self.match_format) if backend == "numba" else None
+        self.opponent = None
+        self.set_opponent(env.opponent)
+        self.shot = np.zeros(num_envs, dtype=np.int64)
+        self.turn = np.zeros(num_envs, dtype=np.int8)
+        self.first_serve = np.ones(num_envs, dtype=bool)
+        self.episode_reward = np.zeros(num_envs, dtype=np.float64)
+        self.episode_length = np.zeros(num_envs, dtype=np.int64)
+        self._reset_idx(np.arange(num_envs))
+
+    def set_opponent(self, opponent: Optional[BaseAgent]):
+        """
+        Let ``opponent`` choose the PC's shots in every env (``None`` restores
+        the graph), from the next round on. Agents with ``act_batch`` (indices
+        from encoded observations and masks) get one call per round; others
+        one ``act`` per match.
+        """
+        if opponent is not None and self.backend == "numba":
+            raise ValueError("Self-play runs the NumPy rounds, use backend='numpy'.")
+        self.opponent = opponent
+        self.env.set_opponent(opponent)
+
+    def set_match_format(self, match_format: MatchFormat):
+        """Play ``match_format`` in every env from the next ``reset()`` on."""
+        self.match_format = match_format
+
+    def reset(self) -> np.ndarray:
+        """Reset every match and return the (num_envs, observation_size) observations."""
+        if self.match_format != self.match.format:
+            self.match = BatchTennisMatch(self.num_envs, server=self.env.initial_server, match_format=self.match_format)
+            if self.backend == "numba":
+                self._kernel_tables = numba_kernel.build_tables(self.env, self.match_format)
+            # Sets mais longos que os do índice atual precisam de outro StateIndex
+            self.env.set_match_format(self.match_format)
+            self.state_index = self.env.state_index
+        self._reset_idx(np.arange(self.num_envs))
+        return self._observe()
+
+    def _reset_idx(self, idx: np.ndarray):
+        self.match.reset(idx)
+        self.shot[idx] = self.initial_shot[idx]
+        self.turn[idx] = self.initial_turn
+        self.first_serve[idx] = True
+        self.episode_reward[idx] = 0.0
+        self.episode_length[idx] = 0
+
+    def step(self, actions) -> Tuple[np.ndarray, np.ndarray, np.ndarray, dict]:
+        """
+        Play one action index per env.
+
+        Returns:
+            observations (float32, (N, obs)), rewards (float32, (N,)),
+            dones (bool, (N,), match over or truncated) and an info dict with
+            ``illegal``, ``truncated`` (bool, (N,)), ``action_mask`` (bool,
+            (N, actions), for the returned observations) and, when some
+            match ended, ``final_observation``, ``episode_reward`` and
+            ``episode_length`` (valid where done).
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        if self.backend == "numba":
+            rewards, illegal = numba_kernel.step(self._kernel_tables, self._kernel_state(), actions)
+            legal = ~illegal
+        else:
+            rewards, legal = self._step_rounds(actions)
+
+        dones = self.match.winner != NO_WINNER
+        self.episode_reward += rewards
+        self.episode_length += 1
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        if self.max_episode_steps is not None:
+            truncated = ~dones & (self.episode_length >= self.max_episode_steps)
+            dones |= truncated
+        observations = self._observe()
+        info = {"illegal": ~legal, "truncated": truncated}
+        if dones.any():
+            done_idx = np.flatnonzero(dones)
+            info["final_observation"] = observations.copy()
+            info["episode_reward"] = self.episode_reward.copy()
+            info["episode_length"] = self.episode_length.copy()
+            self._reset_idx(done_idx)
+            observations[done_idx] = self._observe(done_idx)
+        info["action_mask"] = self.action_mask()
+        return observations, rewards.astype(np.float32), dones, info
+
+    def _step_rounds(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Player round + opponent rounds of every env, in NumPy. Returns (rewards, legal)."""
+        rewards = np.zeros(self.num_envs, dtype=np.float64)
+        legal = self.action_mask()[np.arange(self.num_envs), actions]
+        rewards[~legal] = self.env.ILLEGAL_ACTION_PENALTY
+
+        idx = np.flatnonzero(legal)
+        self.shot[idx] = actions[idx]
+        rewards[idx] += self._play_round(idx, self.turn[idx])
+
+        # Simula até acabar a rodada do PC
+        active = idx[(self.turn[idx] == PC) & (self.match.winner[idx] == NO_WINNER)]
+        while active.size:
+            rewards[active] += self._play_round(active, np.full(active.size, PC, dtype=np.int8))
+            active = active[(self.turn[active] == PC) & (self.match.winner[active] == NO_WINNER)]
+        self.turn[idx] = PLAYER
+        return rewards, legal
+
+    def _kernel_state(self) -> numba_kernel.KernelState:
+        """Views of the env arrays for the compiled kernel."""
+        match = self.match
+        return numba_kernel.KernelState(
+            game=match.game,
+            game_shift=match.game_shift,
+            set=match.set,
+            tiebreak=match.tiebreak,
+            sets_won=match.sets_won,
+            server=match.server,
+            winner=match.winner,
+            shot=self.shot,
+            turn=self.turn,
+            first_serve=self.first_serve,
+            stream_keys=self.streams.keys,
+            counters=self.streams.counters,
+        )
+
+    def action_mask(self) -> np.ndarray:
+        """(N, actions) boolean mask of the legal actions in each env."""
+        return self.action_masks[self.shot // self.n_dirs]
+
+    def _sample(self, idx: np.ndarray, keys: np.ndarray) -> np.ndarray:
+        """Next shot key after each of ``keys``, drawn from the streams of the envs at ``idx``."""
+        graph = self.compiled_graph
+        outcome = graph.sample_indices(keys, self.streams.random(idx))
+        next_keys = graph.outcome_codes[keys, outcome]
+        if (next_keys < 0).any():
+            raise ValueError("Transition to a shot outside of last_shot_space.")
+        return next_keys
+
+    def _play_round(self, idx: np.ndarray, turn: np.ndarray) -> np.ndarray:
+        """
+        One ``_choose_next_2_actions`` + ``_compute_actions`` round for the envs
+        at ``idx``, ``turn`` being whose turn it was. Returns the rewards.
+        """
+        env = self.env
+        shot = self.shot[idx]
+        a1 = self._sample(idx, shot)
+        if self.opponent is not None:
+            # O grafo decide se o lance encerrou o ponto; a resposta (ou o saque) é do oponente
+            reply = ~self.is_terminal[a1]
+            if reply.any():
+                a1[reply] = self._opponent_actions(idx[reply])
+        a2 = self._sample(idx, a1)
+
+        error1 = self.is_error[a1]
+        winner1 = self.is_winner[a1]
+        rally = ~(error1 | winner1)
+        error2 = rally & self.is_error[a2]
+        winner2 = rally & self.is_winner[a2]
+        pc_turn = turn == PC
+
+        self.shot[idx] = np.where(error2 | winner2, a2, a1)
+        self.turn[idx] = np.where(rally, np.where(error2 | winner2, PC, PLAYER), turn)
+
+        scored = error1 | winner1 | error2 | winner2
+        player_scored = (error1 & pc_turn) | (winner1 & ~pc_turn) | error2
+        # Erro logo depois de um saque é falta: o primeiro saque não vale ponto
+        fault = ((error1 & ~pc_turn & self.is_serve[shot]) | (error2 & self.is_serve[a1])) & self.first_serve[idx]
+        self.first_serve[idx[fault]] = False
+
+        rewards = np.full(idx.size, env.BASE_PENALTY, dtype=np.float64)
+        point = scored & ~fault
+        if not point.any():
+            return rewards
+
+        point_idx = idx[point]
+        won = player_scored[point]
+        game_winner, set_winner = self.match.point(won, point_idx)
+        self.first_serve[point_idx] = True
+        self.turn[point_idx] = self.match.server[point_idx]
+        rewards[point] += np.where(
+            won,
+            env.POINT_WIN_REWARD
+            + env.GAME_WIN_REWARD * (game_winner == PLAYER)
+            + env.SET_WIN_REWARD * (set_winner == PLAYER),
+            env.POINT_LOSS_PENALTY
+            + env.GAME_LOSS_PENALTY * (game_winner == PC)
+            + env.SET_LOSS_PENALTY * (set_winner == PC),
+        )
+        return rewards
+
+    def _opponent_actions(self, idx: np.ndarray) -> np.ndarray:
+        """Replies of the opponent to the last shot of the envs at ``idx``, in one batch."""
+        ids = self.state_index.mirror(self.state_ids(idx))
+        masks = self.action_masks[self.shot[idx] // self.n_dirs]
+        if hasattr(self.opponent, "act_batch"):
+            actions = np.asarray(self.opponent.act_batch(self.state_index.encode(ids), masks), dtype=np.int64)
+        else:
+            actions = np.array([self._action_index(self.opponent.act(self.state_index.state_of(i))) for i in ids])
+        if not masks[np.arange(idx.size), actions].all():
+            raise ValueError("Opponent played an illegal shot.")
+        return actions
+
+    def _action_index(self, action) -> int:
+        """Index of an ``Action``, a ``(shot_type, shot_direction)`` tuple or an index."""
+        if isinstance(action, (int, np.integer)):
+            return int(action)
+        return self.env.action_index[Action(*action)]
+
+    def state_ids(self, idx: Optional[np.ndarray] = None) -> np.ndarray:
+        """Dense ``StateIndex`` ids of the selected envs (default: all)."""
+        if idx is None:
+            idx = np.arange(self.num_envs)
+        match = self.match
+        # State.encode só conhece os rótulos do game normal: placar de tiebreak vira 0
+        game = np.where(match.tiebreak[idx, None], 0, match.tables.game_points[match.game[idx]])
+        sets = match.tables.set_games[match.set[idx]]
+        game, sets = self.state_index.scores(game[:, 0], game[:, 1], sets[:, 0], sets[:, 1])
+        return self.state_index.compose(self.shot[idx], game, sets, match.server[idx] == PLAYER)
+
+    def _observe(self, idx: Optional[np.ndarray] = None) -> np.ndarray:
+        """``State.encode`` of the selected envs, stacked as float32."""
+        return self.state_index.encode(self.state_ids(idx))
@@ -0,0 +1,296 @@
+"""
+Exact game/tiebreak/set/match win-probability tables.
+
+The tables are computed by dynamic programming over the same transition tables
+``CompactTennisMatch`` uses, from the point of view of player1 (``Turn.PLAYER``),
+for a grid of point-win probabilities:
+
+- ``p_serve``: probability player1 wins a point on their own serve;
+- ``p_return``: probability player1 wins a point on the opponent's serve.
+
+As in ``TennisEnv``, the server only changes when a game (or tiebreak) ends, so
+a tiebreak is played entirely on one serve. Tables are memoized per grid and
+persisted as ``.npz`` files, so after the first build they load in milliseconds.
+"""
+import hashlib
+import pathlib
+from dataclasses import astuple, fields
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.environment.compact_engine import P1, P2, ScoreTable, engine_tables
+from app.environment.tennis_engine import STANDARD, MatchFormat
+
+CACHE_VERSION = 2
+DEFAULT_CACHE_DIR = pathlib.Path(__file__).parent.parent.parent / "data" / "cache" / "win_probability"
+
+# Desfechos de um set: (vencedor do set, sacador do próximo game)
+SET_OUTCOMES = [(winner, server) for winner in (P1, P2) for server in (P1, P2)]
+
+
+def unit_win_probability(table: ScoreTable, p: np.ndarray) -> np.ndarray:
+    """
+    Probability player1 wins a game or tiebreak from every state of ``table``.
+
+    Args:
+        table: Game or tiebreak transition table.
+        p: Array of point-win probabilities for player1, any shape.
+
+    Returns:
+        Array of shape ``p.shape + (len(table),)``.
+    """
+    p = np.asarray(p, dtype=np.float64)
+    flat = p.reshape(-1)
+    n = len(table)
+    a = np.zeros((flat.size, n, n))
+    b = np.zeros((flat.size, n))
+    for s, ((n1, won1, _), (n2, won2, _)) in enumerate(table.next):
+        if won1:
+            b[:, s] += flat
+        else:
+            a[:, s, n1] += flat
+        if not won2:
+            a[:, s, n2] += 1.0 - flat
+    eye = np.eye(n)[None]
+    v = np.linalg.solve(eye - a, b[..., None])[..., 0]
+    return v.reshape(p.shape + (n,))
+
+
+class WinProbabilityTables:
+    """
+    Win-probability tables over a (p_serve, p_return) grid.
+
+    Attributes:
+        p_serve (np.ndarray): Grid of player1 point-win probabilities on serve.
+        p_return (np.ndarray): Grid of player1 point-win probabilities on return.
+        game (np.ndarray): (S, R, server, game_state) P(player1 wins the game).
+        tiebreak (np.ndarray): (S, R, server, tiebreak_state) P(player1 wins the tiebreak).
+        set_outcomes (np.ndarray): (S, R, set_state, server, 4) probability of each
+            ``SET_OUTCOMES`` entry from the start of a game.
+        match (np.ndarray): (S, R, sets_p1, sets_p2, server) P(player1 wins the
+            match) from the start of a set.
+    """
+
+    def __init__(self, p_serve, p_return, game, tiebreak, set_outcomes, match, match_format: MatchFormat = STANDARD):
+        self.p_serve = np.asarray(p_serve, dtype=np.float64)
+        self.p_return = np.asarray(p_return, dtype=np.float64)
+        self.game = game
+        self.tiebreak = tiebreak
+        self.set_outcomes = set_outcomes
+        self.match = match
+        self.format = match_format
+        self.sets_to_win = match_format.sets_to_win
+        self.set_table = engine_tables(match_format).set
+
+    @classmethod
+    def build(
+        cls, p_serve: Sequence[float], p_return: Sequence[float], match_format: MatchFormat = STANDARD
+    ) -> "WinProbabilityTables":
+        """Compute every table for the given grid and format by dynamic programming."""
+        ps = np.asarray(p_serve, dtype=np.float64)
+        pr = np.asarray(p_return, dtype=np.float64)
+        tables = engine_tables(match_format)
+        tiebreak_sets = _tiebreak_set_states(tables.set, match_format)
+
+        rows = []
+        # Uma linha do grid por vez, para manter os sistemas lineares pequenos
+        for serve in ps:
+            # Probabilidade do player1 vencer o ponto por sacador: (1, R, 2)
+            point = np.stack(np.broadcast_arrays(np.full((1, 1), serve), pr[None, :]), axis=-1)
+            game = unit_win_probability(tables.game, point)
+            tiebreak = unit_win_probability(tables.tiebreak, point)
+            game_start = np.where(tiebreak_sets[:, None], tiebreak[..., None, :, 0], game[..., None, :, 0])
+            set_outcomes = _set_outcomes(tables.set, game_start)
+            rows.append((game, tiebreak, set_outcomes, _match_probabilities(set_outcomes, match_format.sets_to_win)))
+
+        game, tiebreak, set_outcomes, match = (np.concatenate(parts) for parts in zip(*rows))
+        return cls(ps, pr, game, tiebreak, set_outcomes, match, match_format)
+
+    def grid_index(self, p_serve: float, p_return: float) -> Tuple[int, int]:
+        """Nearest grid point to the given probabilities."""
+        return (
+            int(np.abs(self.p_serve - p_serve).argmin()),
+            int(np.abs(self.p_return - p_return).argmin()),
+        )
+
+    def probabilities(
+        self,
+        grid: Tuple[int, int],
+        game_state: int,
+        set_state: int,
+        sets: Tuple[int, int],
+        server: int,
+        tiebreak: bool = False,
+    ) -> dict:
+        """
+        P(player1 wins) the current game, set and match from a scoreboard.
+
+        Args:
+            grid: (serve, return) grid index, see ``grid_index``.
+            game_state: Game (or tiebreak) state id of ``CompactTennisMatch``.
+            set_state: Set state id of ``CompactTennisMatch``.
+            sets: Sets won by (player1, player2).
+            server: ``P1`` if player1 serves, else ``P2``.
+            tiebreak: Whether the current game is a tiebreak.
+        """
+        i, j = grid
+        unit = self.tiebreak if tiebreak else self.game
+        q = unit[i, j, server, game_state]
+        nxt = 1 - server
+
+        set_prob = 0.0
+        match_prob = 0.0
+        for winner, prob in ((P1, q), (P2, 1.0 - q)):
+            n_state, set_won, _ = self.set_table.next[set_state][winner]
+            if set_won:
+                set_prob += prob * (winner == P1)
+                match_prob += prob * self._after_set(i, j, sets, winner, nxt)
+                continue
+            outcomes = self.set_outcomes[i, j, n_state, nxt]
+            set_prob += prob * outcomes[:2].sum()
+            for k, (set_winner, set_server) in enumerate(SET_OUTCOMES):
+                match_prob += prob * outcomes[k] * self._after_set(i, j, sets, set_winner, set_server)
+
+        return {"game": float(q), "set": float(set_prob), "match": float(match_prob)}
+
+    def _after_set(self, i: int, j: int, sets: Tuple[int, int], winner: int, server: int) -> float:
+        sets_p1 = sets[0] + (winner == P1)
+        sets_p2 = sets[1] + (winner == P2)
+        if sets_p1 >= self.sets_to_win:
+            return 1.0
+        if sets_p2 >= self.sets_to_win:
+            return 0.0
+        return float(self.match[i, j, sets_p1, sets_p2, server])
+
+    def save(self, path: pathlib.Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            path,
+            p_serve=self.p_serve,
+            p_return=self.p_return,
+            game=self.game,
+            tiebreak=self.tiebreak,
+            set_outcomes=self.set_outcomes,
+            match=self.match,
+            match_format=np.array(astuple(self.format)),
+        )
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> "WinProbabilityTables":
+        with np.load(path) as data:
+            return cls(
+                data["p_serve"],
+                data["p_return"],
+                data["game"],
+                data["tiebreak"],
+                data["set_outcomes"],
+                data["match"],
+                MatchFormat(*(f.type(x) for f, x in zip(fields(MatchFormat), data["match_format"]))),
+            )
+
+
+def _tiebreak_set_states(set_table: ScoreTable, match_format: MatchFormat) -> np.ndarray:
+    """Boolean mask of set states whose next game is a tiebreak."""
+    mask = np.zeros(len(set_table), dtype=bool)
+    mask[0] = match_format.match_tiebreak
+    for row in set_table.next:
+        for n_state, won, tiebreak in row:
+            if not won and tiebreak:
+                mask[n_state] = True
+    return mask
+
+
+def _set_outcomes(set_table: ScoreTable, game_start: np.ndarray) -> np.ndarray:
+    """
+    Solve the set-level chain.
+
+    Args:
+        set_table: Set transition table of the match format.
+        game_start: (S, R, set_state, server) P(player1 wins the next game).
+    """
+    grid = game_start.shape[:2]
+    n = len(set_table)
+    size = n * 2
+    a = np.zeros(grid + (size, size))
+    b = np.zeros(grid + (size, len(SET_OUTCOMES)))
+    for s, row in enumerate(set_table.next):
+        for server in (P1, P2):
+            row_idx = s * 2 + server
+            nxt = 1 - server
+            q = game_start[..., s, server]
+            for winner, prob in ((P1, q), (P2, 1.0 - q)):
+                n_state, won, _ = row[winner]
+                if won:
+                    b[..., row_idx, SET_OUTCOMES.index((winner, nxt))] += prob
+                else:
+                    a[..., row_idx, n_state * 2 + nxt] += prob
+    v = np.linalg.solve(np.eye(size) - a, b)
+    return v.reshape(grid + (n, 2, len(SET_OUTCOMES)))
+
+
+def _match_probabilities(set_outcomes: np.ndarray, sets_to_win: int) -> np.ndarray:
+    """P(player1 wins the match) from the start of each set, by backward induction."""
+    grid = set_outcomes.shape[:2]
+    match = np.zeros(grid + (sets_to_win, sets_to_win, 2))
+    start = set_outcomes[..., 0, :, :]
+    for total in range(2 * sets_to_win - 2, -1, -1):
+        for sets_p1 in range(sets_to_win):
+            sets_p2 = total - sets_p1
+            if not 0 <= sets_p2 < sets_to_win:
+                continue
+            for server in (P1, P2):
+                prob = 0.0
+                for k, (winner, nxt) in enumerate(SET_OUTCOMES):
+                    n1 = sets_p1 + (winner == P1)
+                    n2 = sets_p2 + (winner == P2)
+                    if n1 >= sets_to_win:
+                        after = 1.0
+                    elif n2 >= sets_to_win:
+                        after = 0.0
+                    else:
+                        after = match[..., n1, n2, nxt]
+                    prob = prob + start[..., server, k] * after
+                match[..., sets_p1, sets_p2, server] = prob
+    return match
+
+
+def _cache_path(
+    p_serve: Tuple[float, ...], p_return: Tuple[float, ...], match_format: MatchFormat, cache_dir: pathlib.Path
+) -> pathlib.Path:
+    key = repr((CACHE_VERSION, p_serve, p_return, astuple(match_format))).encode()
+    return cache_dir / f"win_probability_{hashlib.sha1(key).hexdigest()[:16]}.npz"
+
+
+@lru_cache(maxsize=16)
+def _load_or_build(
+    p_serve: Tuple[float, ...], p_return: Tuple[float, ...], match_format: MatchFormat, cache_dir: str
+) -> WinProbabilityTables:
+    path = _cache_path(p_serve, p_return, match_format, pathlib.Path(cache_dir))
+    if path.exists():
+        return WinProbabilityTables.load(path)
+    tables = WinProbabilityTables.build(p_serve, p_return, match_format)
+    tables.save(path)
+    return tables
+
+
+def load_tables(
+    p_serve: Sequence[float] = tuple(np.round(np.linspace(0.0, 1.0, 101), 2)),
+    p_return: Sequence[float] = tuple(np.round(np.linspace(0.0, 1.0, 101), 2)),
+    match_format: MatchFormat = STANDARD,
+    cache_dir: Optional[pathlib.Path] = None,
+) -> WinProbabilityTables:
+    """
+    Load the tables for a probability grid and match format, building and
+    persisting them on a miss.
+
+    Results are memoized in-process per grid, and on disk under ``cache_dir``.
+    """
+    cache_dir = DEFAULT_CACHE_DIR if cache_dir is None else pathlib.Path(cache_dir)
+    return _load_or_build(
+        tuple(float(x) for x in p_serve),
+        tuple(float(x) for x in p_return),
+        match_format,
+        str(cache_dir),
+    )
@@ -1,13 +1,16 @@
+from dataclasses import dataclass
 from enum import Enum
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, NamedTuple, Union
 
 class Turn(Enum):
     PLAYER = 1
     PC = 0
 
 
-class Action(BaseModel):
+class Action(NamedTuple):
+    """Shot played, hashable and equal to the plain ``(shot_type, shot_direction)`` tuple."""
+
     shot_type: str
     shot_direction: int
 
@@ -15,7 +18,10 @@ class Action(BaseModel):
         return (types_dict[self.shot_type], directions_dict[self.shot_direction])
 
 
-class State(BaseModel):
+@dataclass(slots=True)
+class State:
+    """Observable state of a ``TennisEnv``, updated in place by the env."""
+
     last_shot_type: str
     last_shot_direction: int
     player_game_score: str
@@ -37,6 +43,9 @@ class State(BaseModel):
             self.pc_set_score,
             self.player_serves
         )
+
+    def copy(self) -> "State":
+        return State(*self.to_tuple())
     
     def encode(self, env) -> List[int]:
         """Convert state to numerical encoding with one-hot encoding for shots and directions"""
@@ -79,4 +88,34 @@ class State(BaseModel):
             [player_set_encoding, pc_set_encoding, serves_encoding]  # Length: 3
         )
         
-        return encoded_state
\ No newline at end of file
+        return encoded_state
+
+
+# Modelos pydantic só na fronteira (JSON, arquivos, entrada externa): o env usa os tipos acima
+class ActionModel(BaseModel):
+    shot_type: str
+    shot_direction: int
+
+    @classmethod
+    def from_value(cls, action: Union[Action, tuple]) -> "ActionModel":
+        return cls(shot_type=action[0], shot_direction=action[1])
+
+    def to_value(self) -> Action:
+        return Action(self.shot_type, self.shot_direction)
+
+
+class StateModel(BaseModel):
+    last_shot_type: str
+    last_shot_direction: int
+    player_game_score: str
+    player_set_score: int
+    pc_game_score: str
+    pc_set_score: int
+    player_serves: bool
+
+    @classmethod
+    def from_value(cls, state: State) -> "StateModel":
+        return cls(**dict(zip(cls.model_fields, state.to_tuple())))
+
+    def to_value(self) -> State:
+        return State(*(getattr(self, name) for name in type(self).model_fields))
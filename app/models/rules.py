@@ -0,0 +1,46 @@
+"""
+Shot transition rules shared by the data pipeline and the environment.
+
+A point starts with a serve and ends with an error or a winner, so:
+
+- after an error or a winner the next shot must be a serve;
+- a serve can only come after an error or a winner.
+
+Both rules reduce to ``is_terminal(last) == is_serve(next)``. They are
+compiled once into ``LEGAL_TRANSITIONS``, a boolean (last_shot, next_shot)
+table over ``SHOT_TYPES``, and into per-shot masks over the 54 player actions.
+"""
+from typing import List
+
+import numpy as np
+
+SERVE = "serve"
+TERMINAL_SHOTS = frozenset({"@", "#", "winner"})
+
+# Mesma ordem de TennisEnv.last_shot_space: golpes do jogador primeiro, depois erros/winner
+STROKE_TYPES: List[str] = ["serve", "b", "f", "r", "i", "m", "o", "s", "v", "p", "z", "u", "h", "l", "j", "y", "t", "k"]
+SHOT_TYPES: List[str] = STROKE_TYPES + ["@", "#", "winner"]
+DIRECTIONS: List[int] = [1, 2, 3]
+
+
+def is_legal_transition(last_shot_type: str, shot_type: str) -> bool:
+    """Whether ``shot_type`` may follow ``last_shot_type``."""
+    return (last_shot_type in TERMINAL_SHOTS) == (shot_type == SERVE)
+
+
+LEGAL_TRANSITIONS = np.array(
+    [[is_legal_transition(last, nxt) for nxt in SHOT_TYPES] for last in SHOT_TYPES], dtype=bool
+)
+
+
+def action_mask_table(stroke_types: List[str] = STROKE_TYPES, n_directions: int = len(DIRECTIONS)) -> np.ndarray:
+    """
+    (len(SHOT_TYPES), len(stroke_types) * n_directions) boolean table: row ``i``
+    is the mask of legal player actions after a shot of type ``SHOT_TYPES[i]``,
+    with actions ordered as ``TennisEnv.action_space``.
+    """
+    columns = [SHOT_TYPES.index(t) for t in stroke_types]
+    return np.repeat(LEGAL_TRANSITIONS[:, columns], n_directions, axis=1)
+
+
+ACTION_MASKS = action_mask_table()
@@ -0,0 +1,553 @@
+"""
+Exact value iteration over the tennis MDP defined by a transition graph.
+
+A ``TennisEnv`` step starts when the player is to play and ends when the
+player is to play again, so the Markov state at a decision is
+
+- the scoreboard (game state, set state, tiebreak flag, sets won, server),
+- the first serve flag,
+- the last shot, which only matters through the legal-action mask of its
+  type (after an error/winner only serves are legal, otherwise only strokes).
+
+Everything between two decisions is the absorbing chain of ``MacroTransitions``:
+the outcome of the step after action ``a`` is drawn from the absorption row
+of the round-start state (PLAYER, ``a``, first serve), which does not depend
+on the score. Points served by the PC right after a point are chained inside
+the same step (no discounting), from the round-start state (PC, last shot,
+True). The first step of a match the PC serves first also starts on the PC
+side, from (PC, action, True), so its action values are ``chain[score, action]``.
+
+``TennisMDP`` enumerates the reachable scoreboards once, keeps the outcome
+distributions as dense (round-start state, outcome) matrices, and every
+value-iteration sweep is a handful of gathers and two matrix products.
+Illegal actions are part of the MDP (penalty, state unchanged), so the
+optimal policy can only pick one if every legal action is worse.
+
+``TennisMDP.evaluate`` computes the exact expected return, match-win
+probability and expected match length of any fixed policy (an agent, a
+callable on observations or a policy table). A fixed policy sees the
+observation, not the mask class, so its decisions are keyed by the last shot.
+The scoreboards only move forward, apart from deuce/advantage and folded
+tiebreak cycles, so the linear system of the induced Markov chain is block
+triangular: each strongly connected set of scoreboards is one small dense
+block, solved after every block it leads to.
+"""
+from typing import Callable, Dict, NamedTuple, Tuple, Union
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from app.environment.batch_engine import NO_WINNER, BatchTennisMatch, score_ids
+from app.environment.compact_engine import engine_tables
+from app.environment.macro import CONTROL, POINT, MacroTransitions
+from app.models.env import Turn
+
+PLAYER = Turn.PLAYER.value
+PC = Turn.PC.value
+
+# Colunas de TennisMDP.scores
+SCORE_FIELDS = ("game", "set", "tiebreak", "sets_p1", "sets_p2", "server")
+
+
+class MDPSolution(NamedTuple):
+    """
+    Optimal values and policy of a ``TennisMDP``.
+
+    Attributes:
+        q (np.ndarray): (scores, first serve, actions) action values at a decision.
+        values (np.ndarray): (scores, first serve, mask classes) optimal state values.
+        policy (np.ndarray): (scores, first serve, mask classes) optimal action index.
+        chain (np.ndarray): (scores, keys) value of the PC serving the next point
+            of a step after a point ended on shot ``key``.
+        iterations (int): Value-iteration sweeps run.
+        residual (float): Largest value change of the last sweep.
+    """
+
+    q: np.ndarray
+    values: np.ndarray
+    policy: np.ndarray
+    chain: np.ndarray
+    iterations: int
+    residual: float
+
+
+class PolicyEvaluation(NamedTuple):
+    """
+    Exact evaluation of a fixed policy of a ``TennisMDP``.
+
+    Decisions are (scoreboard, first serve, last shot key). An illegal action
+    leaves the state unchanged, so from a decision that reaches one the match
+    never ends: its win probability is 0 and its expected steps are infinite.
+
+    Attributes:
+        actions (np.ndarray): (scores, first serve, keys) action index taken at each decision.
+        values (np.ndarray): (scores, first serve, keys) expected discounted return.
+        win_probability (np.ndarray): (scores, first serve, keys) probability that the player wins the match.
+        steps (np.ndarray): (scores, first serve, keys) expected number of steps until the match ends.
+        expected_return (float): Expected discounted return of a match.
+        win_rate (float): Probability that the player wins a match.
+        expected_steps (float): Expected number of steps of a match.
+    """
+
+    actions: np.ndarray
+    values: np.ndarray
+    win_probability: np.ndarray
+    steps: np.ndarray
+    expected_return: float
+    win_rate: float
+    expected_steps: float
+
+
+class TennisMDP:
+    """
+    Finite MDP of a ``TennisEnv`` (its graph, rewards, format and initial server).
+
+    Attributes:
+        scores (np.ndarray): (scores, 6) reachable scoreboards, columns ``SCORE_FIELDS``
+            (``game`` is the stacked game/tiebreak id of ``BatchTables``).
+        score_index (dict): Scoreboard tuple -> row of ``scores``.
+        initial_score (int): Row of the scoreboard at the start of a match.
+        next_score (np.ndarray): (scores, 2) scoreboard after a point won by
+            ``Turn`` value ``j``, ``-1`` when the point ends the match.
+        point_reward (np.ndarray): (scores, 2) point/game/set reward of that point.
+        key_class (np.ndarray): Mask class of each shot key.
+        class_masks (np.ndarray): (mask classes, actions) legal actions of each class.
+    """
+
+    def __init__(self, env, gamma: float = 0.95):
+        if not 0.0 < gamma <= 1.0:
+            raise ValueError(f"gamma must be in (0, 1], got {gamma}.")
+        self.env = env
+        self.gamma = gamma
+        self.match_format = env.match_format
+        self.macro = env.macro if env.macro is not None else MacroTransitions(env)
+        self.n_actions = len(env.action_space)
+        self.n_keys = self.macro.n_keys
+        n_dirs = len(env.direction_space)
+
+        # Classes de máscara: tipos de golpe com as mesmas ações legais
+        self.class_masks, type_class = np.unique(env.action_masks, axis=0, return_inverse=True)
+        self.key_class = np.repeat(type_class.ravel(), n_dirs)
+        self.n_classes = len(self.class_masks)
+
+        self._enumerate_scores(env)
+        self._build_outcomes(env)
+
+    def _enumerate_scores(self, env):
+        """Breadth-first search of the scoreboards reachable from the start of a match."""
+        match = BatchTennisMatch(1, server=env.initial_server, match_format=self.match_format)
+        start = (int(match.game[0]), int(match.set[0]), bool(match.tiebreak[0]), 0, 0, int(match.server[0]))
+        self.score_index: Dict[tuple, int] = {start: 0}
+        scores = [start]
+        next_score = []
+        point_reward = []
+        frontier = [start]
+        while frontier:
+            states = np.array(frontier, dtype=np.int64)
+            n = len(states)
+            # Cada placar da fronteira joga um ponto ganho por cada lado
+            batch = BatchTennisMatch(2 * n, server=env.initial_server, match_format=self.match_format)
+            both = np.concatenate([states, states])
+            batch.game[:] = both[:, 0]
+            batch.set[:] = both[:, 1]
+            batch.tiebreak[:] = both[:, 2].astype(bool)
+            batch.sets_won[:] = both[:, 3:5]
+            batch.server[:] = both[:, 5]
+            player_won = np.repeat([True, False], n)
+            game_winner, set_winner = batch.point(player_won)
+            reward = np.where(
+                player_won,
+                env.POINT_WIN_REWARD
+                + env.GAME_WIN_REWARD * (game_winner == PLAYER)
+                + env.SET_WIN_REWARD * (set_winner == PLAYER),
+                env.POINT_LOSS_PENALTY
+                + env.GAME_LOSS_PENALTY * (game_winner == PC)
+                + env.SET_LOSS_PENALTY * (set_winner == PC),
+            )
+
+            frontier = []
+            nxt = np.full(2 * n, -1, dtype=np.int64)
+            for i in np.flatnonzero(batch.winner == NO_WINNER):
+                state = (
+                    int(batch.game[i]), int(batch.set[i]), bool(batch.tiebreak[i]),
+                    int(batch.sets_won[i, 0]), int(batch.sets_won[i, 1]), int(batch.server[i]),
+                )
+                if state not in self.score_index:
+                    self.score_index[state] = len(scores)
+                    scores.append(state)
+                    frontier.append(state)
+                nxt[i] = self.score_index[state]
+            # Colunas indexadas pelo valor de Turn de quem pontuou
+            next_score.append(np.stack([nxt[n:], nxt[:n]], axis=1))
+            point_reward.append(np.stack([reward[n:], reward[:n]], axis=1))
+
+        self.scores = np.array(scores, dtype=np.int64)
+        self.initial_score = 0
+        self.next_score = np.concatenate(next_score)
+        self.point_reward = np.concatenate(point_reward).astype(np.float64)
+
+    def _build_outcomes(self, env):
+        """Absorption rows of the decisions and of the PC-served points, over the outcomes reachable."""
+        macro = self.macro
+        player_rows = [
+            macro.transient_index(Turn.PLAYER, a, fs) for fs in (False, True) for a in range(self.n_actions)
+        ]
+        pc_rows = [macro.transient_index(Turn.PC, key, True) for key in range(self.n_keys)]
+        player = macro.absorption[player_rows]
+        pc = macro.absorption[pc_rows]
+        used = np.flatnonzero((player > 0).any(axis=0) | (pc > 0).any(axis=0))
+        self.player_absorption = player[:, used]
+        self.pc_absorption = pc[:, used]
+
+        kind = np.array(macro.kind)[used]
+        key = np.array(macro.key)[used]
+        round_first_serve = np.array(macro.round_first_serve)[used]
+        # Recompensa BASE_PENALTY por rodada: 2 rodadas só quando o primeiro saque vira falta
+        fs_rows = np.repeat([False, True], self.n_actions)
+        player_rounds = np.where(fs_rows[:, None] & ~round_first_serve[None, :], 2, 1)
+        pc_rounds = np.where(~round_first_serve, 2, 1)
+        self.player_base = env.BASE_PENALTY * (self.player_absorption * player_rounds).sum(axis=1)
+        self.pc_base = env.BASE_PENALTY * (self.pc_absorption * pc_rounds[None, :]).sum(axis=1)
+        self.illegal_penalty = env.ILLEGAL_ACTION_PENALTY
+
+        self._control = np.flatnonzero(kind == CONTROL)
+        self._control_key = key[self._control]
+        self._control_class = self.key_class[self._control_key]
+        self._control_first_serve = np.array(macro.first_serve)[used][self._control].astype(np.int64)
+        self._point = np.flatnonzero(kind == POINT)
+        scorer = np.array(macro.scorer)[used][self._point]
+        self._point_scorer = scorer
+        self._point_key = key[self._point]
+        self._point_class = self.key_class[self._point_key]
+        # (scores, outcomes de ponto): placar seguinte (n_scores = fim de partida) e recompensa
+        n_scores = len(self.scores)
+        nxt = self.next_score[:, scorer]
+        self._point_next = np.where(nxt < 0, n_scores, nxt)
+        self._point_reward = self.point_reward[:, scorer]
+        servers = np.append(self.scores[:, 5], -1)
+        self._point_player_serves = servers[self._point_next] == PLAYER
+        # Desfechos DEAD (golpe sem transições) ficam com valor 0: o env levanta erro ali
+        self.n_outcomes = len(used)
+
+    def continuation(self, values: np.ndarray, chain: np.ndarray) -> np.ndarray:
+        """
+        (scores, outcomes) value of reaching each outcome from each scoreboard:
+        rewards of the point plus the value of what follows it.
+        """
+        n_scores = len(self.scores)
+        gamma = self.gamma
+        out = np.zeros((n_scores, self.n_outcomes))
+        out[:, self._control] = gamma * values[:, self._control_first_serve, self._control_class]
+        # Placar "fim de partida" (índice n_scores) vale 0
+        values_end = np.concatenate([values[:, 1, :], np.zeros((1, self.n_classes))])
+        chain_end = np.concatenate([chain, np.zeros((1, self.n_keys))])
+        nxt = self._point_next
+        out[:, self._point] = self._point_reward + np.where(
+            self._point_player_serves,
+            gamma * values_end[nxt, self._point_class[None, :]],
+            chain_end[nxt, self._point_key[None, :]],
+        )
+        return out
+
+    def backup(self, values: np.ndarray, chain: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """One Bellman backup: (q, chain) from the current (values, chain)."""
+        cont = self.continuation(values, chain)
+        q = (cont @ self.player_absorption.T + self.player_base).reshape(len(self.scores), 2, self.n_actions)
+        chain = cont @ self.pc_absorption.T + self.pc_base
+        return q, chain
+
+    def greedy(self, q: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(values, policy) per mask class: best legal action, or an illegal one if it is better."""
+        masked = np.where(self.class_masks[None, None, :, :], q[:, :, None, :], -np.inf)
+        policy = masked.argmax(axis=3)
+        best = np.take_along_axis(masked, policy[..., None], axis=3)[..., 0]
+        # Ação ilegal: penalidade e mesmo estado, só compensa se tudo o mais for pior
+        illegal = self.illegal_penalty + self.gamma * values
+        use_illegal = illegal > best
+        if use_illegal.any():
+            first_illegal = (~self.class_masks).argmax(axis=1)
+            policy = np.where(use_illegal, first_illegal[None, None, :], policy)
+        return np.maximum(best, illegal), policy
+
+    def value_iteration(self, tol: float = 1e-6, max_iterations: int = 100_000) -> MDPSolution:
+        """Iterate Bellman backups until no value moves by more than ``tol``."""
+        n_scores = len(self.scores)
+        values = np.zeros((n_scores, 2, self.n_classes))
+        chain = np.zeros((n_scores, self.n_keys))
+        residual = np.inf
+        iterations = 0
+        while residual > tol and iterations < max_iterations:
+            q, new_chain = self.backup(values, chain)
+            new_values, policy = self.greedy(q, values)
+            residual = max(np.abs(new_values - values).max(), np.abs(new_chain - chain).max())
+            values, chain = new_values, new_chain
+            iterations += 1
+        q, chain = self.backup(values, chain)
+        values, policy = self.greedy(q, values)
+        return MDPSolution(q, values, policy, chain, iterations, float(residual))
+
+    def score_id(self, match, server: Turn) -> int:
+        """Row of ``scores`` of a ``TennisMatch``/``CompactTennisMatch`` with ``server`` to serve."""
+        score = match.score()
+        game, _, set_, tiebreak = score_ids(score, self.match_format)
+        return self.score_index[(game, set_, tiebreak, score[4], score[5], server.value)]
+
+    def decision(self, env) -> Tuple[int, int, int]:
+        """(score row, first serve, mask class) of the decision ``env`` is at."""
+        key = env.compiled_graph.keys[(env.state.last_shot_type, env.state.last_shot_direction)]
+        return self.score_id(env.match, env.server), int(env.first_serve), int(self.key_class[key])
+
+    def action(self, solution: MDPSolution, env) -> int:
+        """Optimal action index at the decision ``env`` is at."""
+        score, first_serve, mask_class = self.decision(env)
+        if env.turn == Turn.PC:
+            # Primeiro passo de uma partida em que o PC saca: a rodada parte de (PC, ação, primeiro saque)
+            q = np.where(self.class_masks[mask_class], solution.chain[score, : self.n_actions], -np.inf)
+            return int(q.argmax())
+        return int(solution.policy[score, first_serve, mask_class])
+
+    def observation_ids(self) -> np.ndarray:
+        """(scores, keys) ``StateIndex`` id observed at each decision (the first serve flag is not observed)."""
+        index = self.env.state_index
+        tables = engine_tables(self.match_format)
+        tiebreak = self.scores[:, 2].astype(bool)
+        # Placar de tiebreak é numérico: State.encode o codifica como 0-0 (estado 0 da tabela de game)
+        game_codes = np.array(tables.game.states)[np.where(tiebreak, 0, self.scores[:, 0])]
+        set_games = np.array(tables.set.states)[self.scores[:, 1]]
+        game, set_ = index.scores(game_codes[:, 0], game_codes[:, 1], set_games[:, 0], set_games[:, 1])
+        player_serves = self.scores[:, 5] == PLAYER
+        return index.compose(np.arange(self.n_keys)[None, :], game[:, None], set_[:, None], player_serves[:, None])
+
+    def policy_actions(self, policy: Union[MDPSolution, np.ndarray, Callable]) -> np.ndarray:
+        """
+        (scores, first serve, keys) action index of ``policy`` at every decision.
+
+        ``policy`` is an ``MDPSolution``, a (scores, first serve, mask classes)
+        or (scores, first serve, keys) action table, an agent with
+        ``act_batch(observations, masks)`` (queried greedily, ``epsilon`` set
+        to 0) or a callable with the same signature.
+        """
+        n_scores = len(self.scores)
+        if isinstance(policy, MDPSolution):
+            policy = policy.policy
+        if isinstance(policy, np.ndarray):
+            if policy.shape == (n_scores, 2, self.n_classes):
+                return policy[:, :, self.key_class]
+            if policy.shape == (n_scores, 2, self.n_keys):
+                return policy
+            raise ValueError(f"Policy table of shape {policy.shape} does not match this MDP.")
+
+        index = self.env.state_index
+        ids, inverse = np.unique(self.observation_ids(), return_inverse=True)
+        observations = index.encode(ids)
+        masks = self.env.action_masks[index.keys(ids) // index.n_directions]
+        if hasattr(policy, "act_batch"):
+            epsilon = policy.epsilon
+            policy.epsilon = 0
+            try:
+                chosen = policy.act_batch(observations, masks)
+            finally:
+                policy.epsilon = epsilon
+        elif callable(policy):
+            chosen = policy(observations, masks)
+        else:
+            raise TypeError(f"Cannot evaluate a policy of type {type(policy).__name__}.")
+        actions = np.asarray(chosen, dtype=np.int64)[inverse.ravel()].reshape(n_scores, self.n_keys)
+        return np.repeat(actions[:, None, :], 2, axis=1)
+
+    def _build_evaluation(self):
+        """
+        Policy-independent part of the chain of a fixed policy: the unknown
+        each outcome leads to and the order in which the blocks are solved.
+        """
+        n_scores = len(self.scores)
+        n_keys = self.n_keys
+        # Incógnitas por placar: valor da decisão (primeiro saque, key) e da cadeia do PC (key)
+        width = 3 * n_keys
+        target = np.full((n_scores, self.n_outcomes), -1, dtype=np.int64)
+        row = np.zeros((n_scores, self.n_outcomes), dtype=np.int64)
+        self._target_is_value = np.zeros((n_scores, self.n_outcomes), dtype=bool)
+        target[:, self._control] = np.arange(n_scores)[:, None]
+        row[:, self._control] = self._control_first_serve * n_keys + self._control_key
+        self._target_is_value[:, self._control] = True
+        nxt = self._point_next
+        target[:, self._point] = np.where(nxt < n_scores, nxt, -1)
+        row[:, self._point] = np.where(self._point_player_serves, n_keys, 2 * n_keys) + self._point_key
+        self._target_is_value[:, self._point] = self._point_player_serves
+        # Fim de partida e desfechos DEAD apontam para a incógnita extra, sempre 0
+        self._target = np.where(target >= 0, target * width + row, n_scores * width)
+
+        self._outcome_reward = np.zeros((n_scores, self.n_outcomes))
+        self._outcome_reward[:, self._point] = self._point_reward
+        self._outcome_win = np.zeros((n_scores, self.n_outcomes))
+        self._outcome_win[:, self._point] = (nxt == n_scores) & (self._point_scorer == PLAYER)
+
+        # Componentes fortemente conexas dos placares (deuce/vantagem, tiebreak dobrado)
+        src, col = np.nonzero(self.next_score >= 0)
+        dst = self.next_score[src, col]
+        graph = sparse.csr_matrix((np.ones(len(src)), (src, dst)), shape=(n_scores, n_scores))
+        n_components, component = connected_components(graph, directed=True, connection="strong")
+        between = component[src] != component[dst]
+        src_component, dst_component = component[src][between], component[dst][between]
+        # Nível: 0 sem sucessores, senão 1 + maior nível de um sucessor (blocos resolvidos por nível)
+        level = np.zeros(n_components, dtype=np.int64)
+        while True:
+            new_level = np.zeros_like(level)
+            np.maximum.at(new_level, src_component, level[dst_component] + 1)
+            if np.array_equal(new_level, level):
+                break
+            level = new_level
+
+        order = np.argsort(component, kind="stable")
+        sizes = np.bincount(component)
+        starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        position = np.empty(n_scores, dtype=np.int64)
+        position[order] = np.arange(n_scores) - starts[component[order]]
+        # Só as incógnitas que algum desfecho alcança entram nos blocos; as demais saem delas depois
+        self._cells = np.unique(row[target >= 0])
+        cell = np.full(width, -1, dtype=np.int64)
+        cell[self._cells] = np.arange(len(self._cells))
+        # Coluna no bloco do placar de origem, -1 se o alvo está em outro bloco
+        inside = (target >= 0) & (component[np.maximum(target, 0)] == component[:, None])
+        self._block_column = np.where(inside, position[np.maximum(target, 0)] * len(self._cells) + cell[row], -1)
+
+        # Grupos de componentes do mesmo nível e tamanho: (componentes, tamanho) placares
+        self._groups = []
+        for depth in range(level.max() + 1):
+            components = np.flatnonzero(level == depth)
+            for size in np.unique(sizes[components]):
+                chosen = components[sizes[components] == size]
+                self._groups.append(order[starts[chosen][:, None] + np.arange(size)])
+
+    def _solve_chain(
+        self,
+        actions: np.ndarray,
+        legal: np.ndarray,
+        gamma: float,
+        decision_cost: np.ndarray,
+        chain_cost: np.ndarray,
+        outcome_reward: np.ndarray,
+        illegal_value: float,
+    ) -> np.ndarray:
+        """
+        Solve x = cost + P (outcome reward + scale x) for the chain of a fixed
+        policy, one batch of blocks at a time, each after the blocks it leads
+        to. A block only couples the unknowns its outcomes reach (``_cells``),
+        the others follow by substitution. Returns the (scores, 3, keys) solution: values at a decision (first
+        serve 0 and 1) and of the PC-served chain. Illegal decisions are fixed
+        to ``illegal_value``.
+        """
+        n_scores = len(self.scores)
+        n_keys = self.n_keys
+        width = 3 * n_keys
+        # Linha de absorção de cada incógnita; decisões ilegais usam a linha nula (última)
+        absorption = np.vstack([self.player_absorption, self.pc_absorption, np.zeros((1, self.n_outcomes))])
+        costs = np.concatenate([decision_cost, chain_cost, [0.0]])
+        rows = np.empty((n_scores, width), dtype=np.int64)
+        decision_rows = np.arange(2)[None, :, None] * self.n_actions + actions
+        rows[:, : 2 * n_keys] = np.where(legal, decision_rows, len(absorption) - 1).reshape(n_scores, -1)
+        rows[:, 2 * n_keys :] = 2 * self.n_actions + np.arange(n_keys)
+        illegal = np.zeros((n_scores, width), dtype=bool)
+        illegal[:, : 2 * n_keys] = ~legal.reshape(n_scores, -1)
+        scale = np.where(self._target_is_value, gamma, 1.0)
+
+        cells = self._cells
+        n_cells = len(cells)
+        x = np.zeros(n_scores * width + 1)
+        for members in self._groups:
+            n_blocks, size = members.shape
+            block = size * n_cells
+            flat = members.ravel()
+            probs = absorption[rows[flat]]
+            cost = costs[rows[flat]]
+            # Parte conhecida: blocos já resolvidos (as incógnitas do próprio bloco ainda valem 0)
+            known = outcome_reward[flat] + scale[flat] * x[self._target[flat]]
+
+            cell_probs = probs[:, cells]
+            b = cost[:, cells] + (cell_probs @ known[:, :, None])[:, :, 0]
+            b = np.where(illegal[flat][:, cells], illegal_value, b)
+            source, outcome = np.nonzero(self._block_column[flat] >= 0)
+            column = self._block_column[flat[source], outcome]
+            coefficients = cell_probs[source, :, outcome] * scale[flat[source], outcome][:, None]
+            first_row = (source // size) * block + (source % size) * n_cells
+            entries = (first_row[:, None] + np.arange(n_cells)) * block + column[:, None]
+            a = np.eye(block) - np.bincount(
+                entries.ravel(), coefficients.ravel(), minlength=n_blocks * block * block
+            ).reshape(n_blocks, block, block)
+            solved = np.linalg.solve(a, b.reshape(n_blocks, block, 1)).ravel()
+
+            # Demais incógnitas do bloco: uma substituição com as células resolvidas
+            known[source, outcome] += scale[flat[source], outcome] * solved[(source // size) * block + column]
+            values = np.where(illegal[flat], illegal_value, cost + (probs @ known[:, :, None])[:, :, 0])
+            x[(flat[:, None] * width + np.arange(width)).ravel()] = values.ravel()
+        return x[:-1].reshape(n_scores, 3, n_keys)
+
+    def evaluate(self, policy: Union[MDPSolution, np.ndarray, Callable]) -> PolicyEvaluation:
+        """
+        Exact expected return, win probability and length of the matches
+        played by ``policy`` (see ``policy_actions``), from the linear system
+        of the Markov chain it induces instead of sampled episodes.
+        """
+        if not hasattr(self, "_groups"):
+            self._build_evaluation()
+        actions = self.policy_actions(policy)
+        legal = self.class_masks[self.key_class][np.arange(self.n_keys), actions]
+        n_decision_rows = 2 * self.n_actions
+        no_cost = np.zeros(n_decision_rows)
+        no_chain_cost = np.zeros(self.n_keys)
+        no_reward = np.zeros_like(self._outcome_reward)
+
+        loop_return = self.illegal_penalty / (1.0 - self.gamma) if self.gamma < 1.0 else 0.0
+        returns = self._solve_chain(
+            actions, legal, self.gamma, self.player_base, self.pc_base, self._outcome_reward, loop_return
+        )
+        wins = self._solve_chain(actions, legal, 1.0, no_cost, no_chain_cost, self._outcome_win, 0.0)
+        steps = self._solve_chain(actions, legal, 1.0, np.ones(n_decision_rows), no_chain_cost, no_reward, 0.0)
+        if not legal.all():
+            # Ação ilegal repete o mesmo estado para sempre: a partida não termina de onde ela é alcançável
+            stuck = self._solve_chain(actions, legal, 1.0, no_cost, no_chain_cost, no_reward, 1.0) > 1e-12
+            steps[stuck] = np.inf
+            if self.gamma == 1.0 and self.illegal_penalty:
+                returns[stuck] = np.copysign(np.inf, self.illegal_penalty)
+
+        # Início da partida: decisão (placar inicial, primeiro saque, golpe inicial)
+        score = self.initial_score
+        key = self.env.compiled_graph.keys[(self.env.initial_shot_type, self.env.initial_shot_direction)]
+        action = actions[score, 1, key]
+        if self.env.initial_turn == Turn.PC and legal[score, 1, key]:
+            # O PC saca o primeiro ponto: a rodada parte de (PC, ação, primeiro saque)
+            start = returns[score, 2, action], wins[score, 2, action], 1.0 + steps[score, 2, action]
+        else:
+            start = returns[score, 1, key], wins[score, 1, key], steps[score, 1, key]
+        return PolicyEvaluation(
+            actions, returns[:, :2], wins[:, :2], steps[:, :2], float(start[0]), float(start[1]), float(start[2])
+        )
+
+
+def save_solution(mdp: TennisMDP, solution: MDPSolution, path: str):
+    """Write the scoreboards, policy and value tables of ``solution`` to a ``.npz`` file."""
+    np.savez_compressed(
+        path,
+        scores=mdp.scores,
+        score_fields=np.array(SCORE_FIELDS),
+        class_masks=mdp.class_masks,
+        key_class=mdp.key_class,
+        q=solution.q,
+        values=solution.values,
+        policy=solution.policy,
+        chain=solution.chain,
+        gamma=mdp.gamma,
+    )
+
+
+def solve(env, gamma: float = 0.95, tol: float = 1e-6) -> Tuple[TennisMDP, MDPSolution]:
+    """Build the MDP of ``env`` and solve it by value iteration."""
+    mdp = TennisMDP(env, gamma)
+    return mdp, mdp.value_iteration(tol)
+
+
+def evaluate_policy(env, policy, gamma: float = 0.95) -> Tuple[TennisMDP, PolicyEvaluation]:
+    """Build the MDP of ``env`` and evaluate ``policy`` on it exactly."""
+    mdp = TennisMDP(env, gamma)
+    return mdp, mdp.evaluate(policy)
@@ -6,7 +6,10 @@ import json
 import mlflow
 import mlflow.pytorch
 from app.environment.tennis_env import TennisEnv, Action, Turn
+from app.environment.tennis_engine import MatchFormat
+from app.environment.vector_env import VectorTennisEnv
 from app.agents.dqn_agent import DQNAgent
+from app.training.mdp import TennisMDP
 
 
 class Trainer:
@@ -27,6 +30,8 @@ class Trainer:
             'loss_values': [],
             'q_values': []
         }
+        # MDP sem desconto da avaliação exata, refeito quando o formato de partida muda
+        self._eval_mdp: Optional[TennisMDP] = None
         
         # MLflow setup
         mlflow.set_tracking_uri(mlflow_tracking_uri)
@@ -38,9 +43,21 @@ class Trainer:
         save_freq: int = 100,
         eval_freq: int = 200,
         run_name: Optional[str] = None,
-        tags: Optional[Dict[str, str]] = None
+        tags: Optional[Dict[str, str]] = None,
+        format_schedule: Optional[Dict[int, MatchFormat]] = None,
+        exact_eval: bool = False
     ):
-        """Train the agent for specified number of episodes with MLflow logging"""
+        """
+        Train the agent for specified number of episodes with MLflow logging
+
+        Args:
+            format_schedule: Optional curriculum mapping the first episode of
+                each stage to the match format played from then on, e.g.
+                ``{0: MATCH_TIEBREAK, 500: SHORT_SET, 1500: STANDARD}``.
+            exact_eval: Evaluate the greedy policy exactly (``evaluate(exact=True)``)
+                instead of playing evaluation episodes; its metrics are logged
+                under their own ``exact_*`` names.
+        """
         
         with mlflow.start_run(run_name=run_name, tags=tags):
             # Log hyperparameters
@@ -48,10 +65,14 @@ class Trainer:
             
             # Log environment info
             self._log_environment_info()
+            mlflow.log_param("exact_eval", exact_eval)
             
             best_avg_reward = float('-inf')
             
             for episode in range(episodes):
+                if format_schedule and episode in format_schedule:
+                    self.env.set_match_format(format_schedule[episode])
+                    mlflow.log_param(f"match_format_from_{episode}", format_schedule[episode])
                 state = self.env.reset()
                 total_reward = 0
                 steps = 0
@@ -66,7 +87,7 @@ class Trainer:
                     if hasattr(self.agent, 'q_network'):
                         import torch
                         with torch.no_grad():
-                            state_tensor = torch.FloatTensor(state.encode(self.env)).unsqueeze(0).to(self.agent.device)
+                            state_tensor = torch.as_tensor(self.env.state_index.encode([self.env.state_id(state)]), device=self.agent.device)
                             q_vals = self.agent.q_network(state_tensor)
                             max_q_value = torch.max(q_vals).item()
                             episode_q_values.append(max_q_value)
@@ -76,7 +97,9 @@ class Trainer:
                     
                     # Store experience
                     action_idx = self._action_to_idx(action)
-                    self.agent.remember(state, action_idx, reward, next_state, done)
+                    # Episódio truncado pelo orçamento de passos não é terminal para o alvo do Q
+                    terminal = done and not info.get("TimeLimit.truncated", False)
+                    self.agent.remember(state, action_idx, reward, next_state, terminal)
                     
                     # Train the agent and capture loss
                     if len(self.agent.memory) > self.agent.batch_size:
@@ -139,7 +162,7 @@ class Trainer:
                 
                 # Periodic evaluation
                 if episode % eval_freq == 0 and episode > 0:
-                    eval_results = self.evaluate(episodes=50)
+                    eval_results = self.evaluate(episodes=50, exact=exact_eval)
                     self._log_evaluation_results(eval_results, episode)
                 
                 # Save model checkpoint
@@ -149,7 +172,7 @@ class Trainer:
                     mlflow.log_artifact(checkpoint_path, "checkpoints")
             
             # Final evaluation
-            final_eval_results = self.evaluate(episodes=100)
+            final_eval_results = self.evaluate(episodes=100, exact=exact_eval)
             self._log_evaluation_results(final_eval_results, episodes, prefix="final_")
             
             # Save final training plots
@@ -172,6 +195,85 @@ class Trainer:
                 registered_model_name="tennis-dqn-model"
             )
     
+    def train_vectorized(
+        self,
+        vec_env: VectorTennisEnv,
+        total_steps: int = 1_000_000,
+        updates_per_step: int = 1,
+        log_freq: int = 100,
+        run_name: Optional[str] = None,
+        tags: Optional[Dict[str, str]] = None,
+        self_play_freq: Optional[int] = None
+    ):
+        """
+        Train the agent on ``vec_env.num_envs`` matches at once.
+
+        Every step picks the actions of all matches in a single forward pass
+        (``agent.act_batch``) and stores one transition per match as dense
+        ``StateIndex`` ids. ``total_steps`` counts transitions across all matches.
+
+        Args:
+            self_play_freq: Play against a frozen copy of the agent
+                (``vec_env.set_opponent(agent.frozen())``), refreshed every
+                ``self_play_freq`` steps; ``None`` keeps the env's opponent.
+        """
+        with mlflow.start_run(run_name=run_name, tags=tags):
+            self._log_hyperparameters(0, 0, 0)
+            self._log_environment_info()
+            mlflow.log_param("num_envs", vec_env.num_envs)
+            mlflow.log_param("updates_per_step", updates_per_step)
+            mlflow.log_param("self_play_freq", self_play_freq)
+
+            observations = vec_env.reset()
+            masks = vec_env.action_mask()
+            episode = 0
+            steps = 0
+            next_snapshot = 0
+            while steps < total_steps:
+                if self_play_freq and steps >= next_snapshot:
+                    # Oponente congelado: alvo fixo entre atualizações do snapshot
+                    vec_env.set_opponent(self.agent.frozen())
+                    next_snapshot = steps + self_play_freq
+                actions = self.agent.act_batch(observations, masks)
+                next_observations, rewards, dones, info = vec_env.step(actions)
+                masks = info["action_mask"]
+
+                # Partidas terminadas já foram resetadas: a transição usa a observação final
+                final_observations = next_observations
+                if dones.any():
+                    final_observations = np.where(dones[:, None], info["final_observation"], next_observations)
+                terminals = dones & ~info["truncated"]
+                # Ids de estado do lote inteiro de uma vez: o replay guarda ints
+                state_ids = self.agent.state_index.ids_from_encodings(observations)
+                final_ids = self.agent.state_index.ids_from_encodings(final_observations)
+                for i in range(vec_env.num_envs):
+                    self.agent.remember(int(state_ids[i]), int(actions[i]), float(rewards[i]), int(final_ids[i]), bool(terminals[i]))
+                steps += vec_env.num_envs
+
+                if len(self.agent.memory) > self.agent.batch_size:
+                    for _ in range(updates_per_step):
+                        loss = self.agent.replay()
+                        if loss is not None:
+                            self.training_history['loss_values'].append(loss)
+
+                for i in np.flatnonzero(dones):
+                    total_reward = float(info["episode_reward"][i])
+                    self.training_history['episode_rewards'].append(total_reward)
+                    self.training_history['episode_lengths'].append(int(info["episode_length"][i]))
+                    self.training_history['epsilon_values'].append(self.agent.epsilon)
+                    mlflow.log_metric("episode_reward", total_reward, step=episode)
+                    episode += 1
+                    if episode % log_freq == 0:
+                        avg_reward = np.mean(self.training_history['episode_rewards'][-100:])
+                        mlflow.log_metric("avg_reward_100", avg_reward, step=episode)
+                        print(f"Episode {episode}, Steps {steps}, Avg Reward: {avg_reward:.2f}, Epsilon: {self.agent.epsilon:.3f}")
+
+                observations = next_observations
+
+            final_model_path = "models/final_model.pth"
+            self.save_checkpoint(final_model_path)
+            mlflow.log_artifact(final_model_path, "models")
+
     def _log_hyperparameters(self, episodes: int, save_freq: int, eval_freq: int):
         """Log all hyperparameters to MLflow"""
         # Agent hyperparameters
@@ -216,11 +318,10 @@ class Trainer:
     
     def _action_to_idx(self, action: Action) -> int:
         """Convert Action to index for neural network"""
-        # Use the actual action space from the environment
+        # Tabela de índices do env: Action é igual à tupla (shot_type, shot_direction)
         try:
-            action_tuple = (action.shot_type, action.shot_direction)
-            return self.env.action_space.index(action_tuple)
-        except ValueError:
+            return self.env.action_index[action]
+        except KeyError:
             # If action not in action_space, this is an error
             raise ValueError(
                 f"Invalid action: {action}. "
@@ -228,8 +329,19 @@ class Trainer:
                 f"is not in the environment's action space."
             )
     
-    def evaluate(self, episodes: int = 100) -> Dict:
-        """Evaluate trained agent"""
+    def evaluate(self, episodes: int = 100, exact: bool = False) -> Dict:
+        """
+        Evaluate trained agent over ``episodes`` greedy matches.
+
+        With ``exact`` no match is played: the Markov chain of the greedy
+        policy is solved (``TennisMDP.evaluate``) for the expected reward and
+        length of a match and the probability of winning it, free of sampling
+        noise. Truncation by ``max_episode_steps`` is not modelled, so the
+        results use their own keys (``exact_avg_reward``, ``exact_win_prob``,
+        ``exact_avg_episode_length``) rather than the sampled ones.
+        """
+        if exact:
+            return self._evaluate_exact()
         original_epsilon = self.agent.epsilon
         self.agent.epsilon = 0  # No exploration during evaluation
         
@@ -267,6 +379,18 @@ class Trainer:
             'total_episodes': episodes
         }
     
+    def _evaluate_exact(self) -> Dict:
+        """Exact evaluation of the greedy policy on the undiscounted MDP of the env"""
+        if self._eval_mdp is None or self._eval_mdp.match_format != self.env.match_format:
+            self._eval_mdp = TennisMDP(self.env, gamma=1.0)
+        result = self._eval_mdp.evaluate(self.agent)
+        # P(vencer a partida) não é o win_rate amostrado (fração de episódios com recompensa > 0)
+        return {
+            'exact_avg_reward': result.expected_return,
+            'exact_win_prob': result.win_rate,
+            'exact_avg_episode_length': result.expected_steps
+        }
+
     def plot_training_history(self, save_path: str = None):
         """Plot training metrics"""
         fig, axes = plt.subplots(2, 3, figsize=(18, 12))
@@ -0,0 +1,92 @@
+"""
+Seedable random streams for environments, agents and replay.
+
+Two kinds of stream are used:
+
+- ``make_generator`` / ``spawn_generators``: NumPy ``Generator`` objects on a
+  ``Philox`` bit generator, built from (spawned) ``SeedSequence`` objects, for
+  anything that owns its stream (a ``TennisEnv``, an agent, a replay buffer);
+- ``CounterStreams``: one counter-based stream per environment id, for the
+  vector envs. Draw ``c`` of env ``i`` is a pure function of (root seed, ``i``,
+  ``c``), so N envs draw in one vectorized call, and a rollout gives the same
+  bits whether the envs run in one process or are sharded across any number
+  of workers.
+"""
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+SeedLike = Union[None, int, Sequence[int], np.random.SeedSequence]
+
+# Constantes do SplitMix64
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+_TO_UNIT = 1.0 / (1 << 53)
+
+
+def as_seed_sequence(seed: SeedLike = None) -> np.random.SeedSequence:
+    return seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+
+def make_generator(seed: SeedLike = None) -> np.random.Generator:
+    """``Generator`` on a ``Philox`` bit generator seeded from ``seed``."""
+    return np.random.Generator(np.random.Philox(as_seed_sequence(seed)))
+
+
+def spawn_generators(seed: SeedLike, n: int) -> List[np.random.Generator]:
+    """``n`` independent Philox generators spawned from ``seed``."""
+    return [np.random.Generator(np.random.Philox(child)) for child in as_seed_sequence(seed).spawn(n)]
+
+
+def splitmix64(x: np.ndarray) -> np.ndarray:
+    """SplitMix64 finalizer, element-wise over a uint64 array."""
+    with np.errstate(over="ignore"):
+        z = x.astype(np.uint64, copy=True)
+        z ^= z >> np.uint64(30)
+        z *= _MIX1
+        z ^= z >> np.uint64(27)
+        z *= _MIX2
+        z ^= z >> np.uint64(31)
+    return z
+
+
+class CounterStreams:
+    """
+    Independent uniform streams, one per environment id.
+
+    The ``c``-th uniform of stream ``i`` is ``splitmix64(key[i] + (c + 1) * golden)``
+    scaled to [0, 1), i.e. the SplitMix64 sequence started at the stream key.
+    Keys are derived from the root seed and the env id only.
+
+    Args:
+        seed: Root seed shared by every shard of a rollout.
+        ids: Global ids of the streams held here (default: ``range(n)``).
+        n: Number of streams when ``ids`` is not given.
+    """
+
+    def __init__(self, seed: SeedLike = None, ids: Optional[Sequence[int]] = None, n: Optional[int] = None):
+        self.seed_sequence = as_seed_sequence(seed)
+        self.ids = np.arange(n, dtype=np.uint64) if ids is None else np.asarray(ids, dtype=np.uint64)
+        root = self.seed_sequence.generate_state(1, np.uint64)[0]
+        with np.errstate(over="ignore"):
+            self.keys = splitmix64(root + splitmix64(self.ids + np.uint64(1)))
+        self.counters = np.zeros(len(self.ids), dtype=np.uint64)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def random(self, idx: Optional[np.ndarray] = None) -> np.ndarray:
+        """One uniform from each stream in ``idx`` (default: all), advancing them."""
+        if idx is None:
+            idx = np.arange(len(self.ids))
+        with np.errstate(over="ignore"):
+            self.counters[idx] += np.uint64(1)
+            bits = splitmix64(self.keys[idx] + self.counters[idx] * _GOLDEN)
+        return (bits >> np.uint64(11)) * _TO_UNIT
+
+    def get_state(self) -> np.ndarray:
+        return self.counters.copy()
+
+    def set_state(self, counters: np.ndarray):
+        self.counters[:] = counters
@@ -0,0 +1,96 @@
+import sys
+import json
+import argparse
+import pathlib
+import platform
+
+import numpy as np
+
+# Add project root to Python path
+project_root = pathlib.Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.data.transition_graph import TransitionBuilder
+from app.environment import benchmark
+
+
+def main():
+    """Benchmark env throughput and compare it with the stored baselines"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--transitions", default="data/processed/shot_transitions_combined.csv")
+    parser.add_argument("--steps", type=int, default=20_000, help="Steps per scalar scenario")
+    parser.add_argument("--vector-steps", type=int, default=200_000, help="Env steps per vector scenario")
+    parser.add_argument("--envs", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per scenario, the median is kept")
+    parser.add_argument("--only", nargs="*", default=None, help="Run scenarios whose name contains any of these")
+    parser.add_argument("--output", default="bench_output.json", help="JSON file with this run's results")
+    parser.add_argument("--baselines", default="scripts/benchmark_baselines.json")
+    parser.add_argument("--update-baselines", action="store_true", help="Store this run as the new baselines")
+    args = parser.parse_args()
+
+    graphs = {"synthetic": benchmark.synthetic_graph(args.seed)}
+    skipped_graphs = {}
+    transitions_path = project_root / args.transitions
+    if transitions_path.exists():
+        graphs["combined"] = TransitionBuilder(transitions_path=str(transitions_path), temperature=1.0).build()
+    else:
+        skipped_graphs["combined"] = f"transitions file not found: {args.transitions}"
+        print("Transitions file not found, benchmarking the synthetic graph only:", transitions_path)
+
+    results = benchmark.run(
+        graphs,
+        steps=args.steps,
+        vector_steps=args.vector_steps,
+        num_envs=args.envs,
+        seed=args.seed,
+        repeats=args.repeats,
+        only=args.only,
+    )
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            # Grafos medidos nesta execução; o combined só entra com o CSV de transições
+            "graphs": sorted(graphs),
+            "skipped_graphs": skipped_graphs,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"Wrote: {args.output}")
+
+    baselines_path = project_root / args.baselines
+    if args.update_baselines:
+        tolerance = {metric: default for metric, (_, default) in benchmark.METRICS.items()}
+        if baselines_path.exists():
+            with open(baselines_path) as fh:
+                tolerance.update(json.load(fh).get("tolerance", {}))
+        with open(baselines_path, "w") as fh:
+            json.dump(dict(report, tolerance=tolerance), fh, indent=2)
+        print(f"Updated baselines: {baselines_path}")
+        return 0
+    if not baselines_path.exists():
+        print("No baselines found, run with --update-baselines to store them:", baselines_path)
+        return 0
+
+    with open(baselines_path) as fh:
+        baselines = json.load(fh)
+    covered = baselines.get("meta", {}).get("graphs", ["synthetic"])
+    uncovered = sorted(set(graphs) - set(covered))
+    print(
+        f"Baselines cover graphs: {', '.join(covered)}"
+        + (f" ({', '.join(uncovered)} not gated)" if uncovered else "")
+    )
+    regressions = benchmark.compare(results, baselines)
+    for regression in regressions:
+        print("  regression:", regression)
+    print(f"{len(regressions)} regressions against {baselines_path.name}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+import sys
+import json
+import argparse
+import pathlib
+
+# Add project root to Python path
+project_root = pathlib.Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.environment.compact_engine import CompactTennisMatch
+from app.environment.conformance import replay
+from app.environment.tennis_engine import TennisMatch
+
+ENGINES = {
+    "default": TennisMatch,
+    "compact": CompactTennisMatch,
+}
+
+
+def main():
+    """Replay the raw charted points through a scoring engine and check every scoreboard"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="default")
+    parser.add_argument(
+        "--files",
+        nargs="*",
+        default=[
+            "charting-m-points-to-2009.csv",
+            "charting-m-points-2010s.csv",
+            "charting-m-points-2020s.csv",
+        ],
+        help="Point files under data/raw",
+    )
+    parser.add_argument("--matches-file", default="charting-m-matches.csv")
+    parser.add_argument("--max-matches", type=int, default=None)
+    parser.add_argument("--output", default=None, help="Optional JSON report path")
+    args = parser.parse_args()
+
+    raw_dir = project_root / "data" / "raw"
+    paths = [raw_dir / name for name in args.files if (raw_dir / name).exists()]
+    if not paths:
+        print("No point files found in", raw_dir)
+        return 1
+    matches_path = raw_dir / args.matches_file
+
+    report = replay(
+        paths,
+        engine_factory=ENGINES[args.engine],
+        matches_path=matches_path if matches_path.exists() else None,
+        max_matches=args.max_matches,
+    )
+    print(f"[{args.engine}] {report.summary()}")
+    for example in report.examples:
+        print("  mismatch:", example)
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(report.to_dict(), fh, indent=2)
+        print(f"Wrote: {args.output}")
+    return 1 if report.mismatched_matches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
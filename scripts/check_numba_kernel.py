@@ -0,0 +1,61 @@
+import sys
+import time
+import argparse
+import pathlib
+
+import numpy as np
+
+# Add project root to Python path
+project_root = pathlib.Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.data.transition_graph import TransitionBuilder
+from app.environment import numba_kernel
+from app.environment.tennis_env import TennisEnv
+from app.models.env import Turn
+
+
+def main():
+    """Cross-check the compiled kernel against the NumPy vector env and time whole matches"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--transitions", default="data/processed/shot_transitions_combined.csv")
+    parser.add_argument("--envs", type=int, default=64)
+    parser.add_argument("--steps", type=int, default=2000)
+    parser.add_argument("--matches", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--serial", action="store_true", help="Simulate matches on a single thread")
+    args = parser.parse_args()
+
+    if not numba_kernel.NUMBA_AVAILABLE:
+        print("numba is not installed: the kernel runs as plain Python and is only checked, not timed.")
+    transitions_path = project_root / args.transitions
+    if not transitions_path.exists():
+        print("Transitions file not found:", transitions_path)
+        return 1
+    graph = TransitionBuilder(transitions_path=str(transitions_path), temperature=1.0).build()
+
+    for serve_first in (True, False):
+        checked = numba_kernel.cross_check(graph, args.envs, args.steps, args.seed, serve_first=serve_first)
+        print(f"serve_first={serve_first}: {checked} env steps identical to the NumPy path")
+    if not numba_kernel.NUMBA_AVAILABLE:
+        return 0
+
+    env = TennisEnv(graph)
+    n_keys = len(env.last_shot_space) * len(env.direction_space)
+    # Política fixa: primeira ação legal após cada golpe
+    policy = env.action_masks[np.arange(n_keys) // len(env.direction_space)].argmax(axis=1)
+    numba_kernel.simulate_matches(env, policy, 1, seed=args.seed, parallel=not args.serial)  # compila
+    start = time.perf_counter()
+    _, winner, steps = numba_kernel.simulate_matches(
+        env, policy, args.matches, seed=args.seed, parallel=not args.serial
+    )
+    elapsed = time.perf_counter() - start
+    print(
+        f"{args.matches} matches, {steps.sum()} steps in {elapsed:.2f}s "
+        f"({steps.sum() / elapsed:,.0f} steps/s), player won {np.mean(winner == Turn.PLAYER.value):.1%}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+import sys
+import time
+import argparse
+import pathlib
+
+import numpy as np
+
+# Add project root to Python path
+project_root = pathlib.Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.agents.dqn_agent import DQNAgent
+from app.agents.tabular_agent import TabularQAgent
+from app.data.transition_graph import TransitionBuilder
+from app.environment.tennis_engine import MATCH_FORMATS
+from app.environment.tennis_env import TennisEnv
+from app.training.mdp import TennisMDP
+
+
+def load_policy(path: pathlib.Path, env: TennisEnv):
+    """Policy saved at ``path``: a DQN checkpoint (.pth), a Q-table (.npy) or an MDP solution (.npz)"""
+    if path.suffix == ".pth":
+        agent = DQNAgent(env)
+        agent.load(str(path))
+        return agent
+    if path.suffix == ".npy":
+        agent = TabularQAgent(env)
+        agent.load(str(path))
+        return agent
+    if path.suffix == ".npz":
+        with np.load(path) as solution:
+            return solution["policy"]
+    raise ValueError(f"Unknown policy file {path.name}, expected a .pth, .npy or .npz file.")
+
+
+def main():
+    """Evaluate a saved policy exactly on the tennis MDP: expected return, win probability and match length"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("checkpoint", help="DQN checkpoint (.pth), Q-table (.npy) or MDP solution (.npz)")
+    parser.add_argument("--transitions", default="data/processed/shot_transitions_combined.csv")
+    parser.add_argument("--format", choices=sorted(MATCH_FORMATS), default="standard")
+    parser.add_argument("--gamma", type=float, default=0.95)
+    parser.add_argument("--pc-serves-first", action="store_true")
+    args = parser.parse_args()
+
+    transitions_path = project_root / args.transitions
+    if not transitions_path.exists():
+        print("Transitions file not found:", transitions_path)
+        return 1
+    graph = TransitionBuilder(transitions_path=str(transitions_path), temperature=1.0).build()
+    env = TennisEnv(graph, serve_first=not args.pc_serves_first, match_format=MATCH_FORMATS[args.format])
+    policy = load_policy(pathlib.Path(args.checkpoint), env)
+
+    start = time.perf_counter()
+    mdp = TennisMDP(env, gamma=args.gamma)
+    result = mdp.evaluate(policy)
+    elapsed = time.perf_counter() - start
+    print(f"{len(mdp.scores)} scoreboards evaluated in {elapsed:.2f}s")
+    print(f"Expected return (gamma {args.gamma}): {result.expected_return:.4f}")
+    print(f"Win probability: {result.win_rate:.2%}")
+    print(f"Expected steps per match: {result.expected_steps:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
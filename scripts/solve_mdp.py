@@ -0,0 +1,53 @@
+import sys
+import time
+import argparse
+import pathlib
+
+# Add project root to Python path
+project_root = pathlib.Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.data.transition_graph import TransitionBuilder
+from app.environment.tennis_engine import MATCH_FORMATS
+from app.environment.tennis_env import TennisEnv
+from app.training.mdp import TennisMDP, save_solution
+
+
+def main():
+    """Solve the tennis MDP of a transition graph by value iteration and save the optimal policy"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--transitions", default="data/processed/shot_transitions_combined.csv")
+    parser.add_argument("--format", choices=sorted(MATCH_FORMATS), default="standard")
+    parser.add_argument("--gamma", type=float, default=0.95)
+    parser.add_argument("--tol", type=float, default=1e-6)
+    parser.add_argument("--pc-serves-first", action="store_true")
+    parser.add_argument("--output", default="models/optimal_policy.npz")
+    args = parser.parse_args()
+
+    transitions_path = project_root / args.transitions
+    if not transitions_path.exists():
+        print("Transitions file not found:", transitions_path)
+        return 1
+    graph = TransitionBuilder(transitions_path=str(transitions_path), temperature=1.0).build()
+    env = TennisEnv(graph, serve_first=not args.pc_serves_first, match_format=MATCH_FORMATS[args.format])
+
+    start = time.perf_counter()
+    mdp = TennisMDP(env, gamma=args.gamma)
+    solution = mdp.value_iteration(args.tol)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{len(mdp.scores)} scoreboards, {mdp.n_outcomes} step outcomes: "
+        f"{solution.iterations} sweeps in {elapsed:.2f}s (residual {solution.residual:.2e})"
+    )
+    score, first_serve, mask_class = mdp.decision(env)
+    print(f"Optimal value at the start of the match: {solution.values[score, first_serve, mask_class]:.4f}")
+
+    output = project_root / args.output
+    output.parent.mkdir(parents=True, exist_ok=True)
+    save_solution(mdp, solution, str(output))
+    print(f"Wrote: {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,8 +10,12 @@ project_root = pathlib.Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from app.agents.base_agent import BaseAgent
+from app.agents.mcts_agent import MCTSAgent
+from app.data.trajectory_recorder import TrajectoryRecorder
 from app.data.transition_graph import TransitionBuilder
+from app.environment.events import ConsoleNarrator
 from app.environment.tennis_env import TennisEnv, Action
+from app.models.env import ActionModel
 
 
 def load_transition_graph(path: Path):
@@ -19,29 +23,24 @@ def load_transition_graph(path: Path):
     return builder.build()
 
 
-def play_once(env: TennisEnv, agent: BaseAgent, render: bool = False):
-    strokes = []
+def play_once(env: TennisEnv, agent: BaseAgent, recorder: TrajectoryRecorder, render: bool = False):
+    n_shots = 0
     total_reward = 0.0
-    state = env.state
+    state = env.reset()
 
     while True:
         action = agent.act(state)
         next_state, reward, done, info = env.step(action)
 
-        # record basic info about the stroke
-        stroke_record = {
-            "shot_type": getattr(action, "shot_type", str(action)),
-            "shot_direction": getattr(action, "shot_direction", None),
-            "reward": float(reward),
-            "info": info or {},
-        }
-        strokes.append(stroke_record)
+        # Cada lance vira uma linha do dataset (estado, ação, recompensa, eventos do passo)
+        recorder.record(state, env.action_index[action], reward, next_state, done, info.get("TimeLimit.truncated", False))
+        n_shots += 1
 
         total_reward += reward
         state = next_state
 
         if render:
-            print(f"Shot {len(strokes)}: {stroke_record}")
+            print(f"Shot {n_shots}: {ActionModel.from_value(action).model_dump()} reward={float(reward)}")
             print(f"Match Score: Player {env.state.player_game_score}-{env.state.player_set_score} | PC {env.state.pc_game_score}-{env.state.pc_set_score}")
 
         if done:
@@ -49,9 +48,8 @@ def play_once(env: TennisEnv, agent: BaseAgent, render: bool = False):
 
     result = {
         "total_reward": float(total_reward),
-        "n_shots": len(strokes),
-        "strokes": strokes,
-        "final_info": info or {},
+        "n_shots": n_shots,
+        "final_info": {k: v for k, v in (info or {}).items() if k != "action_mask"},
     }
     return result
 
@@ -61,6 +59,8 @@ def main(
     transitions_csv: str = "data/processed/shot_transitions_combined.csv",
     matches: int = 1,
     render: bool = True,
+    output_dir: str = "play_matches",
+    agent_type: str = "dqn",
 ):
     project_root = Path(__file__).parent.parent
 
@@ -72,39 +72,43 @@ def main(
     transition_graph = load_transition_graph(transitions_path)
     print("Creating environment...")
     env = TennisEnv(transition_graph=transition_graph, serve_first=False)
+    if render:
+        # Narração lance a lance no console
+        env.subscribe(ConsoleNarrator())
 
     print("Initializing agent...")
-    agent = DQNAgent(
-        env=env,
-        epsilon=0.5
-    )  # use defaults; ensure signature matches your implementation
-
-    ckpt_path = project_root / checkpoint
-    if ckpt_path.exists():
-        print(f"Loading checkpoint: {ckpt_path}")
-        agent.load(str(ckpt_path))
+    if agent_type == "mcts":
+        # Busca a cada lance sobre o próprio env: não precisa de checkpoint
+        agent = MCTSAgent(env)
     else:
-        print(
-            f"Checkpoint not found at {ckpt_path}; running agent without weights (random/initialized policy)"
-        )
-
-    results = []
-    for i in range(matches):
-        print(f"\n=== Playing match {i+1} ===")
-        res = play_once(env, agent, render=render)
-        results.append(res)
-        print(
-            f"Match {i+1} result: total_reward={res['total_reward']:.2f}, shots={res['n_shots']}"
-        )
-        # print final info if available (scores, winner flag, etc.)
-        if res["final_info"]:
-            print("Final info:", json.dumps(res["final_info"], indent=2))
-
-    # optionally write a summary file
-    out_path = project_root / "play_matches_results.json"
-    with open(out_path, "w") as fh:
-        json.dump(results, fh, indent=2)
-    print(f"\nSaved play results to {out_path}")
+        agent = DQNAgent(
+            env=env,
+            epsilon=0.5
+        )  # use defaults; ensure signature matches your implementation
+
+        ckpt_path = project_root / checkpoint
+        if ckpt_path.exists():
+            print(f"Loading checkpoint: {ckpt_path}")
+            agent.load(str(ckpt_path))
+        else:
+            print(
+                f"Checkpoint not found at {ckpt_path}; running agent without weights (random/initialized policy)"
+            )
+
+    # Lances gravados em Parquet colunar (app/data/trajectory_recorder.py), um arquivo por bloco de linhas
+    out_path = project_root / output_dir
+    with TrajectoryRecorder(out_path, env, events=True) as recorder:
+        for i in range(matches):
+            print(f"\n=== Playing match {i+1} ===")
+            res = play_once(env, agent, recorder, render=render)
+            print(
+                f"Match {i+1} result: total_reward={res['total_reward']:.2f}, shots={res['n_shots']}"
+            )
+            # print final info if available (scores, winner flag, etc.)
+            if res["final_info"]:
+                print("Final info:", json.dumps(res["final_info"], indent=2))
+
+    print(f"\nSaved {recorder.rows_written} shots to {out_path} (read with app.data.trajectory_recorder.read_trajectories)")
 
 
 if __name__ == "__main__":
@@ -63,6 +63,7 @@ def main():
         "save_freq": 100,
         "eval_freq": 200,
         "run_name": "dqn_tennis_v1",
+        "exact_eval": True,
         "tags": {
             "model_type": "DQN",
             "environment": "tennis",
@@ -80,11 +81,11 @@ def main():
     
     # Final evaluation
     print("Running final evaluation...")
-    final_results = trainer.evaluate(episodes=100)
+    final_results = trainer.evaluate(exact=True)
     print(f"Final evaluation results:")
-    print(f"  Average reward: {final_results['avg_reward']:.2f}")
-    print(f"  Win rate: {final_results['win_rate']:.2%}")
-    print(f"  Average episode length: {final_results['avg_episode_length']:.1f}")
+    print(f"  Expected reward: {final_results['exact_avg_reward']:.2f}")
+    print(f"  Win probability: {final_results['exact_win_prob']:.2%}")
+    print(f"  Expected episode length: {final_results['exact_avg_episode_length']:.1f}")
     
     # Save final plots
     trainer.plot_training_history(save_path="training_results.png")
@@ -0,0 +1,6 @@
+import sys
+import pathlib
+
+# Add project root to Python path (same pattern as the scripts)
+project_root = pathlib.Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
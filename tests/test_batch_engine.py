@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from app.environment.batch_engine import NO_WINNER, BatchTennisMatch, score_ids
+from app.environment.tennis_engine import MATCH_FORMATS, TennisMatch
+from app.models.env import Turn
+
+
+@pytest.mark.parametrize("name", sorted(MATCH_FORMATS))
+def test_batch_engine_scores_like_tennis_match(name):
+    match_format = MATCH_FORMATS[name]
+    n = 8
+    winners = np.random.default_rng(0).random((500, n)) < 0.5
+    batch = BatchTennisMatch(n, match_format=match_format)
+    references = [TennisMatch(match_format) for _ in range(n)]
+    for match in references:
+        match.start_match()
+
+    for points in winners:
+        live = np.flatnonzero(batch.winner == NO_WINNER)
+        if not len(live):
+            break
+        batch.point(points[live], idx=live)
+        for i in live:
+            match = references[i]
+            match.point(player=Turn.PLAYER if points[i] else Turn.PC)
+            score = match.score()
+            game, game_shift, set_state, tiebreak = score_ids(score, match_format)
+            assert (batch.game[i], batch.game_shift[i], batch.set[i], batch.tiebreak[i]) == (
+                game,
+                game_shift,
+                set_state,
+                tiebreak,
+            )
+            assert tuple(batch.sets_won[i]) == score[4:]
+            expected = NO_WINNER if match.winner is None else match.winner.value
+            assert batch.winner[i] == expected
+    assert (batch.winner != NO_WINNER).all()
@@ -0,0 +1,24 @@
+from app.environment.benchmark import BenchmarkResult, compare
+
+
+def _result(seconds: float, p99_us: float) -> BenchmarkResult:
+    return BenchmarkResult(
+        steps=1000, episodes=10, seconds=seconds, p50_us=1.0, p99_us=p99_us, alloc_bytes_per_step=100.0
+    )
+
+
+def test_median_of_runs():
+    runs = [_result(1.0, 5.0), _result(3.0, 50.0), _result(2.0, 9.0)]
+    median = BenchmarkResult.median(runs)
+    assert (median.seconds, median.p99_us, median.steps_per_s) == (2.0, 9.0, 500.0)
+
+
+def test_compare_gates_throughput_not_latency():
+    baselines = {"results": {"s": _result(1.0, 5.0).to_dict()}}
+    # p99 10x pior: latência só é informativa por padrão
+    assert compare({"s": _result(1.5, 50.0).to_dict()}, baselines) == []
+    regressions = compare({"s": _result(2.5, 5.0).to_dict()}, baselines)
+    assert [r.split(":")[1].split()[0] for r in regressions] == ["steps_per_s", "episodes_per_s"]
+    # Uma tolerância explícita nas baselines volta a barrar a latência
+    strict = dict(baselines, tolerance={"p99_us": 1.0})
+    assert any("p99_us" in r for r in compare({"s": _result(1.0, 50.0).to_dict()}, strict))
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from app.environment.benchmark import synthetic_graph
+from app.environment.tennis_engine import MATCH_FORMATS
+from app.environment.tennis_env import TennisEnv
+
+
+@pytest.mark.parametrize("name", sorted(MATCH_FORMATS))
+def test_compact_engine_plays_like_tennis_match(name):
+    graph = synthetic_graph(seed=0)
+    envs = [
+        TennisEnv(graph, match_format=MATCH_FORMATS[name], compact_engine=compact, seed=1, max_episode_steps=None)
+        for compact in (False, True)
+    ]
+    reference, compact = envs
+    rng = np.random.default_rng(0)
+    states = [env.reset() for env in envs]
+    assert states[0] == states[1]
+
+    # Mesmas ações e mesma semente: só o motor de placar muda
+    for _ in range(3000):
+        action = int(rng.choice(np.flatnonzero(reference.action_mask())))
+        state, reward, done, _ = reference.step(action)
+        assert compact.step(action)[:3] == (state, reward, done)
+        assert compact.match.score() == reference.match.score()
+        assert compact.server == reference.server
+        if done:
+            assert compact.match.winner == reference.match.winner
+            reference.reset()
+            compact.reset()
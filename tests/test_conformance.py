@@ -0,0 +1,32 @@
+import pathlib
+
+import pytest
+
+from app.environment.compact_engine import CompactTennisMatch
+from app.environment.conformance import load_match_formats, replay
+from app.environment.tennis_engine import MatchFormat, TennisMatch
+
+DATA = pathlib.Path(__file__).parent / "data"
+POINTS = DATA / "charting-points.csv"
+MATCHES = DATA / "charting-matches.csv"
+
+
+def test_malformed_best_of_is_not_guessed():
+    formats = load_match_formats(MATCHES)
+    assert formats["m1"] == (MatchFormat(sets_to_win=2), "1")
+    assert formats["m2"] is None
+
+
+@pytest.mark.parametrize("engine", [TennisMatch, CompactTennisMatch])
+def test_replay_of_charted_points(engine):
+    report = replay([POINTS], engine_factory=engine, matches_path=MATCHES)
+    # m1: partida inteira com tiebreak; m2: "Best of" inválido; m3: placar gravado errado no 7º ponto
+    assert report.matches == 2
+    assert report.skipped_matches == 1
+    assert report.points == 196
+    assert report.mismatched_matches == 1
+    assert report.examples[0]["match_id"] == "m3"
+    assert report.examples[0]["pt"] == "7"
+    assert report.checked_points == 178 + 6
+    assert report.skipped_points == 6 + 6
+    assert report.engine_points == 178 + 12
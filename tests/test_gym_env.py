@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("gymnasium")
+
+from app.environment.benchmark import synthetic_graph
+from app.environment.gym_env import TennisGymEnv
+from app.environment.tennis_engine import SHORT_SET, STANDARD
+
+
+def test_observation_space_follows_match_format():
+    env = TennisGymEnv(synthetic_graph(seed=0), match_format=SHORT_SET, max_episode_steps=None)
+    env.reset(seed=0)
+    env.env.set_match_format(STANDARD)
+    observation, _ = env.reset()
+    assert env.observation_space.high[-2] == STANDARD.games_per_set + 1
+
+    rng = np.random.default_rng(0)
+    done = False
+    while not done:
+        assert env.observation_space.contains(observation)
+        action = int(rng.choice(np.flatnonzero(env.env.action_mask())))
+        observation, _, done, _, _ = env.step(action)
@@ -0,0 +1,49 @@
+import numpy as np
+
+from app.environment.benchmark import synthetic_graph
+from app.environment.events import EnvEvent
+from app.environment.tennis_env import TennisEnv
+from app.models.env import Turn
+
+
+def _points(macro_steps: bool, n_points: int):
+    """(player served, player won, player decisions) of the points of a fixed last-shot policy."""
+    env = TennisEnv(synthetic_graph(seed=0), macro_steps=macro_steps, seed=1, max_episode_steps=None)
+    n_dirs = len(env.direction_space)
+    masks = env.action_masks[np.arange(len(env.last_shot_space) * n_dirs) // n_dirs]
+    policy = np.where(masks, np.random.default_rng(0).random(masks.shape), -1.0).argmax(axis=1)
+
+    points = []
+    decisions = 0
+
+    def on_event(event, data):
+        nonlocal decisions
+        if event == EnvEvent.POINT_WON:
+            points.append((served, data["winner"] == Turn.PLAYER, decisions))
+            decisions = 0
+
+    env.subscribe(on_event)
+    env.reset()
+    while len(points) < n_points:
+        served = env.server == Turn.PLAYER
+        decisions += 1
+        key = env.compiled_graph.keys[(env.state.last_shot_type, env.state.last_shot_direction)]
+        _, _, done, _ = env.step(int(policy[key]))
+        if done:
+            env.reset()
+    return np.array(points, dtype=float).T
+
+
+def _close(a: np.ndarray, b: np.ndarray) -> bool:
+    """Whether two sample means differ by less than four standard errors."""
+    se = np.sqrt(a.var() / len(a) + b.var() / len(b))
+    return abs(a.mean() - b.mean()) < 4 * se
+
+
+def test_macro_steps_draw_points_like_shot_by_shot_play():
+    shots = _points(macro_steps=False, n_points=10_000)
+    macro = _points(macro_steps=True, n_points=10_000)
+    for served in (1.0, 0.0):
+        # Frequência de pontos do jogador, no saque e na devolução
+        assert _close(shots[1][shots[0] == served], macro[1][macro[0] == served])
+    assert _close(shots[2], macro[2])
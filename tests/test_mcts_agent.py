@@ -0,0 +1,46 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from app.agents.mcts_agent import MCTSAgent
+from app.environment.benchmark import synthetic_graph
+from app.environment.tennis_engine import MATCH_TIEBREAK
+from app.environment.tennis_env import TennisEnv
+from app.models.env import Turn
+from app.training.mdp import TennisMDP
+
+
+def test_mcts_beats_random_regret():
+    env = TennisEnv(synthetic_graph(0), match_format=MATCH_TIEBREAK, seed=1)
+    mdp = TennisMDP(env, gamma=0.95)
+    solution = mdp.value_iteration()
+    agent = MCTSAgent(env, simulations=4, rollouts=4096, parallel=False, seed=0)
+    rng = np.random.default_rng(0)
+
+    mcts_regret, random_regret = [], []
+    state = env.reset()
+    for _ in range(20):
+        mask = env.action_mask()
+        score, first_serve, _ = mdp.decision(env)
+        q = solution.chain[score, : mdp.n_actions] if env.turn == Turn.PC else solution.q[score, first_serve]
+        best = q[mask].max()
+        mcts_regret.append(best - q[env.action_index[agent.act(state)]])
+        random_regret.append(best - q[mask].mean())
+        # Posições de jogo aleatório: a busca não segue a própria linha
+        state, _, done, _ = env.step(int(rng.choice(np.flatnonzero(mask))))
+        if done:
+            state = env.reset()
+
+    assert np.mean(mcts_regret) < 0.5 * np.mean(random_regret)
+
+
+def test_mcts_rejects_a_state_other_than_its_env():
+    env = TennisEnv(synthetic_graph(0), match_format=MATCH_TIEBREAK, seed=1)
+    agent = MCTSAgent(env, simulations=1, rollouts=1, leaf_rollouts=1, parallel=False, seed=0)
+    state = env.reset()
+    # Estado visto do lado do PC, como o de um adversário em self-play
+    mirrored = replace(state, player_serves=not state.player_serves)
+    with pytest.raises(ValueError, match="set_opponent"):
+        agent.act(mirrored)
+    assert agent.act(state) in env.action_table
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from app.environment.benchmark import synthetic_graph
+from app.environment.tennis_engine import SHORT_SET
+from app.environment.tennis_env import TennisEnv
+from app.training.mdp import TennisMDP
+
+GAMMA = 0.95
+
+
+@pytest.fixture(scope="module")
+def solved():
+    env = TennisEnv(synthetic_graph(seed=0), match_format=SHORT_SET, seed=1, macro_steps=True, max_episode_steps=None)
+    mdp = TennisMDP(env, gamma=GAMMA)
+    return env, mdp, mdp.value_iteration(tol=1e-8)
+
+
+def test_value_iteration_reaches_a_fixed_point(solved):
+    _, mdp, solution = solved
+    assert solution.residual <= 1e-8
+    q, chain = mdp.backup(solution.values, solution.chain)
+    values, _ = mdp.greedy(q, solution.values)
+    # Contração de fator gamma: mais um backup quase não mexe nos valores
+    np.testing.assert_allclose(values, solution.values, atol=1e-6)
+    np.testing.assert_allclose(chain, solution.chain, atol=1e-6)
+
+
+def test_optimal_value_matches_monte_carlo(solved):
+    env, mdp, solution = solved
+    env.reset()
+    score, first_serve, mask_class = mdp.decision(env)
+    expected = solution.values[score, first_serve, mask_class]
+
+    returns = []
+    for _ in range(2000):
+        env.reset()
+        total, discount, done = 0.0, 1.0, False
+        while not done and discount > 1e-8:
+            _, reward, done, _ = env.step(mdp.action(solution, env))
+            total += discount * reward
+            discount *= GAMMA
+        returns.append(total)
+    returns = np.array(returns)
+    assert abs(returns.mean() - expected) < 4 * returns.std() / np.sqrt(len(returns))
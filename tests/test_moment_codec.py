@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from app.environment.batch_engine import BatchTennisMatch
+from app.environment.compact_engine import CompactTennisMatch
+from app.environment.moment_codec import decode_moments, encode_batch, encode_compact, encode_moments
+from app.environment.tennis_engine import MATCH_FORMATS, MATCH_TIEBREAK, MatchMoment, TennisMatch
+from app.models.env import Turn
+
+
+def _play(match, winners):
+    for player_won in winners:
+        match.point(player=Turn.PLAYER if player_won else Turn.PC)
+
+
+def test_match_tiebreak_survives_round_trip():
+    match = TennisMatch(MATCH_TIEBREAK)
+    match.start_match()
+    _play(match, [True, False] * 6)
+    moment = MatchMoment.from_bytes(match.match_moment.to_bytes())
+    assert moment.current_game.max_score == MATCH_TIEBREAK.tiebreak_points
+
+    match.match_moment = moment
+    _play(match, [True, True])
+    # 8-6 num tiebreak de 10 pontos ainda não decide nada
+    assert match.winner is None
+    assert match.score()[:2] == (8, 6)
+
+
+@pytest.mark.parametrize("name", sorted(MATCH_FORMATS))
+def test_engines_encode_the_same_moments(name):
+    match_format = MATCH_FORMATS[name]
+    rng = np.random.default_rng(0)
+    reference = TennisMatch(match_format)
+    reference.start_match()
+    compact = CompactTennisMatch(match_format)
+    compact.start_match()
+    batch = BatchTennisMatch(1, match_format=match_format)
+    while reference.winner is None:
+        player_won = bool(rng.random() < 0.5)
+        _play(reference, [player_won])
+        _play(compact, [player_won])
+        batch.point(np.array([player_won]))
+        if reference.winner is not None:
+            break
+        packed = encode_moments([reference.match_moment])
+        assert encode_compact(compact).tobytes() == packed.tobytes()
+        assert encode_batch(batch).tobytes() == packed.tobytes()
+        decoded = decode_moments(packed)[0]
+        assert encode_moments([decoded]).tobytes() == packed.tobytes()
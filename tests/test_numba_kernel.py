@@ -0,0 +1,16 @@
+import pytest
+
+from app.environment import numba_kernel
+from app.environment.benchmark import synthetic_graph
+from app.environment.tennis_engine import MATCH_FORMATS
+
+pytestmark = pytest.mark.skipif(not numba_kernel.NUMBA_AVAILABLE, reason="numba is not installed")
+
+
+@pytest.mark.parametrize("name", sorted(MATCH_FORMATS))
+def test_kernel_matches_numpy_backend(name):
+    steps = numba_kernel.cross_check(
+        synthetic_graph(seed=0), num_envs=16, steps=500, seed=0, match_format=MATCH_FORMATS[name]
+    )
+    # Passos do vetor mais os das partidas inteiras do simulate_matches
+    assert steps > 16 * 500
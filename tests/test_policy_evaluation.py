@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from app.environment.benchmark import synthetic_graph
+from app.environment.numba_kernel import simulate_matches
+from app.environment.tennis_engine import MATCH_FORMATS
+from app.environment.tennis_env import TennisEnv
+from app.models.env import Turn
+from app.training.mdp import TennisMDP
+
+
+@pytest.mark.parametrize("name", sorted(MATCH_FORMATS))
+def test_evaluate_matches_monte_carlo(name):
+    env = TennisEnv(synthetic_graph(seed=0), match_format=MATCH_FORMATS[name], seed=0)
+    # gamma 1: o retorno exato é o total da partida que a simulação soma
+    mdp = TennisMDP(env, gamma=1.0)
+    masks = env.action_masks[np.arange(mdp.n_keys) // len(env.direction_space)]
+    policy = np.where(masks, np.random.default_rng(0).random(masks.shape), -1.0).argmax(axis=1)
+    evaluation = mdp.evaluate(np.broadcast_to(policy, (len(mdp.scores), 2, mdp.n_keys)))
+
+    # Partida i = primeiro episódio do env i de um VectorTennisEnv com a mesma semente
+    total_reward, winner, steps = simulate_matches(env, policy, 2000, seed=0, parallel=False)
+    wins = winner == Turn.PLAYER.value
+    for exact, samples in (
+        (evaluation.expected_return, total_reward),
+        (evaluation.win_rate, wins),
+        (evaluation.expected_steps, steps),
+    ):
+        assert abs(exact - samples.mean()) < 4 * samples.std() / np.sqrt(len(samples))
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from app.data.trajectory_recorder import TrajectoryRecorder, read_trajectories
+from app.environment.benchmark import synthetic_graph
+from app.environment.vector_env import VectorTennisEnv
+
+
+def test_batch_larger_than_chunk(tmp_path):
+    vec = VectorTennisEnv(synthetic_graph(seed=0), num_envs=10, seed=0)
+    observations = vec.reset()
+    rng = np.random.default_rng(0)
+    with TrajectoryRecorder(tmp_path, vec.env, num_envs=10, chunk_size=4) as recorder:
+        for _ in range(3):
+            mask = vec.action_mask()
+            actions = np.where(mask, rng.random(mask.shape), -1.0).argmax(axis=1)
+            next_observations, rewards, dones, info = vec.step(actions)
+            final = info.get("final_observation", next_observations)
+            recorder.record_batch(observations, actions, rewards, final, dones)
+            observations = next_observations
+
+    table = read_trajectories(tmp_path)
+    assert table.num_rows == 30
+    assert sorted(table.column("env").to_pylist()) == sorted(list(range(10)) * 3)
+    steps = table.column("step").to_numpy()
+    assert set(steps.tolist()) == {0, 1, 2}
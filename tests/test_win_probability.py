@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from app.environment.compact_engine import P1, CompactTennisMatch, engine_tables
+from app.environment.tennis_engine import BEST_OF_3, SHORT_SET, STANDARD
+from app.environment.win_probability import WinProbabilityTables, load_tables, unit_win_probability
+from app.models.env import Turn
+
+
+def _game_formula(p: float) -> float:
+    """Closed form of P(winning a game with deuce and advantage) from 0-0."""
+    q = 1.0 - p
+    return p**4 * (1 + 4 * q + 10 * q**2) + 20 * p**3 * q**3 * p**2 / (1 - 2 * p * q)
+
+
+def test_unit_win_probability_matches_game_formula():
+    p = np.array([0.3, 0.5, 0.6, 0.75])
+    game = unit_win_probability(engine_tables(STANDARD).game, p)
+    np.testing.assert_allclose(game[:, 0], [_game_formula(x) for x in p])
+    assert game[2, 0] == pytest.approx(0.736, abs=1e-3)
+
+
+def test_probabilities_match_monte_carlo():
+    p_serve, p_return = 0.6, 0.45
+    tables = WinProbabilityTables.build([p_serve], [p_return], BEST_OF_3)
+    exact = tables.probabilities((0, 0), game_state=0, set_state=0, sets=(0, 0), server=P1)
+
+    rng = np.random.default_rng(0)
+    n = 2000
+    won = {"game": [], "set": [], "match": []}
+    for _ in range(n):
+        match = CompactTennisMatch(BEST_OF_3)
+        player_serves = True
+        first_game = first_set = None
+        while match.winner is None:
+            player_won = rng.random() < (p_serve if player_serves else p_return)
+            _, _, _, _, game_winner, set_winner = match.point(Turn.PLAYER if player_won else Turn.PC)
+            if game_winner is not None:
+                # O sacador troca a cada game, tiebreak incluído
+                player_serves = not player_serves
+                first_game = game_winner if first_game is None else first_game
+            if set_winner is not None and first_set is None:
+                first_set = set_winner
+        won["game"].append(first_game == Turn.PLAYER)
+        won["set"].append(first_set == Turn.PLAYER)
+        won["match"].append(match.winner == Turn.PLAYER)
+
+    for name, samples in won.items():
+        samples = np.array(samples, dtype=float)
+        assert abs(exact[name] - samples.mean()) < 4 * samples.std() / np.sqrt(n)
+
+
+def test_tables_round_trip_through_cache(tmp_path):
+    grid = (0.4, 0.6)
+    built = load_tables(grid, grid, SHORT_SET, cache_dir=tmp_path)
+    (path,) = tmp_path.glob("*.npz")
+    loaded = WinProbabilityTables.load(path)
+    assert loaded.format == SHORT_SET
+    for name in ("p_serve", "p_return", "game", "tiebreak", "set_outcomes", "match"):
+        np.testing.assert_array_equal(getattr(loaded, name), getattr(built, name))
+    assert loaded.probabilities((1, 0), 0, 0, (0, 0), P1) == built.probabilities((1, 0), 0, 0, (0, 0), P1)